@@ -7,6 +7,10 @@ import stat
 import sys
 from pathlib import Path
 
+SCRIPT_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPT_DIR))
+from reference_index import write_index
+
 SKILL_TEMPLATE = '''---
 name: {name}
 description: TODO: Describe what this skill does and when to use it.
@@ -110,6 +114,9 @@ def init_skill(name: str, base_path: str = '.claude/skills') -> Path:
         EXAMPLE_REFERENCE.format(title=title)
     )
 
+    # Section index of references/ (package_skill.py builds a fresh one into the archive)
+    write_index(skill_path)
+
     return skill_path
 
 
@@ -144,7 +151,7 @@ def main():
     print("Next steps:")
     print(f"  1. Edit {skill_path}/SKILL.md")
     print("  2. Add scripts to scripts/")
-    print("  3. Add documentation to references/")
+    print("  3. Add documentation to references/ (reindex: scripts/reference_index.py)")
     print(f"  4. Validate: python .claude/skills/skill-authoring/scripts/quick_validate.py {skill_path}")
 
 
@@ -1,37 +1,191 @@
 #!/usr/bin/env python3
 """Package a skill into a distributable .skill file."""
 
+import argparse
+import json
 import os
 import sys
-import zipfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Import validation from sibling module
 SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
-from quick_validate import validate_skill
+from quick_validate import ValidationCache, discover_skills, validate_skill_cached
+from reference_index import INDEX_NAME, REFERENCES_DIR, build_index, index_text
+from skill_archive import (
+    COMPRESSION_LEVELS,
+    SkillArchive,
+    build_manifest,
+    file_record,
+    file_sha256,
+    manifest_path,
+    write_manifest,
+)
+from skill_inventory import LARGE_FILE_SIZE, FileEntry, Inventory, format_size, parse_size
 
 
-def package_skill(skill_path: str, output_dir: str | None = None) -> Path | None:
+def build_package(
+    inventory: Inventory,
+    output_file: Path,
+    compression: str = 'normal',
+    workers: int | None = None,
+    log=print,
+) -> dict:
+    """
+    Write the .skill archive of the files of a (validated) skill's inventory.
+
+    Writes to a temporary file first; raises on failure.
+
+    Returns:
+        Stats: files, reused, size, compressed, sha256, changed, directories
+        (per top-level directory sizes)
+    """
+    tmp_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.tmp")
+    try:
+        total_size = total_compressed = reused = 0
+        compressed: dict[str, int] = {}
+        entries = [(entry.path, entry.arcname) for entry in inventory.files]
+        records = {arcname: file_record(file_path) for file_path, arcname in entries}
+        with SkillArchive(tmp_file, compression, workers) as archive:
+            archive.reuse_from(output_file, records)
+            for stats in archive.add_files(entries):
+                total_size += stats.file_size
+                total_compressed += stats.compress_size
+                compressed[stats.arcname] = stats.compress_size
+                reused += stats.reused
+                log(f"  = {stats.arcname} (unchanged)" if stats.reused else f"  + {stats.arcname}")
+
+        # Identical bytes: keep the existing file (and its mtime) as it is
+        digest = file_sha256(tmp_file)
+        changed = digest is None or digest != file_sha256(output_file)
+        if changed:
+            os.replace(tmp_file, output_file)
+        else:
+            tmp_file.unlink()
+        write_manifest(output_file, build_manifest(records, compression, digest))
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+    return {
+        'files': len(entries),
+        'reused': reused,
+        'size': total_size,
+        'compressed': total_compressed,
+        'sha256': digest,
+        'changed': changed,
+        'directories': inventory.directory_sizes(compressed),
+    }
+
+
+def walk_order(arcname: str) -> list[tuple[int, str]]:
+    """Sort key of an arcname in inventory order (per directory: files, then subdirectories)."""
+    *dirs, name = arcname.split('/')
+    return [(1, d) for d in dirs] + [(0, name)]
+
+
+def add_reference_index(inventory: Inventory, index_file: Path) -> dict | None:
+    """
+    Package a freshly built references/index.json in place of the skill's own.
+
+    The index covers the reference files of the inventory (so not those left
+    out as too large) and is written to index_file (a temporary file next to
+    the archive), so packaging never modifies the skill directory.
+
+    Returns:
+        The index, or None if the skill has no (packaged) references/
+    """
+    arcname = f"{REFERENCES_DIR}/{INDEX_NAME}"
+    if arcname in inventory.ignored or f"{REFERENCES_DIR}/" in inventory.ignored:
+        return None
+    files = [entry for entry in inventory.files if entry.arcname != arcname]
+    index = build_index(inventory.root, mtimes=False, only={entry.arcname for entry in files})
+    if index is None:
+        return None
+    index_file.write_text(index_text(index), encoding='utf-8')
+
+    # Where the walk would have put it, whether or not the skill has an index of its own
+    key = walk_order(arcname)
+    position = next((i for i, entry in enumerate(files) if walk_order(entry.arcname) > key), len(files))
+    files.insert(position, FileEntry(index_file, arcname, index_file.stat().st_size))
+    inventory.files = files
+    return index
+
+
+def inventory_report(inventory: Inventory) -> dict:
+    """JSON-serializable large-file and .skillignore findings of an inventory."""
+    return {
+        'large_files': [
+            {'path': entry.arcname, 'size': entry.size, 'excluded': inventory.exclude_large}
+            for entry in inventory.large
+        ],
+        'ignored': inventory.ignored,
+    }
+
+
+def print_large_files(inventory: Inventory):
+    """Warn about files above the size threshold."""
+    action = "excluded" if inventory.exclude_large else "included"
+    for entry in inventory.large:
+        print(f"Warning: Large file {action}: {entry.arcname} ({format_size(entry.size)} "
+              f"> {format_size(inventory.max_file_size)})")
+
+
+def print_directory_sizes(directories: dict[str, dict], log=print):
+    """Uncompressed vs compressed size per top-level directory."""
+    log("Size by directory:")
+    for name, group in directories.items():
+        ratio = group['compressed'] / group['size'] if group['size'] else 1.0
+        log(f"  {name:<24} {group['files']:>5} files  {format_size(group['size']):>10} -> "
+            f"{format_size(group['compressed']):>10} ({ratio:.0%})")
+
+
+def package_skill(
+    skill_path: str,
+    output_dir: str | None = None,
+    compression: str = 'normal',
+    quiet: bool = False,
+    workers: int | None = None,
+    max_file_size: int = LARGE_FILE_SIZE,
+    exclude_large: bool = False,
+) -> Path | None:
     """
     Package a skill folder into a .skill file (ZIP format).
 
+    The archive is reproducible (same tree, same bytes) and comes with a
+    <name>.skill.manifest.json of per-file SHA-256 digests. Repackaging
+    copies unchanged entries from the previous archive, and leaves the
+    .skill file untouched if its content would not change. Paths matched by
+    the skill's .skillignore are left out. The archive gets a freshly built
+    references/index.json (section offsets for loading references
+    piecemeal); the skill directory itself is not modified.
+
     Args:
         skill_path: Path to the skill directory
         output_dir: Optional output directory (defaults to current dir)
+        compression: 'store', 'fast', 'normal' or 'max'
+        quiet: Only print errors and the created package
+        workers: Compression threads (default: CPU count + 4, max 32)
+        max_file_size: Files above this size (bytes) are reported
+        exclude_large: Leave files above max_file_size out of the package
 
     Returns:
         Path to the created .skill file, or None on failure
     """
+    log = (lambda *args: None) if quiet else print
     path = Path(skill_path)
 
     if not path.exists() or not path.is_dir():
         print(f"Error: Skill directory not found: {skill_path}")
         return None
 
-    # Validate before packaging
-    print(f"Validating {skill_path}...")
-    is_valid, errors = validate_skill(skill_path)
+    # Validate before packaging (unchanged SKILL.md: result from the validation cache)
+    log(f"Validating {skill_path}...")
+    cache = ValidationCache()
+    is_valid, errors, cached = validate_skill_cached(skill_path, cache)
+    cache.save()
 
     if not is_valid:
         print("Validation failed:")
@@ -39,48 +193,224 @@ def package_skill(skill_path: str, output_dir: str | None = None) -> Path | None
             print(f"  - {error}")
         return None
 
-    print("Validation passed")
+    log("Validation passed (cached)" if cached else "Validation passed")
 
     # Determine output path
     skill_name = path.name
     output_path = Path(output_dir) if output_dir else Path('.')
     output_file = output_path / f"{skill_name}.skill"
 
-    # Create ZIP file
-    print(f"Creating {output_file}...")
+    # Pre-pass: what gets packaged, and how big it is
+    inventory = Inventory(path, max_file_size, exclude_large)
+    print_large_files(inventory)
+    if inventory.ignored:
+        log(f"Ignored by .skillignore: {len(inventory.ignored)} path(s)")
 
+    # Create ZIP file (blocks compressed in parallel, written in sorted order)
+    log(f"Creating {output_file}...")
+
+    index_file = output_file.with_name(f"{output_file.name}.index.{os.getpid()}.tmp")
     try:
-        with zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for root, dirs, files in os.walk(path):
-                # Skip __pycache__ and hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+        # The package ships a current reference section index
+        index = add_reference_index(inventory, index_file)
+        if index is not None:
+            log(f"Reference index: {REFERENCES_DIR}/{INDEX_NAME} ({len(index['files'])} files)")
+        stats = build_package(inventory, output_file, compression, workers, log)
+    except Exception as e:
+        print(f"Error creating package: {e}")
+        return None
+    finally:
+        index_file.unlink(missing_ok=True)
 
-                for file in files:
-                    if file.startswith('.'):
-                        continue
+    print_directory_sizes(stats['directories'], log)
 
-                    file_path = Path(root) / file
-                    arc_name = file_path.relative_to(path)
-                    zf.write(file_path, arc_name)
-                    print(f"  + {arc_name}")
+    status = "Package created" if stats['changed'] else "Package unchanged"
+    print(f"{status}: {output_file} ({stats['files']} files, {stats['reused']} reused, "
+          f"{stats['size']:,} -> {stats['compressed']:,} bytes)")
+    log(f"Manifest: {manifest_path(output_file)} (sha256 {stats['sha256']})")
+    return output_file
 
-        print(f"Package created: {output_file}")
-        return output_file
 
+def package_one(
+    skill_path: str,
+    output_dir: str,
+    compression: str,
+    workers: int | None,
+    max_file_size: int = LARGE_FILE_SIZE,
+    exclude_large: bool = False,
+) -> dict:
+    """
+    Validate and package one skill of a batch (runs in a worker process).
+
+    Never raises: failures are reported in the returned record. New validation
+    results are returned under 'cache_entries' for the parent to save, so that
+    workers do not overwrite each other's cache writes.
+    """
+    start = time.monotonic()
+    record = {'skill': skill_path, 'ok': False, 'errors': []}
+    timings = record['timings'] = {}
+    try:
+        cache = ValidationCache()
+        known = set(cache.entries)
+        is_valid, errors, cached = validate_skill_cached(skill_path, cache)
+        record.update(valid=is_valid, cached=cached, errors=errors)
+        record['cache_entries'] = {
+            key: entry for key, entry in cache.entries.items() if key not in known
+        }
+        timings['validate'] = round(time.monotonic() - start, 4)
+
+        if is_valid:
+            output_file = Path(output_dir) / f"{Path(skill_path).name}.skill"
+            package_start = time.monotonic()
+            inventory = Inventory(Path(skill_path), max_file_size, exclude_large)
+            record.update(inventory_report(inventory))
+            index_file = output_file.with_name(f"{output_file.name}.index.{os.getpid()}.tmp")
+            try:
+                add_reference_index(inventory, index_file)
+                stats = build_package(inventory, output_file, compression, workers, log=lambda *args: None)
+            finally:
+                index_file.unlink(missing_ok=True)
+            timings['package'] = round(time.monotonic() - package_start, 4)
+            record.update(ok=True, package=str(output_file), **stats)
     except Exception as e:
-        print(f"Error creating package: {e}")
-        return None
+        record['errors'] = record['errors'] + [f"Error creating package: {e}"]
+    timings['total'] = round(time.monotonic() - start, 4)
+    return record
+
+
+def package_batch(
+    root: str,
+    output_dir: str | None = None,
+    compression: str = 'normal',
+    jobs: int | None = None,
+    max_file_size: int = LARGE_FILE_SIZE,
+    exclude_large: bool = False,
+) -> dict:
+    """
+    Validate and package every skill under a skills root.
+
+    Skills run on one shared process pool; each is validated once (through
+    the validation cache) and packaged to output_dir. A failing skill does
+    not stop the others.
+
+    Returns:
+        JSON-serializable summary with per-skill results and timings
+    """
+    start = time.monotonic()
+    output_path = Path(output_dir) if output_dir else Path('.')
+    output_path.mkdir(parents=True, exist_ok=True)
+    skill_paths = discover_skills([root])
+    jobs = jobs or os.cpu_count() or 1
+    # Skills are the unit of parallelism: split the CPUs between them
+    threads = max(1, (os.cpu_count() or 1) // min(jobs, max(len(skill_paths), 1)))
+
+    # Skills with the same directory name would be written to the same <name>.skill
+    first_seen: dict[str, Path] = {}
+    for skill_path in skill_paths:
+        first_seen.setdefault(skill_path.name, skill_path)
+
+    records: list[dict] = []
+    with ProcessPoolExecutor(max_workers=min(jobs, max(len(skill_paths), 1))) as pool:
+        futures = {
+            skill_path: pool.submit(
+                package_one, str(skill_path), str(output_path), compression, threads,
+                max_file_size, exclude_large,
+            )
+            for skill_path in skill_paths if first_seen[skill_path.name] == skill_path
+        }
+        for skill_path in skill_paths:
+            record = {'skill': str(skill_path), 'ok': False, 'errors': [], 'timings': {}}
+            if skill_path not in futures:
+                record['errors'].append(f"Duplicate skill name (also at {first_seen[skill_path.name]})")
+            else:
+                try:
+                    record = futures[skill_path].result()
+                except Exception as e:  # Worker process died
+                    record['errors'].append(f"Worker failed: {e!r}")
+            records.append(record)
+
+    # Save new validation results once, from the parent
+    cache = ValidationCache()
+    for record in records:
+        for key, entry in record.pop('cache_entries', {}).items():
+            cache.put(key, entry['valid'], entry['errors'])
+    cache.save()
+
+    packaged = sum(record['ok'] for record in records)
+    return {
+        'root': root,
+        'output_dir': str(output_path),
+        'compression': compression,
+        'skills': len(records),
+        'packaged': packaged,
+        'changed': sum(record.get('changed', False) for record in records),
+        'failed': len(records) - packaged,
+        'duration': round(time.monotonic() - start, 4),
+        'results': records,
+    }
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: package_skill.py <skill-path> [output-directory]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Package a skill into a distributable .skill file'
+    )
+    parser.add_argument('skill_path', help='Path to the skill directory (skills root with --batch)')
+    parser.add_argument(
+        'output_dir',
+        nargs='?',
+        default=None,
+        help='Output directory (default: current directory)'
+    )
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Package every skill under skill_path on a shared process pool; prints a JSON summary'
+    )
+    parser.add_argument(
+        '--compression', '-c',
+        choices=list(COMPRESSION_LEVELS),
+        default='normal',
+        help='store (no compression), fast, normal (default) or max'
+    )
+    parser.add_argument(
+        '--quiet', '-q',
+        action='store_true',
+        help='Only print errors and the created package'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=None,
+        help='Compression threads (default: CPU count + 4, max 32); with --batch: worker processes (default: CPU count)'
+    )
+    parser.add_argument(
+        '--max-file-size',
+        type=parse_size,
+        default=LARGE_FILE_SIZE,
+        help=f'Report files larger than this, e.g. 500K, 20M (default: {format_size(LARGE_FILE_SIZE)})'
+    )
+    parser.add_argument(
+        '--exclude-large',
+        action='store_true',
+        help='Leave files larger than --max-file-size out of the package'
+    )
+    args = parser.parse_args()
 
-    skill_path = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    if args.batch:
+        summary = package_batch(
+            args.skill_path, args.output_dir, args.compression, args.jobs,
+            args.max_file_size, args.exclude_large,
+        )
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        if not summary['skills']:
+            print(f"Error: No SKILL.md found under: {args.skill_path}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0 if summary['failed'] == 0 else 1)
 
-    result = package_skill(skill_path, output_dir)
+    result = package_skill(
+        args.skill_path, args.output_dir, args.compression, args.quiet, args.jobs,
+        args.max_file_size, args.exclude_large,
+    )
 
     if result:
         sys.exit(0)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """Quick validation for Claude Code skills."""
 
+import argparse
+import glob
+import hashlib
+import json
+import os
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ALLOWED_PROPERTIES = {'name', 'description', 'license', 'allowed-tools', 'metadata'}
@@ -11,6 +18,129 @@ MAX_NAME_LENGTH = 64
 MAX_DESCRIPTION_LENGTH = 1024
 MAX_SKILL_LINES = 500
 
+# Directories never searched for skills in bulk mode
+SKIP_DIRS = {'node_modules', '__pycache__'}
+
+# Validation results keyed by validator version + SKILL.md content hash
+CACHE_FILE = Path(os.environ.get('SKILL_VALIDATION_CACHE')
+                  or Path.home() / '.claude' / 'skill-validation-cache.json')
+MAX_CACHE_ENTRIES = 5000
+
+# Any change to this file (rules, limits) invalidates cached results
+VALIDATOR_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+# Windows paths (actual paths like C:\Users or scripts\file.py), matched on raw bytes.
+# Same as [A-Za-z]:\\|\\[a-zA-Z0-9_-]+\.[a-zA-Z]+ but starting with the backslash,
+# so the regex engine skips ahead with a fast literal search
+WINDOWS_PATH_PATTERN = re.compile(rb'\\(?:(?<=[A-Za-z]:\\)|[a-zA-Z0-9_-]+\.[a-zA-Z]+)')
+
+# Body read size (extended to the next line break, so no match or character is split)
+CHUNK_SIZE = 256 * 1024
+
+# What str.strip() removes, as UTF-8: ASCII bytes and multi-byte sequences
+ASCII_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f')
+UNICODE_WHITESPACE = tuple(chr(c).encode('utf-8') for c in (
+    0x85, 0xa0, 0x1680, *range(0x2000, 0x200b), 0x2028, 0x2029, 0x202f, 0x205f, 0x3000
+))
+
+
+def _line_breaks(buf: bytes, start: int = 0, end: int | None = None) -> int:
+    """Line breaks in buf[start:end] as seen after universal-newline decoding."""
+    if end is None:
+        end = len(buf)
+    return buf.count(b'\n', start, end) + buf.count(b'\r', start, end) - buf.count(b'\r\n', start, end)
+
+
+def _skip_whitespace(buf: bytes, start: int = 0) -> int:
+    """Index of the first non-whitespace character at or after start."""
+    i, n = start, len(buf)
+    while i < n:
+        if buf[i] in ASCII_WHITESPACE:
+            i += 1
+            continue
+        for seq in UNICODE_WHITESPACE:
+            if buf.startswith(seq, i):
+                i += len(seq)
+                break
+        else:
+            return i
+    return n
+
+
+def _trailing_whitespace(buf: bytes) -> int:
+    """Index where the trailing whitespace of buf begins."""
+    end = len(buf)
+    while end > 0:
+        if buf[end - 1] in ASCII_WHITESPACE:
+            end -= 1
+            continue
+        for seq in UNICODE_WHITESPACE:
+            if buf.endswith(seq, 0, end):
+                end -= len(seq)
+                break
+        else:
+            return end
+    return 0
+
+
+def read_frontmatter(f) -> tuple[str | None, bytes, bool]:
+    """
+    Read the frontmatter block line by line, stopping at the closing ---.
+
+    Returns:
+        (frontmatter text or None if not closed, rest of the closing line,
+         whether a Windows path was seen)
+    """
+    parts = []
+    windows_path = False
+    line = f.readline()
+    pos = 3  # After the opening ---
+    while line:
+        windows_path = windows_path or WINDOWS_PATH_PATTERN.search(line) is not None
+        end = line.find(b'---', pos)
+        if end != -1:
+            parts.append(line[pos:end])
+            text = b''.join(parts).decode('utf-8')
+            # Same line breaks as text-mode reading
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text, line[end + 3:], windows_path
+        parts.append(line[pos:])
+        line = f.readline()
+        pos = 0
+    return None, b'', windows_path
+
+
+def scan_body(f, head: bytes) -> tuple[int, bool]:
+    """
+    Count body lines (as len(body.strip().split('\n'))) in one buffered pass.
+
+    Returns:
+        (line count, whether a Windows path was seen)
+    """
+    total = leading = trailing = 0
+    in_leading = True
+    windows_path = False
+    chunk = head
+    while chunk:
+        breaks = _line_breaks(chunk)
+        total += breaks
+        if in_leading:
+            start = _skip_whitespace(chunk)
+            leading += _line_breaks(chunk, 0, start)
+            in_leading = start == len(chunk)
+        end = _trailing_whitespace(chunk)
+        trailing = trailing + breaks if end == 0 else _line_breaks(chunk, end)
+        if not windows_path:
+            windows_path = WINDOWS_PATH_PATTERN.search(chunk) is not None
+
+        chunk = f.read(CHUNK_SIZE)
+        if chunk and not chunk.endswith(b'\n'):
+            chunk += f.readline()
+
+    if in_leading:
+        return 1, windows_path  # Empty body
+    return total - leading - trailing + 1, windows_path
+
 
 def validate_skill(skill_path: str) -> tuple[bool, list[str]]:
     """
@@ -34,19 +164,20 @@ def validate_skill(skill_path: str) -> tuple[bool, list[str]]:
     if not skill_md.exists():
         return False, ["SKILL.md not found"]
 
-    content = skill_md.read_text(encoding='utf-8')
-
-    # Check frontmatter exists
-    if not content.startswith('---'):
-        return False, ["Missing YAML frontmatter (must start with ---)"]
+    with open(skill_md, 'rb') as f:
+        # Check frontmatter exists
+        if f.peek(3)[:3] != b'---':
+            return False, ["Missing YAML frontmatter (must start with ---)"]
 
-    # Extract frontmatter
-    parts = content.split('---', 2)
-    if len(parts) < 3:
-        return False, ["Invalid frontmatter format (must be enclosed in ---)"]
+        # Extract frontmatter (only the frontmatter block is decoded)
+        frontmatter_text, head, windows_path = read_frontmatter(f)
+        if frontmatter_text is None:
+            return False, ["Invalid frontmatter format (must be enclosed in ---)"]
+        frontmatter_text = frontmatter_text.strip()
 
-    frontmatter_text = parts[1].strip()
-    body = parts[2]
+        # Body: line count and Windows path check in one pass over buffered reads
+        line_count, body_windows_path = scan_body(f, head)
+        windows_path = windows_path or body_windows_path
 
     # Parse frontmatter (simple key: value)
     frontmatter = {}
@@ -91,25 +222,202 @@ def validate_skill(skill_path: str) -> tuple[bool, list[str]]:
         errors.append(f"Unknown frontmatter properties: {unknown}")
 
     # Check body length
-    line_count = len(body.strip().split('\n'))
     if line_count > MAX_SKILL_LINES:
         errors.append(f"SKILL.md body too long: {line_count} > {MAX_SKILL_LINES} lines")
 
     # Check for Windows paths (actual paths like C:\Users or scripts\file.py)
-    windows_path_pattern = re.compile(r'[A-Za-z]:\\|\\[a-zA-Z0-9_-]+\.[a-zA-Z]+')
-    if windows_path_pattern.search(content):
+    if windows_path:
         errors.append("Contains Windows-style paths (use / instead)")
 
     return len(errors) == 0, errors
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: quick_validate.py <skill-directory>")
-        sys.exit(1)
+class ValidationCache:
+    """Persistent validation results, shared by quick_validate.py and package_skill.py."""
+
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries: dict[str, dict] = {}
+        self.hits = self.misses = 0
+        self._dirty = False
+        try:
+            data = json.loads(cache_file.read_text())
+            if isinstance(data, dict):
+                self.entries = data
+        except (OSError, ValueError):
+            pass  # Missing or corrupt cache: start empty
+
+    @staticmethod
+    def key(skill_md: Path) -> str | None:
+        """Cache key of a SKILL.md, or None if unreadable."""
+        try:
+            digest = hashlib.sha256(skill_md.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        return f"{VALIDATOR_VERSION}:{digest}"
+
+    def get(self, key: str) -> tuple[bool, list[str]] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry['used'] = time.time()
+        self._dirty = True
+        return entry['valid'], entry['errors']
+
+    def put(self, key: str, is_valid: bool, errors: list[str]):
+        self.entries[key] = {'valid': is_valid, 'errors': errors, 'used': time.time()}
+        self._dirty = True
+
+    def save(self):
+        """Write the cache back (atomic replace; least recently used entries evicted)."""
+        if not self._dirty:
+            return
+        entries = self.entries
+        if len(entries) > MAX_CACHE_ENTRIES:
+            recent = sorted(entries.items(), key=lambda item: item[1]['used'], reverse=True)
+            entries = dict(recent[:MAX_CACHE_ENTRIES])
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(entries))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass  # Cache is an optimization only
+
+
+def validate_skill_cached(skill_path: str, cache: ValidationCache | None) -> tuple[bool, list[str], bool]:
+    """
+    validate_skill() with a result cache.
+
+    Returns:
+        (is_valid, list of error messages, True if reported from the cache)
+    """
+    key = ValidationCache.key(Path(skill_path) / 'SKILL.md') if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0], list(cached[1]), True
 
-    skill_path = sys.argv[1]
     is_valid, errors = validate_skill(skill_path)
+    if key is not None:
+        cache.put(key, is_valid, errors)
+    return is_valid, errors, False
+
+
+def discover_skills(targets: list[str]) -> list[Path]:
+    """
+    Find skill directories (containing SKILL.md) under roots or glob patterns.
+
+    A target may be a skill directory, a directory tree of skills, a SKILL.md
+    file, or a glob matching any of these (e.g. 'skills/*/' or '**/SKILL.md').
+    """
+    found: dict[Path, None] = {}
+    for target in targets:
+        matches = glob.glob(target, recursive=True) if glob.has_magic(target) else [target]
+        for match in sorted(matches):
+            match_path = Path(match)
+            if match_path.is_file() and match_path.name == 'SKILL.md':
+                found[match_path.parent] = None
+                continue
+            if not match_path.is_dir():
+                continue
+            for root, dirs, files in os.walk(match_path):
+                # Skip hidden, dependency and cache directories
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS)
+                if 'SKILL.md' in files:
+                    found[Path(root)] = None
+    return list(found)
+
+
+def validate_many(skill_paths: list[Path], jobs: int | None = None, cache: ValidationCache | None = None):
+    """Validate skills concurrently; yields (path, is_valid, errors, cached) in input order."""
+    def run(skill_path: Path):
+        try:
+            return (skill_path, *validate_skill_cached(str(skill_path), cache))
+        except Exception as e:
+            return skill_path, False, [f"Validation error: {e}"], False
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(run, skill_paths)
+
+
+def bulk_main(args) -> int:
+    """Validate every skill under the given targets; returns the exit code."""
+    skill_paths = discover_skills(args.paths)
+    if not skill_paths:
+        print(f"Error: No SKILL.md found under: {' '.join(args.paths)}", file=sys.stderr)
+        return 1
+
+    cache = None if args.no_cache else ValidationCache()
+    valid_count = 0
+    for skill_path, is_valid, errors, cached in validate_many(skill_paths, args.jobs, cache):
+        valid_count += is_valid
+        if args.format == 'jsonl':
+            record = {'skill': str(skill_path), 'valid': is_valid, 'errors': errors, 'cached': cached}
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+        elif is_valid:
+            print(f"OK    {skill_path}")
+        else:
+            print(f"FAIL  {skill_path}")
+            for error in errors:
+                print(f"  - {error}")
+
+    invalid_count = len(skill_paths) - valid_count
+    summary = f"Validated {len(skill_paths)} skills: {valid_count} valid, {invalid_count} invalid"
+    if cache is not None:
+        cache.save()
+        summary += f" ({cache.hits} unchanged, from cache)"
+    print(summary, file=sys.stderr)
+    return 0 if invalid_count == 0 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Validate Claude Code skills'
+    )
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Skill directory (or, with --bulk, skills roots / glob patterns)'
+    )
+    parser.add_argument(
+        '--bulk',
+        action='store_true',
+        help='Discover every SKILL.md under the given roots or globs and validate them concurrently'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=None,
+        help='Worker threads for --bulk (default: CPU count + 4, max 32)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['jsonl', 'text'],
+        default='jsonl',
+        help='Output format for --bulk (default: jsonl, one result per line)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Re-validate every skill, ignoring the validation cache ({CACHE_FILE})'
+    )
+    args = parser.parse_args()
+
+    if args.bulk:
+        sys.exit(bulk_main(args))
+
+    if len(args.paths) != 1:
+        parser.error('exactly one skill directory expected (use --bulk for several)')
+
+    skill_path = args.paths[0]
+    cache = None if args.no_cache else ValidationCache()
+    is_valid, errors, _ = validate_skill_cached(skill_path, cache)
+    if cache is not None:
+        cache.save()
 
     if is_valid:
         print(f"Skill '{skill_path}' is valid")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Build a section index of a skill's reference files, for progressive disclosure.
+
+references/index.json records, for every file under references/, its size,
+modification time, digest and token estimate, and for Markdown files every heading with the byte
+range and token estimate of its section. A consumer reads the small index,
+picks a section, and seeks straight to it instead of loading the whole file.
+
+Usage:
+    reference_index.py <skill-path>                  # Build or refresh the index
+    reference_index.py <skill-path> --list           # Print the sections
+    reference_index.py <skill-path> --section 'references/workflows.md#Feedback Loop'
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPT_DIR))
+from skill_inventory import IgnoreRules
+
+REFERENCES_DIR = 'references'
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 2
+
+# Rough token estimate for English text and code
+BYTES_PER_TOKEN = 4
+
+# Files indexed (Markdown files also get their headings)
+TEXT_SUFFIXES = {'.md', '.markdown', '.txt', '.rst'}
+MARKDOWN_SUFFIXES = {'.md', '.markdown'}
+
+# Order of the values of one section entry
+SECTION_FIELDS = ['level', 'title', 'start', 'end', 'tokens']
+
+HEADING_PATTERN = re.compile(rb'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*\r?$')
+FENCE_PATTERN = re.compile(rb'^ {0,3}(`{3,}|~{3,})')
+
+
+def estimate_tokens(size: int) -> int:
+    return (size + BYTES_PER_TOKEN - 1) // BYTES_PER_TOKEN
+
+
+def scan_headings(f) -> list[tuple[int, str, int]]:
+    """(level, title, byte offset) of the ATX headings of a Markdown file, outside code fences."""
+    headings = []
+    offset = 0
+    fence = None
+    for line in f:
+        match = FENCE_PATTERN.match(line)
+        if match:
+            marker = match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                fence = None
+        elif fence is None and line.startswith((b'#', b' ')):
+            match = HEADING_PATTERN.match(line.rstrip(b'\n'))
+            if match:
+                title = (match.group(2) or b'').decode('utf-8', errors='replace').strip()
+                headings.append((len(match.group(1)), title, offset))
+        offset += len(line)
+    return headings
+
+
+def _sha256(f) -> str:
+    """SHA-256 of the rest of an open binary file."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_file(path: Path, mtimes: bool = True) -> dict:
+    """Index entry of one reference file (mtime_ns only if mtimes is set)."""
+    with open(path, 'rb') as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        sha256 = _sha256(f)
+        size = f.tell()
+        entry = {'size': size, 'sha256': sha256, 'tokens': estimate_tokens(size)}
+        if mtimes:
+            entry['mtime_ns'] = mtime_ns
+        if path.suffix.lower() not in MARKDOWN_SUFFIXES:
+            return entry
+        f.seek(0)
+        headings = scan_headings(f)
+
+    # A section runs until the next heading of the same or a higher level
+    sections = []
+    for i, (level, title, start) in enumerate(headings):
+        end = next((other for lvl, _, other in headings[i + 1:] if lvl <= level), size)
+        sections.append([level, title, start, end, estimate_tokens(end - start)])
+    entry['sections'] = sections
+    return entry
+
+
+def build_index(skill_path: Path, mtimes: bool = True, only: set[str] | None = None) -> dict | None:
+    """
+    Index of every reference file of a skill, or None if it has no references/.
+
+    Without mtimes, entries carry no modification times, so the index only
+    depends on file content (for packaging; readers then verify the digest).
+    If given, only the relative paths in only are indexed (e.g. the files
+    that go into a package).
+    """
+    references = skill_path / REFERENCES_DIR
+    if not references.is_dir():
+        return None
+    rules = IgnoreRules.load(skill_path)
+
+    files = {}
+    for root, dirs, names in os.walk(references):
+        rel_root = Path(root).relative_to(skill_path).as_posix()
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith('.') and d != '__pycache__' and not rules.ignored(f"{rel_root}/{d}", True)
+        )
+        for name in sorted(names):
+            rel_path = f"{rel_root}/{name}"
+            if (name.startswith('.') or Path(name).suffix.lower() not in TEXT_SUFFIXES
+                    or rel_path == f"{REFERENCES_DIR}/{INDEX_NAME}" or rules.ignored(rel_path, False)
+                    or (only is not None and rel_path not in only)):
+                continue
+            files[rel_path] = index_file(Path(root) / name, mtimes)
+
+    return {
+        'version': INDEX_VERSION,
+        'bytes_per_token': BYTES_PER_TOKEN,
+        'fields': SECTION_FIELDS,
+        'files': files,
+    }
+
+
+def index_text(index: dict) -> str:
+    """Serialized form of an index, as stored in references/index.json."""
+    return json.dumps(index, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def write_index(skill_path: Path) -> tuple[Path, dict] | None:
+    """
+    Build references/index.json; the file is only rewritten if its content changed.
+
+    Returns:
+        (index path, index), or None if the skill has no references/
+    """
+    index = build_index(skill_path)
+    if index is None:
+        return None
+    index_path = skill_path / REFERENCES_DIR / INDEX_NAME
+    text = index_text(index)
+    try:
+        unchanged = index_path.read_text(encoding='utf-8') == text
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        tmp_file = index_path.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+        tmp_file.write_text(text, encoding='utf-8')
+        os.replace(tmp_file, index_path)
+    return index_path, index
+
+
+def load_index(skill_path: Path) -> dict | None:
+    """Index of a skill, or None if missing or unreadable."""
+    try:
+        index = json.loads((skill_path / REFERENCES_DIR / INDEX_NAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return index if index.get('version') == INDEX_VERSION else None
+
+
+def read_section(skill_path: Path, rel_path: str, title: str, index: dict | None = None) -> str | None:
+    """
+    Text of one section of a reference file (first heading with that title).
+
+    Reads only the section's bytes. Returns None if the file or heading is
+    not in the index, or the file changed since it was indexed: a different
+    size is stale outright; a different (or unrecorded) mtime_ns has the
+    file's digest checked before the byte range is trusted.
+    """
+    index = index or load_index(skill_path)
+    entry = (index or {}).get('files', {}).get(rel_path)
+    if entry is None:
+        return None
+    for level, heading, start, end, tokens in entry.get('sections', []):
+        if heading == title:
+            break
+    else:
+        return None
+    path = skill_path / rel_path
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if st.st_size != entry['size']:
+                return None  # Stale index
+            if st.st_mtime_ns != entry.get('mtime_ns') and _sha256(f) != entry['sha256']:
+                return None  # Same size, different content
+            f.seek(start)
+            return f.read(end - start).decode('utf-8', errors='replace')
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Index the headings of a skill\'s reference files for section-level loading'
+    )
+    parser.add_argument('skill_path', help='Path to the skill directory')
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help='Print every indexed section with its token estimate'
+    )
+    parser.add_argument(
+        '--section',
+        metavar='FILE#HEADING',
+        help='Print one section, e.g. "references/workflows.md#Feedback Loop"'
+    )
+    args = parser.parse_args()
+    skill_path = Path(args.skill_path)
+
+    if args.section:
+        rel_path, _, title = args.section.partition('#')
+        text = read_section(skill_path, rel_path, title)
+        if text is None:
+            print(f"Error: Section not found (or index stale): {args.section}", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.write(text)
+        return
+
+    result = write_index(skill_path)
+    if result is None:
+        print(f"Error: No {REFERENCES_DIR}/ directory in {skill_path}")
+        sys.exit(1)
+    index_path, index = result
+
+    if args.list:
+        for rel_path, entry in index['files'].items():
+            print(f"{rel_path} (~{entry['tokens']:,} tokens)")
+            for level, title, start, end, tokens in entry.get('sections', []):
+                print(f"  {'  ' * (level - 1)}{title} [{start}:{end}] ~{tokens:,} tokens")
+    sections = sum(len(entry.get('sections', [])) for entry in index['files'].values())
+    print(f"Index written: {index_path} ({len(index['files'])} files, {sections} sections)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Parallel, streaming ZIP writer for .skill packages.
+
+Archives are reproducible: entries are written in the given (sorted) order
+with a fixed timestamp and normalized permissions, and blocks are compressed
+independently of the worker count, so the same tree always yields the same
+bytes. A sidecar manifest (<name>.skill.manifest.json) records each file's
+SHA-256; when repackaging, entries whose content is unchanged are copied
+compressed from the previous archive instead of being compressed again.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+# Compression presets: name -> deflate level (None = store uncompressed)
+COMPRESSION_LEVELS = {'store': None, 'fast': 1, 'normal': 6, 'max': 9}
+
+# Files are compressed in independent blocks (pigz-style): each block is
+# primed with the previous block's tail and ends on a byte boundary, so the
+# concatenated blocks form one valid deflate stream
+BLOCK_SIZE = 1024 * 1024
+DICT_SIZE = 32 * 1024
+
+# Bump when the layout of compressed entries changes (invalidates reuse)
+ARCHIVE_FORMAT = 1
+MANIFEST_VERSION = 1
+
+# Earliest timestamp a ZIP header can hold (1980-01-01 UTC)
+ZIP_EPOCH = 315532800
+
+
+def fixed_date_time() -> tuple[int, int, int, int, int, int]:
+    """Timestamp of every entry: SOURCE_DATE_EPOCH if set, else 1980-01-01."""
+    try:
+        epoch = int(os.environ.get('SOURCE_DATE_EPOCH', ZIP_EPOCH))
+    except ValueError:
+        epoch = ZIP_EPOCH
+    return time.gmtime(max(epoch, ZIP_EPOCH))[:6]
+
+
+def normalized_mode(st_mode: int) -> int:
+    """0755 for executables, 0644 for everything else."""
+    return 0o755 if st_mode & 0o111 else 0o644
+
+
+class FileRecord(NamedTuple):
+    """Manifest entry of one packaged file"""
+    sha256: str
+    size: int
+    mode: str
+    crc32: int
+
+
+def file_record(path: Path) -> FileRecord:
+    """Digest, size and normalized mode of a file."""
+    sha = hashlib.sha256()
+    crc = size = 0
+    with open(path, 'rb') as f:
+        mode = normalized_mode(os.fstat(f.fileno()).st_mode)
+        while chunk := f.read(BLOCK_SIZE):
+            sha.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+    return FileRecord(sha.hexdigest(), size, f'{mode:04o}', crc)
+
+
+def file_sha256(path: Path) -> str | None:
+    """SHA-256 of a file, or None if it cannot be read."""
+    try:
+        return file_record(path).sha256
+    except OSError:
+        return None
+
+
+def manifest_path(archive: Path) -> Path:
+    return archive.with_name(archive.name + '.manifest.json')
+
+
+def load_manifest(archive: Path) -> dict | None:
+    """Manifest written next to an archive, or None if missing or unreadable."""
+    try:
+        manifest = json.loads(manifest_path(archive).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def build_manifest(records: dict[str, FileRecord], compression: str, archive_sha256: str) -> dict:
+    """Manifest of an archive; entries are what decides whether they can be reused."""
+    return {
+        'version': MANIFEST_VERSION,
+        'format': ARCHIVE_FORMAT,
+        'compression': compression,
+        'zlib': zlib.ZLIB_RUNTIME_VERSION,
+        'archive_sha256': archive_sha256,
+        'files': {arcname: record._asdict() for arcname, record in records.items()},
+    }
+
+
+def write_manifest(archive: Path, manifest: dict) -> bool:
+    """Write the manifest (atomic replace); False if it was already up to date."""
+    path = manifest_path(archive)
+    text = json.dumps(manifest, indent=2, sort_keys=True) + '\n'
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except OSError:
+        pass
+    tmp_file = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    tmp_file.write_text(text, encoding='utf-8')
+    os.replace(tmp_file, path)
+    return True
+
+
+class EntryStats(NamedTuple):
+    """Sizes of one written archive entry"""
+    arcname: str
+    file_size: int
+    compress_size: int
+    reused: bool
+
+
+class _Block(NamedTuple):
+    path: Path
+    arcname: str
+    st: os.stat_result
+    first: bool
+    last: bool
+    data: bytes
+    compressed: Future | None
+    reused: zipfile.ZipInfo | None = None
+
+
+def compress_block(data: bytes, level: int, prime: bytes, last: bool) -> bytes:
+    """Raw-deflate one block; zlib releases the GIL, so blocks compress in parallel."""
+    if prime:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=prime)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class SkillArchive:
+    """
+    Write files into a ZIP archive, compressing blocks on worker threads.
+
+    Entries are written in the order given, each block in sequence, while
+    up to `workers` blocks are compressed ahead; memory stays bounded by the
+    in-flight window, whatever the file sizes. Entries registered through
+    reuse_from() are copied compressed from the previous archive.
+    """
+
+    def __init__(self, output_file: Path, compression: str = 'normal', workers: int | None = None):
+        if compression not in COMPRESSION_LEVELS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.level = COMPRESSION_LEVELS[compression]
+        self.compress_type = zipfile.ZIP_STORED if self.level is None else zipfile.ZIP_DEFLATED
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.date_time = fixed_date_time()
+        self.zf = zipfile.ZipFile(output_file, 'w')
+        self._pool = ThreadPoolExecutor(self.workers) if self.level is not None else None
+        self._current: zipfile.ZipInfo | None = None
+        self._zip64 = False
+        self._source: zipfile.ZipFile | None = None
+        self._reuse: dict[str, zipfile.ZipInfo] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        if self._source is not None:
+            self._source.close()
+        self.zf.close()
+
+    def reuse_from(self, previous: Path, records: dict[str, FileRecord]) -> int:
+        """
+        Reuse compressed entries of a previous build of this archive.
+
+        An entry is reused when the previous manifest has the same digest,
+        size and mode for it, and the previous build used the same archive
+        format, compression and zlib version (so the copied bytes are exactly
+        what compressing again would produce). Returns the number of entries.
+        """
+        manifest = load_manifest(previous)
+        if (manifest is None or manifest.get('format') != ARCHIVE_FORMAT
+                or manifest.get('compression') != self.compression
+                or manifest.get('zlib') != zlib.ZLIB_RUNTIME_VERSION):
+            return 0
+        try:
+            source = zipfile.ZipFile(previous)
+        except (OSError, zipfile.BadZipFile):
+            return 0
+
+        old_files = manifest.get('files', {})
+        for arcname, record in records.items():
+            info = source.NameToInfo.get(arcname)
+            if (info is not None and old_files.get(arcname) == record._asdict()
+                    and info.CRC == record.crc32 and info.file_size == record.size
+                    and info.compress_type == self.compress_type):
+                self._reuse[arcname] = info
+        if self._reuse:
+            self._source = source
+        else:
+            source.close()
+        return len(self._reuse)
+
+    def _blocks(self, entries: list[tuple[Path, str]]) -> Iterator[_Block]:
+        """Read files block by block, submitting each block for compression."""
+        for path, arcname in entries:
+            if arcname in self._reuse:
+                yield _Block(path, arcname, os.stat(path), True, True, b'', None, self._reuse[arcname])
+                continue
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read(BLOCK_SIZE)
+                first = True
+                prime = b''
+                while True:
+                    following = f.read(BLOCK_SIZE) if len(data) == BLOCK_SIZE else b''
+                    last = not following
+                    future = None
+                    if self._pool is not None:
+                        future = self._pool.submit(compress_block, data, self.level, prime, last)
+                    yield _Block(path, arcname, st, first, last, data, future)
+                    if last:
+                        break
+                    prime = data[-DICT_SIZE:]
+                    data, first = following, False
+
+    def add_files(self, entries: list[tuple[Path, str]]) -> Iterator[EntryStats]:
+        """Add (path, arcname) entries in order; yields stats as each entry completes."""
+        window = deque()
+        for block in self._blocks(entries):
+            window.append(block)
+            if len(window) > 2 * self.workers:
+                stats = self._write_block(window.popleft())
+                if stats:
+                    yield stats
+        while window:
+            stats = self._write_block(window.popleft())
+            if stats:
+                yield stats
+
+    def _new_entry(self, block: _Block) -> zipfile.ZipInfo:
+        """Entry with normalized metadata (fixed timestamp, 0644/0755)."""
+        zinfo = zipfile.ZipInfo(block.arcname, self.date_time)
+        zinfo.create_system = 3
+        zinfo.external_attr = (stat.S_IFREG | normalized_mode(block.st.st_mode)) << 16
+        zinfo.compress_type = self.compress_type
+        zinfo.file_size = block.st.st_size
+        zinfo.compress_size = 0
+        zinfo.CRC = 0
+        zinfo.header_offset = self.zf.fp.tell()
+        # Same rule as zipfile: decide up front, the header is rewritten in place
+        self._zip64 = block.st.st_size * 1.05 > zipfile.ZIP64_LIMIT
+        return zinfo
+
+    def _copy_entry(self, block: _Block) -> EntryStats:
+        """Copy an unchanged entry's compressed data from the previous archive."""
+        fp = self.zf.fp
+        info = block.reused
+        zinfo = self._new_entry(block)
+        zinfo.file_size = info.file_size
+        zinfo.compress_size = info.compress_size
+        zinfo.CRC = info.CRC
+        fp.write(zinfo.FileHeader(self._zip64))
+
+        src = self._source.fp
+        src.seek(info.header_offset)
+        header = src.read(zipfile.sizeFileHeader)
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        src.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+        remaining = info.compress_size
+        while remaining:
+            chunk = src.read(min(BLOCK_SIZE, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f'Truncated entry in previous archive: {info.filename}')
+            fp.write(chunk)
+            remaining -= len(chunk)
+        return self._finish_entry(zinfo, reused=True)
+
+    def _write_block(self, block: _Block) -> EntryStats | None:
+        if block.reused is not None:
+            return self._copy_entry(block)
+
+        fp = self.zf.fp
+        if block.first:
+            zinfo = self._new_entry(block)
+            fp.write(zinfo.FileHeader(self._zip64))
+            zinfo.file_size = 0
+            self._current = zinfo
+
+        zinfo = self._current
+        data = block.data if block.compressed is None else block.compressed.result()
+        fp.write(data)
+        zinfo.CRC = zlib.crc32(block.data, zinfo.CRC)
+        zinfo.file_size += len(block.data)
+        zinfo.compress_size += len(data)
+        if not block.last:
+            return None
+        self._current = None
+        return self._finish_entry(zinfo, reused=False)
+
+    def _finish_entry(self, zinfo: zipfile.ZipInfo, reused: bool) -> EntryStats:
+        fp = self.zf.fp
+
+        # Patch the local header with the final CRC and sizes
+        end = fp.tell()
+        fp.seek(zinfo.header_offset)
+        fp.write(zinfo.FileHeader(self._zip64))
+        fp.seek(end)
+        self.zf.filelist.append(zinfo)
+        self.zf.NameToInfo[zinfo.filename] = zinfo
+        self.zf.start_dir = end
+        return EntryStats(zinfo.filename, zinfo.file_size, zinfo.compress_size, reused)
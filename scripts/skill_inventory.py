@@ -0,0 +1,212 @@
+"""
+Size inventory of a skill directory, taken before packaging.
+
+Walks the skill directory once, applying the built-in exclusions (dotfiles,
+__pycache__) and the rules of a .skillignore file at the skill root
+(gitignore syntax: globs, **, leading / anchors, trailing / for directories,
+! to re-include). Files larger than a threshold are flagged, or left out of
+the package, and sizes are aggregated per top-level directory.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+IGNORE_FILE = '.skillignore'
+
+# Files above this size are flagged (or excluded with exclude_large)
+LARGE_FILE_SIZE = 10 * 1024 * 1024
+
+# Directories never packaged
+SKIP_DIRS = {'__pycache__'}
+
+# Files at the skill root are grouped under this name in directory sizes
+ROOT_GROUP = '.'
+
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?\s*$', re.IGNORECASE)
+
+
+def parse_size(text: str) -> int:
+    """Byte count from '500000', '512K', '10M', '1.5GiB', ..."""
+    match = SIZE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{size} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _translate(pattern: str) -> str:
+    """Regex for one gitignore glob (without anchoring or trailing /)."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        at_segment_start = i == 0 or pattern[i - 1] == '/'
+        if at_segment_start and pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif at_segment_start and pattern.startswith('**', i) and i + 2 == n:
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            # A ] right after [ or [! is part of the class
+            start = i + 1
+            if pattern[start:start + 1] in ('!', '^'):
+                start += 1
+            if pattern[start:start + 1] == ']':
+                start += 1
+            end = pattern.find(']', start)
+            if end == -1:
+                parts.append(re.escape('['))
+                i += 1
+                continue
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            if body[0] in '!^':
+                body = '^' + body[1:]
+            parts.append(f'[{body}]')
+            i = end + 1
+        elif pattern[i] == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(parts)
+
+
+class IgnoreRules:
+    """Compiled .skillignore rules; the last matching rule wins."""
+
+    def __init__(self, lines: list[str]):
+        self.rules: list[tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n')
+            # Trailing spaces are ignored unless escaped
+            stripped = line.rstrip(' ')
+            if stripped.endswith('\\') and len(stripped) < len(line):
+                stripped += ' '
+            line = stripped
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            # A slash anywhere but at the end anchors the pattern to the skill root
+            anchored = '/' in line
+            line = line.lstrip('/')
+            prefix = '' if anchored else '(?:.*/)?'
+            self.rules.append((re.compile(f'^{prefix}{_translate(line)}$'), negate, dir_only))
+
+    @classmethod
+    def load(cls, skill_dir: Path) -> 'IgnoreRules':
+        """Rules of the skill's .skillignore (none if it does not exist)."""
+        try:
+            return cls((skill_dir / IGNORE_FILE).read_text(encoding='utf-8').splitlines())
+        except OSError:
+            return cls([])
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """True if a path relative to the skill root (posix) is ignored."""
+        result = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negate
+        return result
+
+
+class FileEntry(NamedTuple):
+    """One file of the inventory"""
+    path: Path
+    arcname: str
+    size: int
+
+
+class Inventory:
+    """
+    Files of a skill directory with their sizes.
+
+    files: entries to package, in sorted (deterministic) order
+    large: entries above max_file_size (left out of files if excluded)
+    ignored: paths left out by .skillignore (a directory counts once)
+    """
+
+    def __init__(self, root: Path, max_file_size: int = LARGE_FILE_SIZE, exclude_large: bool = False):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.exclude_large = exclude_large
+        self.files: list[FileEntry] = []
+        self.large: list[FileEntry] = []
+        self.ignored: list[str] = []
+        self._walk(IgnoreRules.load(root))
+
+    def _walk(self, rules: IgnoreRules):
+        for root, dirs, files in os.walk(self.root):
+            rel_root = Path(root).relative_to(self.root).as_posix()
+            prefix = '' if rel_root == '.' else rel_root + '/'
+
+            # Skip __pycache__ and hidden directories; ignored directories are not entered
+            kept = []
+            for d in sorted(dirs):
+                if d.startswith('.') or d in SKIP_DIRS:
+                    continue
+                if rules.ignored(prefix + d, True):
+                    self.ignored.append(prefix + d + '/')
+                    continue
+                kept.append(d)
+            dirs[:] = kept
+
+            for file in sorted(files):
+                if file.startswith('.'):
+                    continue
+                arcname = prefix + file
+                if rules.ignored(arcname, False):
+                    self.ignored.append(arcname)
+                    continue
+                file_path = Path(root) / file
+                entry = FileEntry(file_path, arcname, file_path.stat().st_size)
+                if entry.size > self.max_file_size:
+                    self.large.append(entry)
+                    if self.exclude_large:
+                        continue
+                self.files.append(entry)
+
+    @property
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.files)
+
+    def directory_sizes(self, compressed: dict[str, int] | None = None) -> dict[str, dict]:
+        """
+        Files, size and (if known) compressed size per top-level directory.
+
+        Args:
+            compressed: Compressed size per arcname, from the written archive
+        """
+        groups: dict[str, dict] = {}
+        for entry in self.files:
+            top, sep, _ = entry.arcname.partition('/')
+            group = groups.setdefault(top + '/' if sep else ROOT_GROUP, {'files': 0, 'size': 0})
+            group['files'] += 1
+            group['size'] += entry.size
+            if compressed is not None:
+                group['compressed'] = group.get('compressed', 0) + compressed.get(entry.arcname, 0)
+        return dict(sorted(groups.items(), key=lambda item: item[1]['size'], reverse=True))
@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+Hook Latency Benchmark
+
+Replays a corpus of hook events (UserPromptSubmit, PreToolUse, PostToolUse)
+through every hook that handles them, two ways:
+
+- subprocess: a fresh `python3 <hook>.py` per event, as Claude Code runs hooks
+- in-process: the hook's main() called repeatedly in one worker process, as
+  hook-daemon.py runs it (no interpreter startup, modules already imported)
+
+and reports p50/p95/p99 latency per hook, the split between interpreter
+startup, imports/loading and hook logic, and peak RSS (of the hook
+process, or of the in-process worker).
+
+The hooks run from a throwaway project (hooks copied to .claude/hooks,
+synthetic rules in .claude/skills, generated source files, HOME pointed
+inside it for hook state), so nothing in your home directory is touched.
+Corpus, rules and files are generated from a seed: the same options give the
+same workload on every commit.
+
+Before timing, the fast paths are checked against their plain versions
+(CORRECTNESS_CHECKS): a speedup that changes results fails the run instead
+of showing up as a win.
+
+Usage:
+    python3 bench-hooks.py                             # Generated workload, text report
+    python3 bench-hooks.py --skills 1000 --runs 10 --output after.json
+    python3 bench-hooks.py --compare before.json       # Run and compare (exit 1 on regression)
+    python3 bench-hooks.py --compare before.json --against after.json
+    python3 bench-hooks.py --corpus events.jsonl --rules .claude/skills/skill-rules.json
+    python3 bench-hooks.py --generate bench-workload/  # Write the workload and exit
+    python3 bench-hooks.py --check-only                # Correctness checks only
+
+Corpus format (JSONL): {"name": ..., "event": ..., "payload": {...}} per line,
+or bare hook payloads (event taken from hook_event_name, or guessed from the
+payload's keys). Relative file paths resolve against the project.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOOK_DIR = Path(__file__).resolve().parent
+RESULTS_VERSION = 1
+
+# Hooks benchmarked, with the event each one handles
+HOOK_EVENTS = {
+    "skill-activation-prompt": "UserPromptSubmit",
+    "debug-mode-detector": "UserPromptSubmit",
+    "investigation-guard": "PreToolUse",
+    "post-tool-use-tracker": "PostToolUse",
+    "file-size-guard": "PostToolUse",
+}
+
+# Files copied into the benchmark project's .claude/hooks
+COPY_SUFFIXES = {".py", ".sh"}
+
+# Changes smaller than this are noise, whatever the percentage
+NOISE_FLOOR_MS = 1.0
+
+SESSION_ID = "bench"
+
+WORDS = [
+    "api", "auth", "cache", "config", "deploy", "docker", "query", "schema", "token", "route",
+    "render", "layout", "widget", "style", "test", "mock", "fixture", "lint", "build", "bundle",
+    "stream", "queue", "worker", "cron", "metric", "trace", "log", "alert", "index", "migration",
+    "session", "cookie", "upload", "image", "search", "filter", "export", "report", "invoice", "billing",
+]
+VERBS = ["design", "create", "fix", "refactor", "optimize", "review", "debug", "add", "remove", "update"]
+
+PROMPT_TEMPLATES = [
+    "help me {verb} the {word} module",
+    "Can you {verb} the {word} and {word2} handling in {path}?",
+    "{verb} a new {word} endpoint, then write a test for it",
+    "why is the {word} slow? it used to be fast before the {word2} change",
+    "请帮我{verb}一下 {word} 相关的代码",
+    "The {word} tests fail after I changed {path}, please take a look",
+    "short question: what does {word2} do",
+]
+
+TRACEBACK = (
+    "Traceback (most recent call last):\n"
+    "  File \"{path}\", line {line}, in handle\n"
+    "    result = process({word})\n"
+    "TypeError: unsupported operand type(s) for +: 'int' and 'NoneType'\n"
+)
+
+
+# ---------------------------------------------------------------------------
+# Workload generation
+# ---------------------------------------------------------------------------
+
+def generate_rules(skills: int, rng: random.Random) -> dict:
+    """Synthetic skill-rules.json; keyword frequencies are skewed, as in real rule sets"""
+    vocabulary = WORDS + [f"{a}-{b}" for a in WORDS for b in WORDS[:10] if a != b]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    rules = {"version": "1.0.0", "skills": {}}
+    for i in range(skills):
+        keywords = sorted(set(rng.choices(vocabulary, weights, k=8)))
+        area = rng.choice(WORDS)
+        rules["skills"][f"skill-{i:04d}"] = {
+            "type": "domain",
+            "priority": rng.choice(["critical", "high", "medium", "medium", "low", "low"]),
+            "enforcement": "block" if i % 97 == 0 else "suggest",
+            "triggers": {
+                "promptTriggers": {
+                    "keywords": keywords,
+                    "intentPatterns": [
+                        f".*{rng.choice(VERBS)}.*{rng.choice(keywords)}.*",
+                        f"(?:{rng.choice(VERBS)}|{rng.choice(VERBS)}).*{area}",
+                    ],
+                },
+                "fileTriggers": {
+                    "include": [f"src/{area}/**/*.py", f"**/*{rng.choice(WORDS)}*.ts"],
+                    "exclude": ["**/test_*.py"],
+                },
+            },
+        }
+    return rules
+
+
+def generate_files(project: Path, file_lines: int, rng: random.Random) -> list[str]:
+    """Small source files plus one large file per language; relative paths"""
+    paths = []
+    for i, word in enumerate(WORDS[:16]):
+        rel = f"src/{word}/{word}_{i}.py"
+        body = "".join(f"def {word}_{n}(value):\n    return value + {n}\n\n" for n in range(rng.randint(5, 60)))
+        paths.append((rel, body))
+    paths.append(("src/large/large_module.py",
+                  "".join(f"VALUE_{n} = {n}  # generated line\n" for n in range(file_lines))))
+    paths.append(("src/large/large_view.ts",
+                  "".join(f"export const value{n} = {n};\n" for n in range(file_lines))))
+    for rel, body in paths:
+        target = project / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(body, encoding="utf-8")
+    return [rel for rel, _ in paths]
+
+
+def generate_corpus(files: list[str], prompt_chars: int, rng: random.Random) -> list[dict]:
+    """Prompts of every size plus a Read/Edit/Write session over the generated files"""
+    def fill(template: str) -> str:
+        return template.format(verb=rng.choice(VERBS), word=rng.choice(WORDS), word2=rng.choice(WORDS),
+                               path=rng.choice(files), line=rng.randint(1, 500))
+
+    corpus = []
+    for i, template in enumerate(PROMPT_TEMPLATES):
+        corpus.append({"name": f"prompt-{i + 1}", "event": "UserPromptSubmit",
+                       "payload": {"prompt": fill(template)}})
+
+    # Pasted logs: medium, and long (prompt_chars) with the traceback at the end
+    for name, size in (("prompt-log-medium", min(prompt_chars, 10000)), ("prompt-log-long", prompt_chars)):
+        lines, length = [], 0
+        while length < size:
+            lines.append(f"2024-05-01 12:00:{len(lines) % 60:02d} INFO {fill('{word} {word2} ok')} id={rng.random()}\n")
+            length += len(lines[-1])
+        text = "why does this crash?\n" + "".join(lines) + fill(TRACEBACK)
+        corpus.append({"name": name, "event": "UserPromptSubmit", "payload": {"prompt": text}})
+
+    small = [rel for rel in files if not rel.startswith("src/large/")]
+    large = [rel for rel in files if rel.startswith("src/large/")]
+    for rel in small[:6] + large[:1]:
+        corpus.append({"name": "pre-read", "event": "PreToolUse",
+                       "payload": {"tool_name": "Read", "tool_input": {"file_path": rel}}})
+    corpus.append({"name": "pre-grep", "event": "PreToolUse",
+                   "payload": {"tool_name": "Grep", "tool_input": {"pattern": "def", "path": "src"}}})
+    for rel in small[:3] + small[8:10] + large:
+        # Investigated files pass, the others are blocked
+        corpus.append({"name": "pre-edit", "event": "PreToolUse",
+                       "payload": {"tool_name": "Edit",
+                                   "tool_input": {"file_path": rel, "old_string": "a", "new_string": "b"}}})
+
+    for rel in small[:6]:
+        corpus.append({"name": "post-edit", "event": "PostToolUse",
+                       "payload": {"tool_name": "Edit",
+                                   "tool_input": {"file_path": rel, "old_string": "a", "new_string": "b"},
+                                   "tool_response": {"filePath": rel, "success": True}}})
+    for rel in large:
+        corpus.append({"name": "post-edit-large", "event": "PostToolUse",
+                       "payload": {"tool_name": "Write", "tool_input": {"file_path": rel, "content": "..."},
+                                   "tool_response": {"filePath": rel, "success": True}}})
+    corpus.append({"name": "post-multiedit", "event": "PostToolUse",
+                   "payload": {"tool_name": "MultiEdit",
+                               "tool_input": {"file_path": small[0],
+                                              "edits": [{"old_string": "a", "new_string": "b"}] * 3},
+                               "tool_response": {"filePath": small[0], "success": True}}})
+    return corpus
+
+
+def event_of(record: dict) -> tuple[str, dict]:
+    """(event name, payload) of a corpus line in either format"""
+    if "payload" in record:
+        return record.get("event") or record["payload"].get("hook_event_name", ""), record["payload"]
+    event = record.get("hook_event_name")
+    if not event:
+        if "prompt" in record:
+            event = "UserPromptSubmit"
+        elif "tool_response" in record:
+            event = "PostToolUse"
+        elif "tool_name" in record:
+            event = "PreToolUse"
+    return event or "", record
+
+
+def load_corpus(path: Path) -> list[dict]:
+    corpus = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        event, payload = event_of(json.loads(line))
+        corpus.append({"name": event or "unknown", "event": event, "payload": payload})
+    return corpus
+
+
+def build_project(project: Path, args: argparse.Namespace) -> list[dict]:
+    """Lay out the benchmark project; returns the corpus"""
+    rng = random.Random(args.seed)
+    hooks = project / ".claude" / "hooks"
+    hooks.mkdir(parents=True, exist_ok=True)
+    for path in HOOK_DIR.iterdir():
+        if path.suffix in COPY_SUFFIXES and path.is_file():
+            shutil.copy2(path, hooks / path.name)
+
+    skills = project / ".claude" / "skills"
+    skills.mkdir(parents=True, exist_ok=True)
+    if args.rules:
+        shutil.copyfile(args.rules, skills / "skill-rules.json")
+    else:
+        rules = generate_rules(args.skills, rng)
+        (skills / "skill-rules.json").write_text(json.dumps(rules, indent=2), encoding="utf-8")
+
+    files = generate_files(project, args.file_lines, rng)
+    corpus = load_corpus(Path(args.corpus)) if args.corpus else generate_corpus(files, args.prompt_chars, rng)
+    with open(project / "corpus.jsonl", "w", encoding="utf-8") as f:
+        for record in corpus:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    (project / "home").mkdir(exist_ok=True)
+    return corpus
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Latency statistics in milliseconds"""
+    return {
+        "n": len(samples),
+        "p50": round(percentile(samples, 50) * 1000, 3),
+        "p95": round(percentile(samples, 95) * 1000, 3),
+        "p99": round(percentile(samples, 99) * 1000, 3),
+        "mean": round(sum(samples) / len(samples) * 1000, 3),
+        "max": round(max(samples) * 1000, 3),
+    }
+
+
+def peak_rss_kb() -> int:
+    """Peak RSS of this process in KiB"""
+    # VmHWM starts over at exec; ru_maxrss would include the parent's peak
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+# Runs a hook as __main__ (argv[2:]) and writes its peak RSS to argv[1] at exit
+RSS_PROBE = """
+import atexit, runpy, sys
+
+def report(path=sys.argv[1]):
+    try:
+        rss = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+    open(path, "w").write(str(rss))
+
+atexit.register(report)
+sys.argv = sys.argv[2:]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def run_process(command: list[str], stdin_path: Path | None, env: dict, cwd: Path) -> tuple[float, int]:
+    """Run a command to completion; (seconds, exit code)"""
+    stdin = open(stdin_path, "rb") if stdin_path else subprocess.DEVNULL
+    try:
+        start = time.perf_counter()
+        code = subprocess.call(command, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=env, cwd=cwd)
+        elapsed = time.perf_counter() - start
+    finally:
+        if stdin_path:
+            stdin.close()
+    return elapsed, code
+
+
+def bench_subprocess(hook_path: Path, payload_files: list[Path], runs: int, env: dict, cwd: Path) -> dict:
+    """
+    One fresh interpreter per event; the first pass warms caches and is not
+    counted. Peak RSS comes from a separate, untimed pass under RSS_PROBE.
+    """
+    samples, exit_codes = [], {}
+    for run in range(runs + 1):
+        for payload in payload_files:
+            elapsed, code = run_process([sys.executable, str(hook_path)], payload, env, cwd)
+            if run == 0:
+                continue
+            samples.append(elapsed)
+            exit_codes[str(code)] = exit_codes.get(str(code), 0) + 1
+
+    rss_file = cwd / ".bench-rss"
+    rss = 0
+    for payload in payload_files:
+        run_process([sys.executable, "-c", RSS_PROBE, str(rss_file), str(hook_path)], payload, env, cwd)
+        try:
+            rss = max(rss, int(rss_file.read_text(encoding="ascii")))
+        except (OSError, ValueError):
+            pass
+    return {**summarize(samples), "rss_kb": rss, "exit_codes": exit_codes}
+
+
+def bench_inprocess(hook: str, hooks_dir: Path, payload_files: list[Path], runs: int,
+                    env: dict, cwd: Path) -> dict:
+    """All events through one worker process (hook-daemon's HookRunner)"""
+    job = cwd / f".bench-{hook}.json"
+    job.write_text(json.dumps({"hooks_dir": str(hooks_dir), "hook": hook, "runs": runs,
+                               "payloads": [str(p) for p in payload_files]}), encoding="utf-8")
+    out = cwd / f".bench-{hook}.out"
+    with open(job, "rb") as stdin, open(out, "wb") as stdout:
+        code = subprocess.call([sys.executable, str(Path(__file__).resolve()), "--worker"],
+                               stdin=stdin, stdout=stdout, stderr=subprocess.DEVNULL, env=env, cwd=cwd)
+    if code != 0:
+        raise RuntimeError(f"in-process worker failed for {hook}")
+    result = json.loads(out.read_text(encoding="utf-8"))
+    return {**summarize(result["samples"]), "load_ms": round(result["load"] * 1000, 3),
+            "rss_kb": result["rss_kb"], "exit_codes": result["exit_codes"]}
+
+
+def inprocess_worker():
+    """Worker side of bench_inprocess(): time each event, print samples as JSON"""
+    job = json.loads(sys.stdin.read())
+    hooks_dir = Path(job["hooks_dir"])
+    sys.path.insert(0, str(hooks_dir))
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("hook_daemon", hooks_dir / "hook-daemon.py")
+    daemon = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(daemon)
+    # Also time hooks the daemon does not serve (their logic cost vs. startup)
+    daemon.EXCLUDED_HOOKS.discard(job["hook"])
+    runner = daemon.HookRunner(hooks_dir)
+
+    payloads = [Path(p).read_text(encoding="utf-8") for p in job["payloads"]]
+    cwd = os.getcwd()
+    # What hook-client.py would forward
+    env = {k: v for k, v in os.environ.items() if k.startswith(daemon.FORWARDED_ENV_PREFIXES)}
+
+    # First event: import and load the hook (what a subprocess pays on every event)
+    start = time.perf_counter()
+    runner.run(job["hook"], payloads[0], cwd, env)
+    load = time.perf_counter() - start
+
+    samples, exit_codes = [], {}
+    for run in range(job["runs"] + 1):
+        for payload in payloads:
+            start = time.perf_counter()
+            result = runner.run(job["hook"], payload, cwd, env)
+            elapsed = time.perf_counter() - start
+            if run == 0:
+                continue
+            samples.append(elapsed)
+            code = str(result["exit_code"])
+            exit_codes[code] = exit_codes.get(code, 0) + 1
+    json.dump({"load": load, "samples": samples, "exit_codes": exit_codes, "rss_kb": peak_rss_kb()}, sys.__stdout__)
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HOOK_DIR,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+# Differential checks run before timing: (script, arguments); exit 1 = mismatch
+CORRECTNESS_CHECKS = [
+    ("debug-mode-detector.py", ["--check-corpus"]),  # Anchored signals vs plain re.search
+    ("prompt_window.py", ["--check"]),               # Window leaves long single lines intact
+]
+
+
+def run_correctness_checks(hooks_dir: Path) -> list[str]:
+    """Output of the failing CORRECTNESS_CHECKS (empty if all pass)"""
+    failures = []
+    for script, arguments in CORRECTNESS_CHECKS:
+        result = subprocess.run([sys.executable, str(hooks_dir / script), *arguments],
+                                capture_output=True, text=True, stdin=subprocess.DEVNULL)
+        if result.returncode != 0:
+            output = (result.stdout + result.stderr).strip().splitlines()
+            failures.append(f"{script} {' '.join(arguments)}: " + "\n  ".join(output[:20]))
+    return failures
+
+
+def file_sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def run_benchmark(args: argparse.Namespace, project: Path) -> dict:
+    corpus = build_project(project, args)
+    hooks_dir = project / ".claude" / "hooks"
+    env = {
+        **os.environ,
+        "HOME": str(project / "home"),
+        "CLAUDE_PROJECT_DIR": str(project),
+        "CLAUDE_HOOK_DAEMON_AUTOSTART": "0",
+    }
+    selected = args.hooks.split(",") if args.hooks else list(HOOK_EVENTS)
+    unknown = [hook for hook in selected if hook not in HOOK_EVENTS]
+    if unknown:
+        raise ValueError(f"Unknown hook: {', '.join(unknown)}")
+
+    payload_dir = project / "payloads"
+    payload_dir.mkdir(exist_ok=True)
+    by_event: dict[str, list[Path]] = {}
+    for i, record in enumerate(corpus):
+        payload = {"session_id": SESSION_ID, "cwd": str(project), "hook_event_name": record["event"],
+                   **record["payload"]}
+        path = payload_dir / f"{i:04d}.json"
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        by_event.setdefault(record["event"], []).append(path)
+
+    # Interpreter startup with no hook code: the floor of every subprocess run
+    startup = [run_process([sys.executable, "-c", "pass"], None, env, project)[0] for _ in range(args.runs * 4)]
+    startup_ms = summarize(startup)["p50"]
+
+    hooks = {}
+    for hook in selected:
+        payloads = by_event.get(HOOK_EVENTS[hook], [])
+        if not payloads:
+            continue
+        if not args.quiet:
+            print(f"Benchmarking {hook} ({len(payloads)} events x {args.runs} runs)...", file=sys.stderr)
+        result = {"event": HOOK_EVENTS[hook], "events": len(payloads)}
+        if args.mode in ("subprocess", "both"):
+            result["subprocess"] = bench_subprocess(hooks_dir / f"{hook}.py", payloads, args.runs, env, project)
+        if args.mode in ("inprocess", "both"):
+            result["inprocess"] = bench_inprocess(hook, hooks_dir, payloads, args.runs, env, project)
+        if "subprocess" in result and "inprocess" in result:
+            logic = result["inprocess"]["p50"]
+            result["breakdown_ms"] = {
+                "startup": startup_ms,
+                "imports": round(max(0.0, result["subprocess"]["p50"] - startup_ms - logic), 3),
+                "logic": logic,
+            }
+        hooks[hook] = result
+
+    return {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": f"{platform.system()} {platform.machine()}",
+        "cpus": os.cpu_count(),
+        "config": {
+            "skills": None if args.rules else args.skills,
+            "prompt_chars": args.prompt_chars,
+            "file_lines": args.file_lines,
+            "runs": args.runs,
+            "seed": args.seed,
+        },
+        "corpus_sha256": file_sha256(project / "corpus.jsonl"),
+        "rules_sha256": file_sha256(project / ".claude" / "skills" / "skill-rules.json"),
+        "startup_ms": summarize(startup),
+        "hooks": hooks,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def print_report(results: dict):
+    print(f"Hook latency (commit {results.get('commit') or '-'}, Python {results['python']}, "
+          f"{results['config']['runs']} runs)")
+    print(f"Interpreter startup: p50 {results['startup_ms']['p50']:.1f} ms\n")
+    print(f"{'hook':<24} {'mode':<11} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'RSS':>9}")
+    for hook, result in results["hooks"].items():
+        for mode in ("subprocess", "inprocess"):
+            stats = result.get(mode)
+            if stats:
+                print(f"{hook:<24} {mode:<11} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} "
+                      f"{stats['max']:>8.2f} {stats['rss_kb'] / 1024:>6.1f} MB")
+    breakdowns = [(hook, r["breakdown_ms"]) for hook, r in results["hooks"].items() if "breakdown_ms" in r]
+    if breakdowns:
+        print("\nSubprocess p50 split (ms): startup + imports/loading + logic")
+        for hook, split in breakdowns:
+            print(f"  {hook:<24} {split['startup']:>7.2f} + {split['imports']:>7.2f} + {split['logic']:>7.2f}")
+    print("\nLatencies in ms. In-process = daemon mode; RSS = peak of the hook process (or worker).")
+
+
+def compare(base: dict, new: dict, threshold: float) -> bool:
+    """Print p50/p95/RSS changes per hook and mode; True if something regressed"""
+    if base.get("corpus_sha256") != new.get("corpus_sha256") or base.get("rules_sha256") != new.get("rules_sha256"):
+        print("Warning: workloads differ (corpus or rules); results are not directly comparable")
+    if (base.get("python"), base.get("platform")) != (new.get("python"), new.get("platform")):
+        print(f"Warning: different environments ({base.get('python')} {base.get('platform')} vs "
+              f"{new.get('python')} {new.get('platform')})")
+
+    print(f"Comparing {base.get('commit') or 'base'} -> {new.get('commit') or 'new'} (threshold {threshold:g}%)\n")
+    regressed = False
+    for hook, result in new["hooks"].items():
+        for mode in ("subprocess", "inprocess"):
+            before = base.get("hooks", {}).get(hook, {}).get(mode)
+            after = result.get(mode)
+            if not before or not after:
+                continue
+            changes = []
+            for key, unit, floor in (("p50", "ms", NOISE_FLOOR_MS), ("p95", "ms", NOISE_FLOOR_MS),
+                                     ("rss_kb", "KiB", 1024)):
+                old, cur = before[key], after[key]
+                pct = (cur - old) / old * 100 if old else 0.0
+                flag = pct > threshold and cur - old > floor
+                regressed |= flag
+                changes.append(f"{key} {old:g} -> {cur:g} {unit} ({pct:+.0f}%){' REGRESSION' if flag else ''}")
+            print(f"{hook} [{mode}]\n  " + "\n  ".join(changes))
+    print("\nRegression detected" if regressed else "\nNo regressions")
+    return regressed
+
+
+def main():
+    if sys.argv[1:] == ["--worker"]:
+        inprocess_worker()
+        return
+
+    parser = argparse.ArgumentParser(description="Benchmark hook latency on a replayable event corpus")
+    parser.add_argument("--corpus", help="JSONL corpus to replay (default: generated)")
+    parser.add_argument("--rules", help="skill-rules.json to use (default: generated, see --skills)")
+    parser.add_argument("--skills", type=int, default=200, help="Skills in the generated rules (default: 200)")
+    parser.add_argument("--prompt-chars", type=int, default=200_000,
+                        help="Size of the longest generated prompt (default: 200000)")
+    parser.add_argument("--file-lines", type=int, default=20_000,
+                        help="Lines of the generated large files (default: 20000)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the generated workload (default: 1)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed passes over the corpus (default: 5)")
+    parser.add_argument("--hooks", help=f"Comma-separated hooks (default: {','.join(HOOK_EVENTS)})")
+    parser.add_argument("--mode", choices=["subprocess", "inprocess", "both"], default="both")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", metavar="BASE_JSON", help="Compare against earlier results")
+    parser.add_argument("--against", metavar="NEW_JSON", help="With --compare: compare two result files, no run")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Regression threshold in percent (default: 20)")
+    parser.add_argument("--generate", metavar="DIR", help="Write the benchmark project to DIR and exit")
+    parser.add_argument("--workspace", metavar="DIR", help="Keep the benchmark project in DIR")
+    parser.add_argument("--quiet", action="store_true", help="No progress on stderr")
+    parser.add_argument("--check-only", action="store_true", help="Run the correctness checks and exit")
+    args = parser.parse_args()
+
+    if args.against:
+        if not args.compare:
+            print("Error: --against requires --compare", file=sys.stderr)
+            sys.exit(1)
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        new = json.loads(Path(args.against).read_text(encoding="utf-8"))
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    if args.generate:
+        project = Path(args.generate).resolve()
+        corpus = build_project(project, args)
+        print(f"Benchmark project written: {project} ({len(corpus)} events in corpus.jsonl)")
+        return
+
+    failures = run_correctness_checks(HOOK_DIR)
+    for failure in failures:
+        print(f"CHECK FAILED: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    if args.check_only:
+        print(f"All {len(CORRECTNESS_CHECKS)} correctness checks passed")
+        return
+
+    if args.workspace:
+        project = Path(args.workspace).resolve()
+        project.mkdir(parents=True, exist_ok=True)
+        results = run_benchmark(args, project)
+    else:
+        with tempfile.TemporaryDirectory(prefix="hook-bench-") as tmp:
+            results = run_benchmark(args, Path(tmp))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print_report(results)
+    if args.compare:
+        print()
+        base = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        sys.exit(1 if compare(base, results, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
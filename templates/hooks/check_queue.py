@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Debounced background check queue.
+
+post-tool-use-tracker.py (POST_TOOL_CHECKS=background) appends modified files
+to a per-project queue and returns immediately. A detached worker waits until
+no edit arrived for DEBOUNCE seconds, then runs one batched command per check
+tool for the whole burst (`ruff check f1 f2 f3` instead of three runs), skips
+files whose content already passed, and stores the results. The tracker
+surfaces results that finished since its previous invocation in the same
+session (sessions sharing a project each see every result once).
+
+    ~/.claude/hook-state/check-queue/<project-key>/
+        pending.jsonl   Queued files (appended by the tracker)
+        results.json    Finished results, newest last
+        reported/       Per session: sequence number of the last surfaced result
+        cache.json      (command, file) -> content hash last checked
+        worker.lock     Held by the running worker
+
+Usage:
+    python3 check_queue.py --worker <queue-dir>   # Started by the tracker
+
+Used by: post-tool-use-tracker.py
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from check_runner import FAIL, PASS, CheckResult, run_checks
+from session_state import MAX_SESSIONS, evict_shards
+
+QUEUE_ROOT = Path.home() / ".claude" / "hook-state" / "check-queue"
+
+# Quiet period after the last edit before a batch runs
+DEBOUNCE = float(os.environ.get("POST_TOOL_CHECKS_DEBOUNCE", "1.5"))
+
+# Seconds one batch may take; the worker exits after IDLE_EXIT idle seconds
+BATCH_BUDGET = float(os.environ.get("POST_TOOL_CHECKS_BATCH_BUDGET", "120"))
+IDLE_EXIT = 30.0
+POLL_INTERVAL = 0.2
+
+# Results and cache entries kept
+MAX_RESULTS = 50
+MAX_CACHE_ENTRIES = 1000
+
+# Commands with these are run per file ({file} may be an input/output argument)
+SHELL_OPERATORS = set("<>|;&")
+
+
+def queue_dir(cwd: str) -> Path:
+    """Queue directory of a project"""
+    key = hashlib.sha256(os.path.abspath(cwd).encode("utf-8")).hexdigest()[:16]
+    return QUEUE_ROOT / key
+
+
+def read_json(path: Path, default):
+    """Parsed JSON file, or default if missing or corrupt"""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path: Path, data):
+    """Atomic replace, readers never see partial writes"""
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(data))
+    os.replace(tmp_file, path)
+
+
+def file_hash(path: str) -> str | None:
+    """SHA-256 of a file's content, or None if unreadable"""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Tracker side
+# ---------------------------------------------------------------------------
+
+def enqueue(cwd: str, files: dict[str, list[str]]):
+    """Queue files ({path: command templates}) and make sure a worker runs"""
+    directory = queue_dir(cwd)
+    directory.mkdir(parents=True, exist_ok=True)
+    lines = "".join(
+        json.dumps({"file": path, "commands": templates}) + "\n" for path, templates in files.items()
+    )
+    # Single O_APPEND write: concurrent hooks never interleave entries
+    fd = os.open(directory / "pending.jsonl", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    try:
+        os.write(fd, lines.encode("utf-8"))
+    finally:
+        os.close(fd)
+    ensure_worker(directory, cwd)
+
+
+def ensure_worker(directory: Path, cwd: str):
+    """Start a detached worker unless one holds the lock"""
+    with open(directory / "worker.lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return  # Worker running
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--worker", str(directory)],
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def collect_results(cwd: str, session: str) -> list[CheckResult]:
+    """
+    Results finished since the session's previous call (each result is
+    surfaced once per session; a new session starts after the existing ones)
+    """
+    directory = queue_dir(cwd)
+    results = read_json(directory / "results.json", [])
+    marker = directory / "reported" / session
+    try:
+        reported = int(marker.read_text())
+    except (OSError, ValueError):
+        reported = None
+    fresh = [r for r in results if reported is not None and r["seq"] > reported]
+    latest = results[-1]["seq"] if results else 0
+    if reported == latest:
+        return []
+    try:
+        if reported is None:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            evict_shards(marker.parent, max(MAX_SESSIONS - 1, 0))
+        marker.write_text(str(latest))
+    except OSError:
+        pass
+    return [CheckResult(r["command"], r["status"], r["exit_code"], r["output"], r["duration"]) for r in fresh]
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def batchable(template: str) -> bool:
+    """True if one invocation can take several files in place of {file}"""
+    return template.count("{file}") == 1 and not SHELL_OPERATORS & set(template)
+
+
+def take_pending(directory: Path) -> list[dict]:
+    """Atomically take the queued entries"""
+    pending = directory / "pending.jsonl"
+    taken = directory / f"pending.{os.getpid()}.jsonl"
+    try:
+        os.replace(pending, taken)
+    except FileNotFoundError:
+        return []
+    time.sleep(0.05)  # Let appends that opened the old file finish
+    try:
+        lines = taken.read_text().splitlines()
+    finally:
+        taken.unlink(missing_ok=True)
+
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def plan_batch(entries: list[dict], cache: dict) -> list[tuple[str, str, dict[str, str | None]]]:
+    """
+    Commands for a batch: (command, template, {file: content hash}).
+
+    Files whose content already has a result for a template are skipped;
+    templates without {file} (project-wide) run once.
+    """
+    by_template: dict[str, dict[str, str | None]] = {}
+    for entry in entries:
+        for template in entry.get("commands", []):
+            by_template.setdefault(template, {})[entry["file"]] = None
+
+    jobs = []
+    for template, files in by_template.items():
+        for path in files:
+            files[path] = file_hash(path)
+        if "{file}" not in template:
+            jobs.append((template, template, files))
+            continue
+
+        stale = {
+            path: digest for path, digest in files.items()
+            if digest is None or cache.get(f"{template}\0{path}", {}).get("hash") != digest
+        }
+        if not stale:
+            continue
+        if batchable(template):
+            quoted = " ".join(shlex.quote(path) for path in stale)
+            jobs.append((template.format(file=quoted), template, stale))
+        else:
+            for path, digest in stale.items():
+                jobs.append((template.format(file=shlex.quote(path)), template, {path: digest}))
+    return jobs
+
+
+def record_results(directory: Path, jobs, results: list[CheckResult], cache: dict):
+    """Append results and remember which file contents were checked"""
+    stored = read_json(directory / "results.json", [])
+    seq = stored[-1]["seq"] if stored else 0
+    by_command = {r.command: r for r in results}
+
+    for command, template, files in jobs:
+        result = by_command[command]
+        seq += 1
+        stored.append({"seq": seq, **result._asdict()})
+        if result.status not in (PASS, FAIL) or "{file}" not in template:
+            continue
+        for path, digest in files.items():
+            if digest is not None:
+                cache[f"{template}\0{path}"] = {"hash": digest, "used": time.time()}
+
+    if len(cache) > MAX_CACHE_ENTRIES:
+        recent = sorted(cache.items(), key=lambda item: item[1]["used"], reverse=True)
+        cache = dict(recent[:MAX_CACHE_ENTRIES])
+    write_json(directory / "results.json", stored[-MAX_RESULTS:])
+    write_json(directory / "cache.json", cache)
+
+
+def has_pending(directory: Path) -> bool:
+    try:
+        return (directory / "pending.jsonl").stat().st_size > 0
+    except OSError:
+        return False
+
+
+def worker(directory: Path):
+    """Process debounced batches until idle, then exit unless entries arrived meanwhile"""
+    with open(directory / "worker.lock", "a") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # Another worker won the race
+            process_batches(directory)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            # An entry queued while this worker was about to exit saw the lock
+            # held, so ensure_worker() started nobody: take it over
+            if not has_pending(directory):
+                return
+
+
+def process_batches(directory: Path):
+    """Run debounced batches until no entry was queued for IDLE_EXIT seconds"""
+    pending = directory / "pending.jsonl"
+    idle_since = time.monotonic()
+    while True:
+        try:
+            quiet = time.time() - pending.stat().st_mtime
+        except FileNotFoundError:
+            if time.monotonic() - idle_since > IDLE_EXIT:
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+        if quiet < DEBOUNCE:
+            time.sleep(min(DEBOUNCE - quiet, DEBOUNCE))
+            continue
+
+        entries = take_pending(directory)
+        cache = read_json(directory / "cache.json", {})
+        jobs = plan_batch(entries, cache)
+        if jobs:
+            results = run_checks([command for command, _, _ in jobs], os.getcwd(), BATCH_BUDGET)
+            record_results(directory, jobs, results, cache)
+        idle_since = time.monotonic()
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] != "--worker":
+        print("Usage: check_queue.py --worker <queue-dir>", file=sys.stderr)
+        sys.exit(1)
+    worker(Path(sys.argv[2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Bounded, deadline-aware execution of check commands (lint, type check, ...).
+
+Commands run concurrently on a small worker pool, each in its own process
+group so that a straggler can be killed together with its children
+(npx -> node, cargo -> rustc). Every command gets a per-command timeout, and
+all of them share one deadline so the calling hook fits inside its timeout.
+
+Used by: post-tool-use-tracker.py
+"""
+
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+# Concurrent commands (each one is a process, threads only wait on them)
+MAX_WORKERS = max(2, min(os.cpu_count() or 2, 4))
+
+# Upper bound for a single command
+COMMAND_TIMEOUT = float(os.environ.get("POST_TOOL_CHECKS_TIMEOUT", "20"))
+
+# Output lines kept per failed command
+MAX_OUTPUT_LINES = 15
+MAX_LINE_CHARS = 200
+
+# Result statuses
+PASS = "pass"
+FAIL = "fail"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+
+class CheckResult(NamedTuple):
+    """Outcome of one check command"""
+    command: str
+    status: str           # PASS, FAIL, TIMEOUT or SKIPPED
+    exit_code: int | None
+    output: str           # Tail of combined stdout/stderr (failures only)
+    duration: float
+
+
+def executable_available(command: str) -> bool:
+    """True if the command's program is on PATH"""
+    try:
+        program = shlex.split(command)[0].rstrip(";&|")
+    except (ValueError, IndexError):
+        return False
+    return shutil.which(program) is not None
+
+
+def tail_output(data: bytes) -> str:
+    """Last MAX_OUTPUT_LINES lines of command output, each truncated"""
+    lines = data.decode("utf-8", errors="replace").rstrip().splitlines()[-MAX_OUTPUT_LINES:]
+    return "\n".join(line[:MAX_LINE_CHARS] for line in lines)
+
+
+def kill_group(proc: subprocess.Popen):
+    """Kill a command and everything it spawned"""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def run_command(command: str, cwd: str | None, deadline: float) -> CheckResult:
+    """Run one shell command until it exits, its timeout, or the shared deadline"""
+    start = time.monotonic()
+    remaining = min(COMMAND_TIMEOUT, deadline - start)
+    if remaining <= 0:
+        return CheckResult(command, SKIPPED, None, "not started: time budget exhausted", 0.0)
+    if not executable_available(command):
+        return CheckResult(command, SKIPPED, None, "not installed", 0.0)
+
+    try:
+        proc = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    except OSError as e:
+        return CheckResult(command, SKIPPED, None, str(e), 0.0)
+
+    try:
+        output, _ = proc.communicate(timeout=remaining)
+    except subprocess.TimeoutExpired:
+        kill_group(proc)
+        return CheckResult(command, TIMEOUT, None, "", time.monotonic() - start)
+
+    duration = time.monotonic() - start
+    if proc.returncode == 0:
+        return CheckResult(command, PASS, 0, "", duration)
+    return CheckResult(command, FAIL, proc.returncode, tail_output(output), duration)
+
+
+def run_checks(commands: list[str], cwd: str | None, budget: float) -> list[CheckResult]:
+    """
+    Run commands concurrently within budget seconds; results in input order.
+
+    Duplicate commands run once. Commands still running at the deadline are
+    killed and reported as TIMEOUT; commands not started by then as SKIPPED.
+    """
+    unique = list(dict.fromkeys(commands))
+    if not unique:
+        return []
+    deadline = time.monotonic() + budget
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(unique))) as pool:
+        return list(pool.map(lambda cmd: run_command(cmd, cwd, deadline), unique))
@@ -13,13 +13,27 @@ Input: JSON HookInput (stdin)
 Output: Debug guidance prompt (stdout) - injected into model context
 """
 import json
+import os
 import re
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 
-# State file: track cumulative signals in session
-STATE_FILE = Path.home() / ".claude" / "debug-detector-state.json"
+try:
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_telemetry import instrument, mark, phase, record_error
+from prompt_window import Budget, build_window, fold_case
+from session_state import shard_path
+
+# State shard kind: track cumulative signals per session
+# (~/.claude/hook-state/debug-detector/<session>.json, see session_state.py)
+STATE_KIND = "debug-detector"
 
 # ============================================================
 # Scoring Weight Configuration
@@ -195,70 +209,182 @@ If 3+ fixes fail -> STOP and question the architecture.
 """
 
 
-def load_state() -> dict:
+def load_state(state_file: Path) -> dict:
     """Load cumulative state"""
-    if STATE_FILE.exists():
+    if state_file.exists():
         try:
-            data = json.loads(STATE_FILE.read_text())
+            data = json.loads(state_file.read_text())
             # Clean records older than 30 minutes
             cutoff = (datetime.now() - timedelta(minutes=30)).isoformat()
             if data.get("last_update", "") < cutoff:
                 return {"cumulative_score": 0, "trigger_count": 0, "last_update": ""}
             return data
-        except Exception:
-            pass
+        except Exception as e:
+            record_error(e)
     return {"cumulative_score": 0, "trigger_count": 0, "last_update": ""}
 
 
-def save_state(state: dict):
-    """Save cumulative state"""
+def save_state(state_file: Path, state: dict):
+    """Save cumulative state (atomic replace, concurrent hooks never see partial writes)"""
     state["last_update"] = datetime.now().isoformat()
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = state_file.with_name(f"{state_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(json.dumps(state))
+    os.replace(tmp_file, state_file)
 
 
-def calculate_score(prompt: str) -> tuple[int, bool, list[str]]:
+class SignalScorer:
+    """
+    All signal tables compiled once.
+
+    Each signal's regex is precompiled together with literal "anchors"
+    (derived from its parse tree): one set per top-level part of the pattern,
+    such that any match contains one anchor of every set, in order. A prompt
+    is case-folded once; signals whose anchors are absent (or out of order)
+    are ruled out with substring searches instead of a regex scan, so only
+    plausible signals ever run their regex over the prompt - and .*-style
+    signals never backtrack over long lines that cannot match.
+    """
+
+    def __init__(self, tables: list[tuple[str, dict[str, int]]]):
+        self.signals: list[tuple[str, str, int, re.Pattern, list[frozenset[str]]]] = []
+        for category, table in tables:
+            for pattern, weight in table.items():
+                anchors = self._anchor_sequence(sre_parse.parse(pattern, re.IGNORECASE))
+                self.signals.append((category, pattern, weight, re.compile(pattern, re.IGNORECASE), anchors))
+
+    @staticmethod
+    def _literal_char(code: int) -> str:
+        """Lowercased char usable as an anchor, or "" if case folding could change it"""
+        ch = chr(code)
+        if ch.isascii() or ch.lower() == ch.upper() == ch:
+            return ch.lower()
+        return ""
+
+    @classmethod
+    def _anchors(cls, items) -> frozenset[str] | None:
+        """Literal strings, one of which every match of `items` contains (None if unknown)"""
+        best: frozenset[str] | None = None
+
+        def consider(candidate: frozenset[str] | None):
+            nonlocal best
+            if not candidate:
+                return
+            # Prefer longer (more selective) anchors, then fewer alternatives
+            rank = (min(map(len, candidate)), -len(candidate))
+            if best is None or rank > (min(map(len, best)), -len(best)):
+                best = candidate
+
+        for anchors in cls._anchor_sequence(items):
+            consider(anchors)
+        return best
+
+    @classmethod
+    def _anchor_sequence(cls, items) -> list[frozenset[str]]:
+        """Anchor sets of the parts of `items`, in order (a match contains one of each)"""
+        sequence = []
+        run = ""
+        for op, av in items:
+            ch = cls._literal_char(av) if op is sre_constants.LITERAL else ""
+            if ch:
+                run += ch
+                continue
+            if run:
+                sequence.append(frozenset([run]))
+            run = ""
+            anchors = None
+            if op is sre_constants.SUBPATTERN:
+                anchors = cls._anchors(av[-1])
+            elif op is sre_constants.BRANCH:
+                branches = [cls._anchors(branch) for branch in av[1]]
+                if all(branches):
+                    anchors = frozenset().union(*branches)
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+                anchors = cls._anchors(av[2])
+            elif op is sre_constants.IN and len(av) <= 8:
+                chars = [cls._literal_char(a) if o is sre_constants.LITERAL else "" for o, a in av]
+                if all(chars):
+                    anchors = frozenset(chars)
+            if anchors:
+                sequence.append(anchors)
+        if run:
+            sequence.append(frozenset([run]))
+        return sequence
+
+    @staticmethod
+    def _anchors_in_order(folded: str, sequence: list[frozenset[str]]) -> bool:
+        """Whether folded contains one anchor of every set, each after the previous one"""
+        pos = 0
+        for anchors in sequence:
+            ends = [start + len(a) for a in anchors if (start := folded.find(a, pos)) != -1]
+            if not ends:
+                return False
+            pos = min(ends)
+        return True
+
+    def fired(self, text: str, folded: str | None = None, budget: Budget | None = None) -> list[int]:
+        """
+        Indexes (in table order) of all signals matching text.
+
+        `folded` is fold_case(text) if the caller already has it. When the
+        budget runs out, the remaining signals are not evaluated.
+        """
+        if folded is None:
+            folded = fold_case(text)
+        fired = []
+        for i, (_, _, _, regex, anchors) in enumerate(self.signals):
+            if budget and budget.expired():
+                break
+            if not self._anchors_in_order(folded, anchors):
+                continue
+            if budget:
+                budget.charge(len(text))
+            if regex.search(text):
+                fired.append(i)
+        return fired
+
+    def fired_reference(self, text: str) -> list[int]:
+        """Plain per-signal re.search (used by --check-signals)"""
+        return [i for i, (_, pattern, _, _, _) in enumerate(self.signals) if re.search(pattern, text, re.IGNORECASE)]
+
+
+SCORER = SignalScorer([
+    ("tech", TECH_SIGNALS),
+    ("problem", PROBLEM_SIGNALS),
+    ("frustration", FRUSTRATION_SIGNALS),
+    ("low", LOW_WEIGHT_SIGNALS),
+])
+
+
+def calculate_score(prompt: str, budget: Budget | None = None) -> tuple[int, bool, list[str]]:
     """
     Calculate debug scenario score
     Returns: (total_score, has_frustration, matched_signals)
+
+    Signals are searched in the bounded analysis window of the prompt
+    (see prompt_window.py); length heuristics use the full prompt.
     """
     score = 0
     has_frustration = False
     matched_signals = []
+    window = build_window(prompt)
 
-    # Technical signals
-    for pattern, weight in TECH_SIGNALS.items():
-        if re.search(pattern, prompt, re.IGNORECASE):
-            score += weight
-            matched_signals.append(f"tech:{pattern[:20]}")
-
-    # Problem description words
-    for pattern, weight in PROBLEM_SIGNALS.items():
-        if re.search(pattern, prompt, re.IGNORECASE):
-            score += weight
-            matched_signals.append(f"problem:{pattern[:20]}")
-
-    # Frustration signals
-    for pattern, weight in FRUSTRATION_SIGNALS.items():
-        if re.search(pattern, prompt, re.IGNORECASE):
-            score += weight
+    # Technical, problem, frustration and low weight signals
+    for i in SCORER.fired(window.text, window.folded, budget):
+        category, pattern, weight, _, _ = SCORER.signals[i]
+        score += weight
+        if category == "frustration":
             has_frustration = True
-            matched_signals.append(f"frustration:{pattern[:20]}")
-
-    # Low weight signals
-    for pattern, weight in LOW_WEIGHT_SIGNALS.items():
-        if re.search(pattern, prompt, re.IGNORECASE):
-            score += weight
-            matched_signals.append(f"low:{pattern[:20]}")
+        matched_signals.append(f"{category}:{pattern[:20]}")
 
     # Additional heuristics
     # 1. Long message (may contain stack trace)
-    if len(prompt) > 500:
+    if window.length > 500:
         score += 2
         matched_signals.append("long_message")
 
     # 2. Multi-line message (may be error output)
-    if prompt.count('\n') > 5:
+    if window.newlines > 5:
         score += 2
         matched_signals.append("multiline")
 
@@ -270,13 +396,64 @@ def calculate_score(prompt: str) -> tuple[int, bool, list[str]]:
     return score, has_frustration, matched_signals
 
 
-def is_debug_scenario(prompt: str) -> tuple[bool, str]:
+def check_signals(text: str) -> list[str]:
+    """Compare the anchored scorer with plain re.search; returns mismatching patterns"""
+    fast = set(SCORER.fired(text))
+    slow = set(SCORER.fired_reference(text))
+    return [SCORER.signals[i][1] for i in sorted(fast ^ slow)]
+
+
+# Fixed prompts for --check-corpus (per-signal samples are added in check_corpus())
+CHECK_PROMPTS = [
+    "",
+    "please fix the login bug, it doesn't work",
+    'Traceback (most recent call last):\n  File "app/main.py", line 42, in <module>\nTypeError: bad',
+    'File \'x.py\' , line 3 and File "y.py",\tline 7',
+    "line 12, File \"late.py\" - anchors out of order",
+    "ERROR at api.ts:12:5 status: 503, still not working!!!",
+    "为什么登录还是不行？？？ 又出来报错了，第三次了",
+    "明明改了却没反应，卡住了，搞不定",
+    "KELVIN \u212a and long s \u017f: Error \u0130stanbul",
+    "why does this fail again... what the hell",
+    "x" * 496 + "exception here",
+    "a" * 497 + "prefix the import",
+    "can't " * 1400 + "work",
+    'File "x' * 1200,
+    "为什么" * 2700 + "不",
+    ("word " * 120 + "\n") * 90 + "Traceback\n" + "line 5 " * 400,
+]
+
+
+def check_corpus() -> list[str]:
+    """
+    CHECK_PROMPTS plus samples built from each signal's anchors: in order,
+    reversed, upper-cased, and inside lines of more than 500 chars
+    """
+    prompts = list(CHECK_PROMPTS)
+    for _, _, _, _, anchors in SCORER.signals:
+        parts = [min(group) for group in anchors]
+        for sample in (" ".join(parts), "".join(parts), " ".join(reversed(parts))):
+            prompts.extend([sample, sample.upper(), "x " * 300 + sample + " y" * 300, "a" * 497 + sample])
+    return prompts
+
+
+def check_signals_corpus() -> list[str]:
+    """Mismatches between scorer and re.search over check_corpus(), whole and windowed"""
+    mismatches = []
+    for i, prompt in enumerate(check_corpus()):
+        for label, text in (("prompt", prompt), ("window", build_window(prompt).text)):
+            mismatches.extend(f"{pattern} (sample {i}, {label})" for pattern in check_signals(text))
+    return mismatches
+
+
+def is_debug_scenario(prompt: str, state_file: Path) -> tuple[bool, str]:
     """
     Smart detection of debug scenario
     Returns: (triggered, confidence_description)
     """
-    state = load_state()
-    score, has_frustration, _signals = calculate_score(prompt)
+    with phase("state"):
+        state = load_state(state_file)
+    score, has_frustration, _signals = calculate_score(prompt, Budget())
 
     # Cumulative effect: if triggered before, lower threshold
     if state["trigger_count"] > 0:
@@ -291,7 +468,8 @@ def is_debug_scenario(prompt: str) -> tuple[bool, str]:
     if triggered:
         state["trigger_count"] = state.get("trigger_count", 0) + 1
         state["cumulative_score"] = score
-        save_state(state)
+        with phase("state"):
+            save_state(state_file, state)
 
         # Generate confidence description
         if score >= 15:
@@ -308,25 +486,42 @@ def is_debug_scenario(prompt: str) -> tuple[bool, str]:
     return False, ""
 
 
+@instrument("debug-mode-detector")
 def main():
+    # Differential check after customizing signal tables:
+    #   python3 debug-mode-detector.py --check-signals < sample.txt
+    #   python3 debug-mode-detector.py --check-corpus  (built-in corpus)
+    if "--check-signals" in sys.argv[1:] or "--check-corpus" in sys.argv[1:]:
+        if "--check-corpus" in sys.argv[1:]:
+            mismatches = check_signals_corpus()
+        else:
+            mismatches = check_signals(sys.stdin.read())
+        for pattern in mismatches:
+            print(f"MISMATCH: {pattern}")
+        sys.exit(1 if mismatches else 0)
+
     try:
+        mark("stdin")
         input_str = sys.stdin.read()
         if not input_str.strip():
             sys.exit(0)
 
+        mark("parse")
         hook_input = json.loads(input_str)
         prompt = hook_input.get("prompt", "")
 
         if not prompt:
             sys.exit(0)
 
-        triggered, confidence = is_debug_scenario(prompt)
+        mark("match")
+        triggered, confidence = is_debug_scenario(prompt, shard_path(STATE_KIND, hook_input, ".json"))
 
+        mark("output")
         if triggered:
             print(SYSTEMATIC_DEBUG_PROMPT.format(confidence=confidence))
 
-    except Exception:
-        pass
+    except Exception as e:
+        record_error(e)
 
 
 if __name__ == "__main__":
@@ -21,8 +21,12 @@ import os
 import sys
 from pathlib import Path
 
-# Line count threshold
-LINE_LIMIT = int(os.environ.get("FILE_SIZE_LIMIT", "500"))
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_telemetry import instrument, mark, record_error
+from line_cache import LineCache
+
+# Line count threshold (default of FILE_SIZE_LIMIT, read per event for the daemon)
+LINE_LIMIT = 500
 
 # Excluded file patterns (these files are allowed to exceed limit)
 EXCLUDED_PATTERNS = [
@@ -89,15 +93,18 @@ def is_excluded(file_path: str) -> bool:
     return False
 
 
-def count_lines(file_path: str) -> int | None:
-    """Count file lines"""
-    try:
-        path = Path(file_path)
-        if not path.exists():
-            return None
-        return len(path.read_text(encoding="utf-8").splitlines())
-    except Exception:
+def count_lines(cache: LineCache, file_path: str, stop_after: int | None = None) -> tuple[int, bool] | None:
+    """
+    Count file lines via the shared line cache.
+
+    Returns (line_count, exact). With stop_after, reading stops once the count
+    exceeds it and line_count is an estimate extrapolated from the bytes read.
+    Files of at most stop_after bytes cannot exceed it and are not read at all.
+    """
+    info = cache.lookup(file_path, stop_after)
+    if info is None:
         return None
+    return info.lines, info.exact
 
 
 def get_file_extension(file_path: str) -> str:
@@ -105,7 +112,7 @@ def get_file_extension(file_path: str) -> str:
     return Path(file_path).suffix.lower()
 
 
-def format_warning(file_path: str, line_count: int) -> str:
+def format_warning(file_path: str, line_count: int, exact: bool = True, limit: int = LINE_LIMIT) -> str:
     """Format warning message"""
     ext = get_file_extension(file_path)
     suggestions = SPLIT_SUGGESTIONS.get(ext, ["Consider splitting file into smaller modules"])
@@ -117,7 +124,10 @@ def format_warning(file_path: str, line_count: int) -> str:
     lines.append("!" * 60)
     lines.append("")
     lines.append(f"  File: {file_path}")
-    lines.append(f"  Lines: {line_count} (limit: {LINE_LIMIT})")
+    if exact:
+        lines.append(f"  Lines: {line_count} (limit: {limit})")
+    else:
+        lines.append(f"  Lines: ~{line_count} (estimated, limit: {limit})")
     lines.append("")
     lines.append("  This file exceeds the recommended size limit.")
     lines.append("  Large files are harder to maintain and understand.")
@@ -134,17 +144,21 @@ def format_warning(file_path: str, line_count: int) -> str:
     return "\n".join(lines)
 
 
+@instrument("file-size-guard")
 def main():
     """Main function"""
     try:
         # Read stdin
+        mark("stdin")
         input_str = sys.stdin.read()
         if not input_str.strip():
             return
 
+        mark("parse")
         try:
             hook_input = json.loads(input_str)
-        except json.JSONDecodeError:
+        except json.JSONDecodeError as e:
+            record_error(e)
             return
 
         # Get tool info
@@ -170,23 +184,31 @@ def main():
                 if file_path and file_path not in files_to_check:
                     files_to_check.append(file_path)
 
-        # Check each file
+        # Check each file (unchanged files cost a stat via the line cache)
+        mark("state")
+        cache = LineCache()
+        mark("match")
+        limit = int(os.environ.get("FILE_SIZE_LIMIT", LINE_LIMIT))
         warnings = []
         for file_path in files_to_check:
             # Skip excluded files
             if is_excluded(file_path):
                 continue
 
-            # Count lines
-            line_count = count_lines(file_path)
-            if line_count is None:
+            # Count lines (stops reading once the limit is exceeded)
+            result = count_lines(cache, file_path, stop_after=limit)
+            if result is None:
                 continue
+            line_count, exact = result
 
-            # Check if exceeds threshold
-            if line_count > LINE_LIMIT:
-                warnings.append(format_warning(file_path, line_count))
+            # Check if exceeds threshold (inexact counts below it are upper bounds)
+            if line_count > limit:
+                warnings.append(format_warning(file_path, line_count, exact, limit))
+        mark("state")
+        cache.save()
 
         # Output using JSON format to inject into Claude context
+        mark("output")
         if warnings:
             output = {
                 "hookSpecificOutput": {
@@ -196,9 +218,9 @@ def main():
             }
             print(json.dumps(output))
 
-    except Exception:
+    except Exception as e:
         # Silent fail, don't affect normal operations
-        pass
+        record_error(e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+"""
+Compiled fileTriggers globs for skill activation.
+
+All include/exclude globs of all skills are compiled into one trie over path
+segments. Literal segments and suffix segments (`*.py`, `*_test.py`) are
+dict lookups, other wildcard segments are regexes shared by every glob with
+the same prefix, and `**` is a looping node. Matching a path walks the trie once and returns every glob that
+matches, so N paths cost N walks whatever the number of skills and globs.
+
+Glob syntax:
+- `*` and `?` match within one segment, `[abc]` / `[!abc]` classes
+- `**` matches any number of segments (`src/**/*.py`, `**/*.vue`)
+- `{a,b}` alternatives (`**/*.{ts,tsx}`)
+- A glob without `/` matches the file name at any depth (`*_test.py`)
+
+The compiled trie is plain JSON and is cached with the rest of the trigger
+index.
+
+Used by: skill-activation-prompt.py
+"""
+
+import re
+from typing import Any
+
+# File-like tokens in a prompt: path with a slash, or a name with an extension
+PROMPT_PATH_PATTERN = re.compile(
+    r"(?<![\w/.@:-])(?:\.{0,2}/)?(?:[\w.-]+/)+[\w.-]+"
+    r"|(?<![\w/.@:-])[\w-][\w.-]*\.[A-Za-z][A-Za-z0-9]{0,9}\b(?![@-])"
+)
+MAX_PROMPT_PATHS = 50
+
+# Shorter tokens are abbreviations ("e.g"), not file names
+MIN_PROMPT_PATH = 4
+
+
+def expand_braces(glob: str) -> list[str]:
+    """Expand {a,b} alternatives (nested ones too) into separate globs"""
+    start = glob.find("{")
+    if start == -1:
+        return [glob]
+    depth = 0
+    options, option_start = [], start + 1
+    for i in range(start, len(glob)):
+        if glob[i] == "{":
+            depth += 1
+        elif glob[i] == "}":
+            depth -= 1
+            if depth == 0:
+                options.append(glob[option_start:i])
+                rest = glob[i + 1:]
+                return [
+                    expanded
+                    for option in options
+                    for expanded in expand_braces(glob[:start] + option + rest)
+                ]
+        elif glob[i] == "," and depth == 1:
+            options.append(glob[option_start:i])
+            option_start = i + 1
+    return [glob]  # Unbalanced: literal brace
+
+
+def _segment_regex(segment: str) -> str | None:
+    """Regex for a wildcard segment, or None if the segment is literal"""
+    if not any(ch in segment for ch in "*?["):
+        return None
+    parts = []
+    i = 0
+    while i < len(segment):
+        ch = segment[i]
+        if ch == "*":
+            parts.append(".*")
+        elif ch == "?":
+            parts.append(".")
+        elif ch == "[":
+            # A ] right after [ or [! is part of the class
+            start = i + 1
+            if segment[start:start + 1] in ("!", "^"):
+                start += 1
+            if segment[start:start + 1] == "]":
+                start += 1
+            end = segment.find("]", start)
+            if end == -1:
+                parts.append(re.escape(ch))
+            else:
+                body = segment[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(ch))
+        i += 1
+    return "".join(parts)
+
+
+def build_glob_trie(globs: list[str]) -> dict[str, Any]:
+    """
+    Compile globs into a JSON-serializable segment trie.
+
+    Node: {"lit": {segment: node}, "suffix": {suffix: node}, "wild": {regex:
+    node}, "star": node, "loop": true (for ** nodes), "accept": [glob
+    indexes]}. Empty keys are omitted.
+    """
+    nodes: list[dict[str, Any]] = [{}]
+
+    def child(node: int, kind: str, key: str) -> int:
+        table = nodes[node].setdefault(kind, {})
+        if key not in table:
+            table[key] = len(nodes)
+            nodes.append({})
+        return table[key]
+
+    def star(node: int) -> int:
+        if "star" not in nodes[node]:
+            nodes[node]["star"] = len(nodes)
+            nodes.append({"loop": True})
+        return nodes[node]["star"]
+
+    for glob_idx, glob in enumerate(globs):
+        for expanded in expand_braces(glob):
+            pattern = expanded.strip().removeprefix("./")
+            if not pattern:
+                continue
+            if "/" not in pattern.rstrip("/"):
+                pattern = "**/" + pattern  # Name glob: any depth
+            node = 0
+            for segment in pattern.strip("/").split("/"):
+                if segment == "**":
+                    if not nodes[node].get("loop"):  # "**/**" is the same as "**"
+                        node = star(node)
+                    continue
+                regex = _segment_regex(segment)
+                if regex is None:
+                    node = child(node, "lit", segment)
+                elif segment.startswith("*") and _segment_regex(segment[1:]) is None:
+                    node = child(node, "suffix", segment[1:])
+                else:
+                    node = child(node, "wild", regex)
+            accept = nodes[node].setdefault("accept", [])
+            if glob_idx not in accept:
+                accept.append(glob_idx)
+    return {"nodes": nodes}
+
+
+class GlobTrie:
+    """Matcher over a compiled glob trie"""
+
+    def __init__(self, data: dict[str, Any]):
+        self._nodes = data["nodes"]
+        self._wild = [
+            [(re.compile(regex), target) for regex, target in node.get("wild", {}).items()]
+            for node in self._nodes
+        ]
+        # Distinct suffix lengths per node: one dict lookup per length
+        self._suffix_lengths = [sorted({len(key) for key in node.get("suffix", ())}) for node in self._nodes]
+
+    def _closure(self, states: set[int]) -> set[int]:
+        """Add the ** nodes reachable without consuming a segment"""
+        pending = list(states)
+        while pending:
+            star = self._nodes[pending.pop()].get("star")
+            if star is not None and star not in states:
+                states.add(star)
+                pending.append(star)
+        return states
+
+    def match(self, path: str) -> set[int]:
+        """Indexes of every glob matching a relative posix path"""
+        states = self._closure({0})
+        for segment in path.strip("/").split("/"):
+            following: set[int] = set()
+            for state in states:
+                node = self._nodes[state]
+                if node.get("loop"):
+                    following.add(state)
+                target = node.get("lit", {}).get(segment)
+                if target is not None:
+                    following.add(target)
+                suffixes = node.get("suffix")
+                for length in self._suffix_lengths[state]:
+                    if length <= len(segment):
+                        target = suffixes.get(segment[len(segment) - length:])
+                        if target is not None:
+                            following.add(target)
+                for regex, target in self._wild[state]:
+                    if regex.fullmatch(segment):
+                        following.add(target)
+            if not following:
+                return set()
+            states = self._closure(following)
+
+        accepted: set[int] = set()
+        for state in states:
+            accepted.update(self._nodes[state].get("accept", ()))
+        return accepted
+
+
+def prompt_paths(text: str) -> list[str]:
+    """File paths mentioned in a prompt (at most MAX_PROMPT_PATHS)"""
+    paths = dict.fromkeys(
+        match.group(0).rstrip(".").removeprefix("./") for match in PROMPT_PATH_PATTERN.finditer(text)
+    )
+    return [path for path in paths if len(path) >= MIN_PROMPT_PATH][:MAX_PROMPT_PATHS]
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Hook Client (optional)
+
+Thin client for hook-daemon.py: forwards the hook's stdin payload over a Unix
+domain socket and prints the reply. If the daemon is not running, it is
+started in the background and this event is handled in-process instead. The
+same fallback applies when the daemon does not start the event within
+START_TIMEOUT (e.g. it is busy with another event): the request carries that
+deadline and the daemon drops it unrun once it has passed. An event the
+daemon has started is never run a second time here, so stateful hooks see it
+once. Hooks that can run for seconds always run in-process so they never hold
+up the serial daemon.
+
+Usage (in settings.json):
+    python3 -S "$CLAUDE_PROJECT_DIR/.claude/hooks/hook-client.py" <hook-name>
+
+Example:
+    echo '{"prompt": "design an API"}' | python3 hook-client.py skill-activation-prompt
+
+Environment:
+    CLAUDE_HOOK_SOCKET            Socket path (default: ~/.claude/hook-daemon.sock)
+    CLAUDE_HOOK_DAEMON_AUTOSTART  Set to 0 to never start the daemon automatically
+"""
+
+import os
+import sys
+import time
+
+# _socket/no json: keeps client startup close to bare interpreter startup
+import _socket
+
+HOOK_DIR = os.path.dirname(os.path.abspath(__file__))
+SOCKET_PATH = os.environ.get("CLAUDE_HOOK_SOCKET") or os.path.join(
+    os.path.expanduser("~"), ".claude", "hook-daemon.sock"
+)
+
+# The shortest hook timeouts in settings are 3s: the daemon must start an event
+# within START_TIMEOUT (else it drops it and the in-process fallback still fits),
+# and reply within REPLY_TIMEOUT once started
+START_TIMEOUT = 1.0
+REPLY_TIMEOUT = 2.0
+
+# Sent by the daemon when it starts running an event
+STARTED = b"+"
+
+# Hooks that run checkers for seconds: always in-process
+IN_PROCESS_HOOKS = {"verification-guard"}
+
+# Environment forwarded to the daemon (hooks read these per event); keep in
+# sync with hook-daemon.py
+FORWARDED_ENV_PREFIXES = ("CLAUDE_", "SKILL_ACTIVATION_", "FILE_SIZE_", "POST_TOOL_CHECKS")
+
+
+def encode_fields(*fields: bytes) -> bytes:
+    """Netstring framing: b"<len>:<data>," per field"""
+    return b"".join(b"%d:%s," % (len(f), f) for f in fields)
+
+
+def decode_fields(data: bytes) -> list[bytes]:
+    """Inverse of encode_fields(); raises ValueError on malformed input"""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        colon = data.index(b":", pos)
+        end = colon + 1 + int(data[pos:colon])
+        if data[end:end + 1] != b",":
+            raise ValueError("bad frame")
+        fields.append(data[colon + 1:end])
+        pos = end + 1
+    return fields
+
+
+def connect():
+    """Connect to the daemon, or None if it is not running"""
+    try:
+        sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+        sock.settimeout(START_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+        return sock
+    except OSError:
+        return None
+
+
+def exchange(sock, request: bytes, deadline: float) -> tuple[bool, tuple[int, bytes, bytes] | None]:
+    """
+    Send one request; returns (started, reply).
+
+    started is False if the daemon did not take the event by deadline (it
+    drops it then); reply is (exit_code, stdout, stderr), or None on failure.
+    """
+    started = False
+    try:
+        sock.sendall(request)
+        sock.shutdown(_socket.SHUT_WR)
+        # A little slack: the daemon checks the deadline before acknowledging
+        sock.settimeout(max(deadline - time.time(), 0.0) + 0.2)
+        if sock.recv(1) != STARTED:
+            return False, None
+        started = True
+        sock.settimeout(REPLY_TIMEOUT)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        exit_code, stdout, stderr = decode_fields(b"".join(chunks))
+        return True, (int(exit_code), stdout, stderr)
+    except (OSError, ValueError):
+        return started, None
+    finally:
+        sock.close()
+
+
+def start_daemon():
+    """Start hook-daemon.py in the background (it exits on its own when idle)"""
+    if os.environ.get("CLAUDE_HOOK_DAEMON_AUTOSTART", "1") == "0":
+        return
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.join(HOOK_DIR, "hook-daemon.py"), "--detach"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def runs_in_process(hook: str) -> bool:
+    """True for hook events too slow to be served by the daemon"""
+    if hook in IN_PROCESS_HOOKS:
+        return True
+    # Run mode waits for lint/type checkers (up to POST_TOOL_CHECKS_BUDGET)
+    return hook == "post-tool-use-tracker" and os.environ.get("POST_TOOL_CHECKS") == "run"
+
+
+def run_in_process(hook_path: str, payload: str | None = None):
+    """Run the hook in this interpreter (fallback when the daemon is unavailable)"""
+    import runpy
+
+    if payload is not None:
+        import io
+
+        sys.stdin = io.StringIO(payload)
+    sys.argv = [hook_path]
+    runpy.run_path(hook_path, run_name="__main__")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: hook-client.py <hook-name>", file=sys.stderr)
+        sys.exit(1)
+
+    hook = sys.argv[1]
+    hook_path = os.path.join(HOOK_DIR, f"{hook}.py")
+    if os.sep in hook or not os.path.isfile(hook_path):
+        print(f"[hook-client] Unknown hook: {hook}", file=sys.stderr)
+        sys.exit(1)
+
+    if runs_in_process(hook):
+        run_in_process(hook_path)
+        return
+
+    sock = connect()
+    if sock is None:
+        start_daemon()
+        run_in_process(hook_path)  # stdin untouched, hook reads it directly
+        return
+
+    payload = sys.stdin.buffer.read()
+    env = b"\0".join(
+        os.fsencode(f"{k}={v}") for k, v in os.environ.items() if k.startswith(FORWARDED_ENV_PREFIXES)
+    )
+    deadline = time.time() + START_TIMEOUT
+    request = encode_fields(os.fsencode(hook), os.fsencode(os.getcwd()), env, b"%.3f" % deadline, payload)
+    started, reply = exchange(sock, request, deadline)
+    if not started:
+        # Daemon down or busy past the deadline: it will not run this event
+        run_in_process(hook_path, payload.decode("utf-8", errors="replace"))
+        return
+    if reply is None:
+        # Started but failed or too slow: running it again would count the event twice
+        sys.exit(0)
+
+    exit_code, stdout, stderr = reply
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.flush()
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Hook Daemon (optional)
+
+Long-lived server that runs the Python hooks in this directory in-process, so
+interpreter startup, module imports and rule compilation are paid once
+instead of on every event. Used together with hook-client.py.
+
+Protocol (Unix domain socket, one request per connection, netstring fields):
+    client -> hook name, cwd, env ("KEY=VALUE" joined by NUL), deadline, stdin payload
+    daemon -> "+" when the event starts, then exit code, stdout, stderr
+
+A request still queued at its deadline (epoch seconds) is dropped unrun: the
+client has given up on it and runs the hook itself.
+
+Hooks are reloaded when their file changes; when a shared module they
+imported from this directory (session_state.py, prompt_window.py, ...)
+changes, all hooks and shared modules are reloaded.
+
+Usage:
+    python3 hook-daemon.py            # Run in foreground
+    python3 hook-daemon.py --detach   # Run in background (used by hook-client.py)
+    python3 hook-daemon.py --stop     # Stop a running daemon
+
+Socket: $CLAUDE_HOOK_SOCKET or ~/.claude/hook-daemon.sock
+"""
+
+import argparse
+import fcntl
+import importlib.util
+import io
+import os
+import re
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+HOOK_DIR = Path(__file__).resolve().parent
+SOCKET_PATH = Path(os.environ.get("CLAUDE_HOOK_SOCKET") or Path.home() / ".claude" / "hook-daemon.sock")
+LOCK_PATH = SOCKET_PATH.with_name(SOCKET_PATH.name + ".lock")
+
+# Exit after this many seconds without requests (0 = never)
+IDLE_TIMEOUT = int(os.environ.get("CLAUDE_HOOK_DAEMON_IDLE", "1800"))
+
+# Largest request accepted (prompts with pasted logs can be big)
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+HOOK_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+# Hooks that must not be served by the daemon (verification-guard runs checkers
+# for up to 15s and would hold up every other event)
+EXCLUDED_HOOKS = {"hook-daemon", "hook-client", "bench-hooks", "lint-skill-rules", "verification-guard"}
+
+# Settings forwarded by hook-client.py; during a run, these variables are
+# exactly the ones of the request (also unset ones, not the daemon's own)
+FORWARDED_ENV_PREFIXES = ("CLAUDE_", "SKILL_ACTIVATION_", "FILE_SIZE_", "POST_TOOL_CHECKS")
+
+
+class HookRunner:
+    """Loads hook modules once and runs their main() with redirected stdio"""
+
+    def __init__(self, hook_dir: Path):
+        self.hook_dir = hook_dir
+        self._modules: dict[str, tuple[int, ModuleType]] = {}
+        # Shared modules imported from hook_dir: name -> (path, mtime_ns at import)
+        self._shared: dict[str, tuple[str, int]] = {}
+
+    def _shared_modules(self) -> dict[str, tuple[str, int]]:
+        """Modules in sys.modules loaded from hook_dir, with their file mtimes"""
+        shared = {}
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if name == "__main__" or not path or Path(path).resolve().parent != self.hook_dir:
+                continue
+            try:
+                shared[name] = (path, os.stat(path).st_mtime_ns)
+            except OSError:
+                shared[name] = (path, -1)
+        return shared
+
+    def _drop_stale_shared(self):
+        """Forget all hooks and shared modules if one of the shared modules changed"""
+        for path, mtime in self._shared.values():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = -1
+            if current != mtime:
+                break
+        else:
+            return
+        # Hooks hold references to the old module objects: reload everything
+        for name in self._shared:
+            sys.modules.pop(name, None)
+        self._shared = {}
+        self._modules.clear()
+
+    def _load(self, hook: str) -> ModuleType | None:
+        if not HOOK_NAME_PATTERN.match(hook) or hook in EXCLUDED_HOOKS:
+            return None
+        path = self.hook_dir / f"{hook}.py"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+        self._drop_stale_shared()
+
+        cached = self._modules.get(hook)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        # (Re)load when the hook file changed on disk
+        spec = importlib.util.spec_from_file_location(f"hook_{hook.replace('-', '_')}", path)
+        if spec is None or spec.loader is None:
+            return None
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self._shared = self._shared_modules()
+        if not callable(getattr(module, "main", None)):
+            return None
+        self._modules[hook] = (mtime, module)
+        return module
+
+    def run(self, hook: str, stdin: str, cwd: str | None, env: dict[str, str]) -> dict:
+        """Run one hook event; never raises"""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        saved_stdio = sys.stdin, sys.stdout, sys.stderr
+        saved_cwd = os.getcwd()
+        unset = [k for k in os.environ if k.startswith(FORWARDED_ENV_PREFIXES) and k not in env]
+        saved_env = {k: os.environ.get(k) for k in [*env, *unset]}
+        exit_code = 0
+
+        try:
+            for key in unset:
+                del os.environ[key]
+            os.environ.update(env)
+            if cwd:
+                os.chdir(cwd)
+            sys.stdin, sys.stdout, sys.stderr = io.StringIO(stdin), stdout, stderr
+
+            module = self._load(hook)
+            if module is None:
+                print(f"[hook-daemon] Unknown hook: {hook}", file=stderr)
+                exit_code = 1
+            else:
+                module.main()
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=stderr)
+                exit_code = 1
+        except Exception as e:
+            print(f"[hook-daemon] {hook} failed: {type(e).__name__}: {e}", file=stderr)
+            exit_code = 1
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved_stdio
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            try:
+                os.chdir(saved_cwd)
+            except OSError:
+                pass
+
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+
+def encode_fields(*fields: bytes) -> bytes:
+    """Netstring framing: b"<len>:<data>," per field (same as hook-client.py)"""
+    return b"".join(b"%d:%s," % (len(f), f) for f in fields)
+
+
+def decode_fields(data: bytes) -> list[bytes]:
+    """Inverse of encode_fields(); raises ValueError on malformed input"""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        colon = data.index(b":", pos)
+        end = colon + 1 + int(data[pos:colon])
+        if data[end:end + 1] != b",":
+            raise ValueError("bad frame")
+        fields.append(data[colon + 1:end])
+        pos = end + 1
+    return fields
+
+
+def read_request(conn: socket.socket) -> tuple[str, str, dict[str, str], float, str] | None:
+    """Read one request (client half-closes the socket when done)"""
+    chunks = []
+    size = 0
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > MAX_REQUEST_SIZE:
+            return None
+    try:
+        hook, cwd, env, deadline, stdin = decode_fields(b"".join(chunks))
+        deadline = float(deadline)
+    except ValueError:
+        return None
+
+    env_vars = {}
+    for item in env.split(b"\0") if env else []:
+        key, _, value = os.fsdecode(item).partition("=")
+        env_vars[key] = value
+    return os.fsdecode(hook), os.fsdecode(cwd), env_vars, deadline, stdin.decode("utf-8", errors="replace")
+
+
+def serve(runner: HookRunner):
+    """Accept loop; requests are handled one at a time (hooks share process stdio/cwd)"""
+    SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        SOCKET_PATH.unlink()
+    except FileNotFoundError:
+        pass
+
+    old_umask = os.umask(0o077)  # Socket only accessible by the current user
+    try:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(SOCKET_PATH))
+    finally:
+        os.umask(old_umask)
+    server.listen(64)
+    if IDLE_TIMEOUT > 0:
+        server.settimeout(IDLE_TIMEOUT)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break  # Idle: let the next client start a fresh daemon
+            with conn:
+                conn.settimeout(30)
+                try:
+                    request = read_request(conn)
+                    if request is None:
+                        reply = {"stdout": "", "stderr": "[hook-daemon] Invalid request\n", "exit_code": 1}
+                        conn.sendall(b"+")
+                    else:
+                        hook, cwd, env, deadline, stdin = request
+                        if time.time() >= deadline:
+                            continue  # The client gave up and runs the event itself
+                        conn.sendall(b"+")
+                        reply = runner.run(hook, stdin, cwd, env)
+                    conn.sendall(encode_fields(
+                        str(reply["exit_code"]).encode(),
+                        reply["stdout"].encode("utf-8", errors="replace"),
+                        reply["stderr"].encode("utf-8", errors="replace"),
+                    ))
+                    # Hook telemetry is written after the reply, off the hook's latency path
+                    telemetry = sys.modules.get("hook_telemetry")
+                    if telemetry is not None:
+                        telemetry.flush()
+                except OSError:
+                    pass  # Client went away (e.g. hook timeout)
+    finally:
+        server.close()
+        try:
+            SOCKET_PATH.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def acquire_lock():
+    """Hold an exclusive lock for the daemon's lifetime (one daemon per socket)"""
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(LOCK_PATH, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def stop_daemon() -> bool:
+    """Send SIGTERM to the running daemon"""
+    try:
+        pid = int(LOCK_PATH.read_text().strip())
+        os.kill(pid, signal.SIGTERM)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def detach():
+    """Double-fork into the background"""
+    if os.fork() > 0:
+        os._exit(0)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Claude Code hooks in a persistent process")
+    parser.add_argument("--detach", action="store_true", help="Run in the background")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    args = parser.parse_args()
+
+    if args.stop:
+        sys.exit(0 if stop_daemon() else 1)
+
+    if args.detach:
+        detach()
+
+    lock = acquire_lock()
+    if lock is None:
+        print("[hook-daemon] Already running", file=sys.stderr)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        serve(HookRunner(HOOK_DIR))
+    finally:
+        lock.close()
+
+
+if __name__ == "__main__":
+    main()
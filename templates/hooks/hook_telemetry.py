@@ -0,0 +1,327 @@
+"""
+Structured timing telemetry for hooks (opt-in: CLAUDE_HOOK_TELEMETRY=1).
+
+When enabled, every instrumented hook run appends one JSON line:
+
+    {"ts": 1714557600.123, "hook": "skill-activation-prompt", "pid": 4242,
+     "total_ms": 3.41, "exit": 0, "phases": {"stdin": 0.05, "parse": 0.02,
+     "rules": 1.9, "match": 0.8, "state": 0.3, "output": 0.04},
+     "errors": 0}
+
+Phases are exclusive: mark() switches the current phase, `with phase(...)`
+switches for a block and then back, so the phase times of a run add up to at
+most its total. Exceptions a hook swallows are counted with record_error()
+(type, message, phase and source line of the first few are kept).
+
+Records are buffered in memory and written with one append per run (in the
+daemon: after the reply was sent, see flush()). The log rotates to
+telemetry.jsonl.1 once it would exceed CLAUDE_HOOK_TELEMETRY_MAX_SIZE.
+
+When disabled (the default), importing this module costs one environment
+lookup: instrument() returns main() unchanged, the other functions return
+immediately, and nothing else is imported or registered.
+
+Settings:
+- CLAUDE_HOOK_TELEMETRY=1: enable (read at import: restart the daemon after changing it)
+- CLAUDE_HOOK_TELEMETRY_FILE: log path (default ~/.claude/hook-state/telemetry.jsonl)
+- CLAUDE_HOOK_PROFILE=1 (all hooks) or a comma-separated list of hook names:
+  dump a cProfile of every run to ~/.claude/hook-state/profiles/ (read with
+  `python3 -m pstats <file>`); needs CLAUDE_HOOK_TELEMETRY=1
+
+Summary per hook: python3 hook_telemetry.py --summary
+
+Used by: skill-activation-prompt.py, debug-mode-detector.py, investigation-guard.py,
+post-tool-use-tracker.py, file-size-guard.py, verification-guard.py, hook-daemon.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+ENABLED = os.environ.get("CLAUDE_HOOK_TELEMETRY") == "1"
+
+if ENABLED:
+    import atexit
+    import functools
+    import json
+    import time
+    import traceback
+
+    # Rotate the log once it would grow past this many bytes (one backup is kept)
+    MAX_LOG_SIZE = int(os.environ.get("CLAUDE_HOOK_TELEMETRY_MAX_SIZE", str(1024 * 1024)))
+
+# Buffered records are written once this many are pending or the oldest is this old
+FLUSH_RECORDS = 20
+FLUSH_INTERVAL = 5.0
+
+# Errors kept in detail per run (all are counted)
+MAX_ERRORS = 5
+MAX_ERROR_MESSAGE = 200
+
+_pending: list[str] = []
+_pending_since = 0.0
+_current: "_Run | None" = None
+
+
+class _Run:
+    """Timings and errors of one hook run"""
+
+    def __init__(self, hook: str):
+        self.hook = hook
+        self.start = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.phase_name: str | None = None
+        self.phase_start = self.start
+        self.errors = 0
+        self.error_details: list[dict] = []
+        self.fields: dict = {}
+
+    def switch(self, name: str | None) -> str | None:
+        """Close the current phase and start `name`; returns the previous phase"""
+        now = time.perf_counter()
+        previous = self.phase_name
+        if previous is not None:
+            self.phases[previous] = self.phases.get(previous, 0.0) + now - self.phase_start
+        self.phase_name, self.phase_start = name, now
+        return previous
+
+    def record(self, exit_code: int) -> dict:
+        self.switch(None)
+        record = {
+            "ts": round(time.time(), 3),
+            "hook": self.hook,
+            "pid": os.getpid(),
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "exit": exit_code,
+            "phases": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "errors": self.errors,
+        }
+        if self.error_details:
+            record["error_details"] = self.error_details
+        record.update(self.fields)
+        return record
+
+
+class phase:
+    """Attribute a block to a phase, then return to the enclosing one"""
+
+    __slots__ = ("name", "previous")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.previous = None
+
+    def __enter__(self):
+        if _current is not None:
+            self.previous = _current.switch(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        if _current is not None:
+            _current.switch(self.previous)
+        return False
+
+
+def mark(name: str):
+    """Start the next phase of a hook run (ends the current one)"""
+    if _current is not None:
+        _current.switch(name)
+
+
+def annotate(**fields):
+    """Add fields to the record of the current run (e.g. skipped="empty stdin")"""
+    if _current is not None:
+        _current.fields.update(fields)
+
+
+def record_error(error: BaseException):
+    """Count an exception the hook handles (or swallows) in the current run"""
+    if _current is None:
+        return
+    _current.errors += 1
+    if len(_current.error_details) < MAX_ERRORS:
+        detail = {
+            "type": type(error).__name__,
+            "message": str(error)[:MAX_ERROR_MESSAGE],
+            "phase": _current.phase_name,
+        }
+        # Deepest frame in hook code (not in the stdlib function that raised)
+        frames = traceback.extract_tb(error.__traceback__)
+        hook_dir = Path(__file__).resolve().parent
+        own = [frame for frame in frames if Path(frame.filename).parent == hook_dir] or frames
+        if own:
+            detail["at"] = f"{Path(own[-1].filename).name}:{own[-1].lineno}"
+        _current.error_details.append(detail)
+
+
+def _state_dir() -> Path:
+    return Path.home() / ".claude" / "hook-state"
+
+
+def log_file() -> Path:
+    """Path of the telemetry log"""
+    return Path(os.environ.get("CLAUDE_HOOK_TELEMETRY_FILE") or _state_dir() / "telemetry.jsonl")
+
+
+def _profile_enabled(hook: str) -> bool:
+    setting = os.environ.get("CLAUDE_HOOK_PROFILE", "")
+    return setting in ("1", "all") or hook in setting.split(",")
+
+
+def _dump_profile(profiler, hook: str):
+    profile_dir = _state_dir() / "profiles"
+    try:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        profiler.dump_stats(str(profile_dir / f"{hook}-{stamp}-{os.getpid()}.prof"))
+    except OSError:
+        pass
+
+
+def instrument(hook: str):
+    """
+    Decorator for a hook's main(): time the run, record its exit code and
+    errors, and buffer the record (an exception escaping main() is recorded
+    and re-raised).
+    """
+    def decorator(main):
+        if not ENABLED:
+            return main
+
+        @functools.wraps(main)
+        def wrapper(*args, **kwargs):
+            global _current
+            outer = _current
+            run = _current = _Run(hook)
+            profiler = None
+            if _profile_enabled(hook):
+                import cProfile
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:  # Another profiler is active
+                    profiler = None
+
+            exit_code = 0
+            try:
+                return main(*args, **kwargs)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                raise
+            except BaseException as e:
+                record_error(e)
+                exit_code = 1
+                raise
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    _dump_profile(profiler, hook)
+                _current = outer
+                _buffer(run.record(exit_code))
+
+        return wrapper
+    return decorator
+
+
+def _buffer(record: dict):
+    global _pending_since
+    if not _pending:
+        _pending_since = time.monotonic()
+    _pending.append(json.dumps(record, separators=(",", ":")) + "\n")
+    if len(_pending) >= FLUSH_RECORDS or time.monotonic() - _pending_since >= FLUSH_INTERVAL:
+        flush()
+
+
+def flush():
+    """Append buffered records to the log (rotating it first if it is full)"""
+    if not _pending:
+        return
+    data = "".join(_pending).encode("utf-8")
+    _pending.clear()
+    path = log_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            size = os.fstat(fd).st_size
+            if size and size + len(data) > MAX_LOG_SIZE:
+                os.close(fd)
+                fd = -1
+                os.replace(path, path.with_name(path.name + ".1"))
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            os.write(fd, data)
+        finally:
+            if fd >= 0:
+                os.close(fd)
+    except OSError:
+        pass  # Telemetry must never break a hook
+
+
+if ENABLED:
+    atexit.register(flush)
+
+
+def load_records(path: Path | None = None) -> list[dict]:
+    """Records of the rotated and the current log, oldest first"""
+    import json
+
+    path = path or log_file()
+    records = []
+    for file in (path.with_name(path.name + ".1"), path):
+        try:
+            lines = file.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Line cut by a crash
+    return records
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, len(ordered) * pct // 100)]
+
+
+def main():
+    if "--summary" not in sys.argv[1:]:
+        print("Usage: hook_telemetry.py --summary", file=sys.stderr)
+        sys.exit(1)
+    path = log_file()
+    records = load_records(path)
+    if not records:
+        print(f"No telemetry in {path} (enable it with CLAUDE_HOOK_TELEMETRY=1)")
+        return
+
+    by_hook: dict[str, list[dict]] = {}
+    for record in records:
+        by_hook.setdefault(record.get("hook", "?"), []).append(record)
+
+    print(f"Log: {path} ({len(records)} runs)\n")
+    print(f"{'hook':<24} {'runs':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9}  mean ms per phase")
+    ranked = sorted(by_hook.items(), key=lambda item: _percentile([r["total_ms"] for r in item[1]], 95),
+                    reverse=True)
+    for hook, runs in ranked:
+        totals = [r["total_ms"] for r in runs]
+        phase_totals: dict[str, float] = {}
+        for r in runs:
+            for name, ms in r.get("phases", {}).items():
+                phase_totals[name] = phase_totals.get(name, 0.0) + ms
+        phases = " ".join(f"{name}={ms / len(runs):.2f}" for name, ms in
+                          sorted(phase_totals.items(), key=lambda item: item[1], reverse=True))
+        errors = sum(r.get("errors", 0) for r in runs)
+        print(f"{hook:<24} {len(runs):>6} {errors:>7} {_percentile(totals, 50):>9.2f} "
+              f"{_percentile(totals, 95):>9.2f}  {phases}")
+
+    recent = [(r["hook"], detail) for r in records for detail in r.get("error_details", [])][-5:]
+    if recent:
+        print("\nRecent errors:")
+        for hook, detail in recent:
+            where = f" at {detail['at']}" if "at" in detail else ""
+            print(f"  {hook} [{detail.get('phase') or '-'}] {detail['type']}: {detail['message']}{where}")
+
+
+if __name__ == "__main__":
+    main()
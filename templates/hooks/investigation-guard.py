@@ -12,35 +12,111 @@ Input: JSON HookInput (stdin)
 Output: Warning/block message (stderr for warnings, exit code 2 for blocking)
 """
 import json
+import sqlite3
 import sys
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_telemetry import instrument, mark, record_error
+from session_state import shard_path
+
+# State shard kind: record investigated files and uninvestigated edit attempts
+# per session (~/.claude/hook-state/investigation/<session>.db, see session_state.py)
+# SQLite in WAL mode: O(1) indexed updates, safe for parallel hook processes
+STATE_KIND = "investigation"
+
+# Records older than this are ignored and eventually compacted away
+STATE_TTL = timedelta(hours=1).total_seconds()
+
+# Minimum seconds between sweeps that delete expired records
+COMPACT_INTERVAL = 600
+
+# Seconds to wait for a concurrent writer before giving up
+LOCK_TIMEOUT = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS investigated (
+    path TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edit_attempts (
+    path TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
 
-# State file: record investigated files
-STATE_FILE = Path.home() / ".claude" / "investigation-state.json"
 
+def open_state(state_db: Path) -> sqlite3.Connection:
+    """Open (and create if needed) a session's investigation state database"""
+    state_db.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(state_db, timeout=LOCK_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_investigation(conn: sqlite3.Connection, path: str, tool: str, now: float):
+    """Mark a file as investigated (Read/Grep)"""
+    conn.execute(
+        "INSERT OR REPLACE INTO investigated (path, tool, ts) VALUES (?, ?, ?)",
+        (path, tool, now),
+    )
 
-def load_state() -> dict:
-    """Load investigation state"""
-    if STATE_FILE.exists():
-        try:
-            data = json.loads(STATE_FILE.read_text())
-            # Clean records older than 1 hour
-            cutoff = (datetime.now() - timedelta(hours=1)).isoformat()
-            data["investigated"] = {
-                k: v for k, v in data.get("investigated", {}).items()
-                if v.get("timestamp", "") > cutoff
-            }
-            return data
-        except Exception:
-            pass
-    return {"investigated": {}, "edit_attempts": {}}
 
+def is_investigated(conn: sqlite3.Connection, path: str, now: float) -> bool:
+    """Check if a file was investigated within STATE_TTL"""
+    row = conn.execute(
+        "SELECT 1 FROM investigated WHERE path = ? AND ts > ?",
+        (path, now - STATE_TTL),
+    ).fetchone()
+    return row is not None
 
-def save_state(state: dict):
-    """Save investigation state"""
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+
+def record_edit_attempt(conn: sqlite3.Connection, path: str, now: float) -> int:
+    """Count an uninvestigated edit attempt; returns attempts within STATE_TTL"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            """
+            INSERT INTO edit_attempts (path, count, ts) VALUES (?, 1, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                count = CASE WHEN ts > ? THEN count + 1 ELSE 1 END,
+                ts = excluded.ts
+            """,
+            (path, now, now - STATE_TTL),
+        )
+        count = conn.execute("SELECT count FROM edit_attempts WHERE path = ?", (path,)).fetchone()[0]
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return count
+
+
+def compact_state(conn: sqlite3.Connection, now: float):
+    """Delete expired records, at most once per COMPACT_INTERVAL"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'last_compact'").fetchone()
+    if row and now - row[0] < COMPACT_INTERVAL:
+        return
+    cutoff = now - STATE_TTL
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM investigated WHERE ts <= ?", (cutoff,))
+        conn.execute("DELETE FROM edit_attempts WHERE ts <= ?", (cutoff,))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_compact', ?)", (now,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
 
 
 def normalize_path(file_path: str) -> str:
@@ -48,64 +124,71 @@ def normalize_path(file_path: str) -> str:
     return str(Path(file_path).resolve())
 
 
+@instrument("investigation-guard")
 def main():
     try:
-        data = json.load(sys.stdin)
+        mark("stdin")
+        input_str = sys.stdin.read()
+        mark("parse")
+        data = json.loads(input_str)
         tool_name = data.get("tool_name", "")
         tool_input = data.get("tool_input", {})
 
-        state = load_state()
-        now = datetime.now().isoformat()
-
-        # Record Read/Grep operations
-        if tool_name in ("Read", "Grep"):
-            file_path = tool_input.get("file_path") or tool_input.get("path", "")
-            if file_path:
-                norm_path = normalize_path(file_path)
-                state["investigated"][norm_path] = {
-                    "tool": tool_name,
-                    "timestamp": now
-                }
-                save_state(state)
+        if tool_name not in ("Read", "Grep", "Edit", "Write", "MultiEdit"):
             sys.exit(0)
 
-        # Check Edit/Write operations
-        if tool_name in ("Edit", "Write", "MultiEdit"):
-            file_path = tool_input.get("file_path", "")
-            if not file_path:
+        mark("state")
+        conn = open_state(shard_path(STATE_KIND, data, ".db"))
+        try:
+            now = time.time()
+            compact_state(conn, now)
+
+            # Record Read/Grep operations
+            if tool_name in ("Read", "Grep"):
+                file_path = tool_input.get("file_path") or tool_input.get("path", "")
+                if file_path:
+                    record_investigation(conn, normalize_path(file_path), tool_name, now)
                 sys.exit(0)
 
-            norm_path = normalize_path(file_path)
-
-            # Check if this file has been investigated
-            if norm_path not in state["investigated"]:
-                # Record uninvestigated edit attempt
-                attempts = state.setdefault("edit_attempts", {})
-                attempts[norm_path] = attempts.get(norm_path, 0) + 1
-                save_state(state)
-
-                # First attempt: warning
-                if attempts[norm_path] == 1:
-                    print(f"WARNING: Attempting to modify uninvestigated file {file_path}", file=sys.stderr)
-                    print("Suggest using Read tool first to understand the context.", file=sys.stderr)
-                    print("If this is a new file creation, ignore this warning.", file=sys.stderr)
-                    # Don't block, just warn
+            # Check Edit/Write operations
+            if tool_name in ("Edit", "Write", "MultiEdit"):
+                file_path = tool_input.get("file_path", "")
+                if not file_path:
                     sys.exit(0)
 
-                # Second+ attempt: block
-                if attempts[norm_path] >= 2:
-                    print(f"BLOCKED: Multiple attempts to modify uninvestigated file {file_path}", file=sys.stderr)
-                    print("", file=sys.stderr)
-                    print("Systematic Debugging requires:", file=sys.stderr)
-                    print("1. Use Read tool to view the current file content", file=sys.stderr)
-                    print("2. Use Grep to search related code and error messages", file=sys.stderr)
-                    print("3. Understand the root cause before making changes", file=sys.stderr)
-                    sys.exit(2)  # Block operation
+                norm_path = normalize_path(file_path)
 
-        sys.exit(0)
+                # Check if this file has been investigated
+                if not is_investigated(conn, norm_path, now):
+                    # Record uninvestigated edit attempt
+                    attempts = record_edit_attempt(conn, norm_path, now)
+
+                    # First attempt: warning
+                    mark("output")
+                    if attempts == 1:
+                        print(f"WARNING: Attempting to modify uninvestigated file {file_path}", file=sys.stderr)
+                        print("Suggest using Read tool first to understand the context.", file=sys.stderr)
+                        print("If this is a new file creation, ignore this warning.", file=sys.stderr)
+                        # Don't block, just warn
+                        sys.exit(0)
+
+                    # Second+ attempt: block
+                    if attempts >= 2:
+                        print(f"BLOCKED: Multiple attempts to modify uninvestigated file {file_path}", file=sys.stderr)
+                        print("", file=sys.stderr)
+                        print("Systematic Debugging requires:", file=sys.stderr)
+                        print("1. Use Read tool to view the current file content", file=sys.stderr)
+                        print("2. Use Grep to search related code and error messages", file=sys.stderr)
+                        print("3. Understand the root cause before making changes", file=sys.stderr)
+                        sys.exit(2)  # Block operation
+
+            sys.exit(0)
+        finally:
+            conn.close()
 
-    except Exception:
+    except Exception as e:
         # Silent failure, don't affect normal workflow
+        record_error(e)
         sys.exit(0)
 
 
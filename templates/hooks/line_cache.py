@@ -0,0 +1,229 @@
+"""
+Persistent line-count cache for PostToolUse hooks.
+
+Maps (path, inode, size, mtime_ns) to line count and detected file type, so
+repeated edits of the same file cost a stat instead of a full read. When a
+file only grew (same inode, unchanged bytes before the old end), just the
+appended bytes are counted. Least recently used entries are evicted beyond
+MAX_ENTRIES.
+
+    ~/.claude/hook-state/line-cache.json
+
+Hit/miss counters are kept per process (LineCache.hits/misses/deltas) and in
+the cache file; show them with:
+
+    python3 line_cache.py --stats
+
+Used by: file-size-guard.py, post-tool-use-tracker.py
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+CACHE_FILE = Path.home() / ".claude" / "hook-state" / "line-cache.json"
+CACHE_VERSION = 1
+
+# Files kept in the cache; least recently used are evicted beyond this
+MAX_ENTRIES = 512
+
+# Read size for line counting
+CHUNK_SIZE = 64 * 1024
+
+# Bytes before the old end of file compared to detect pure appends
+TAIL_BYTES = 4096
+
+# Interpreters recognized in shebangs of files without an extension
+SHEBANG_TYPES = {
+    "python": ".py",
+    "python3": ".py",
+    "bash": ".sh",
+    "sh": ".sh",
+    "zsh": ".sh",
+    "node": ".js",
+}
+
+
+class FileInfo(NamedTuple):
+    """Cached facts about one file version"""
+    lines: int        # Line count (estimate if not exact)
+    exact: bool       # False if counting stopped early or was skipped
+    lower: int        # Newlines actually counted (lower bound of lines)
+    file_type: str | None
+
+
+def count_lines(f, size: int, stop_after: int | None = None, start: int = 0) -> tuple[int, int, bool]:
+    """
+    Count newline bytes of an open binary file from offset start.
+
+    Returns (newlines, bytes_read, last_is_newline). With stop_after, reading
+    stops once more than stop_after newlines were seen.
+    """
+    f.seek(start)
+    count = 0
+    read = 0
+    last = b"\n"
+    while chunk := f.read(CHUNK_SIZE):
+        count += chunk.count(b"\n")
+        read += len(chunk)
+        last = chunk[-1:]
+        if stop_after is not None and count > stop_after and start + read < size:
+            break
+    return count, read, last == b"\n"
+
+
+def detect_file_type(file_path: str, head: bytes = b"") -> str | None:
+    """File type from extension, or from a shebang line for extensionless files"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix:
+        return suffix
+    if head.startswith(b"#!"):
+        words = head[2:].split(b"\n", 1)[0].decode("utf-8", errors="replace").split()
+        if words:
+            interpreter = os.path.basename(words[0])
+            if interpreter == "env" and len(words) > 1:
+                interpreter = words[1]
+            return SHEBANG_TYPES.get(interpreter)
+    return None
+
+
+def tail_hash(f, end: int) -> str:
+    """Hash of the TAIL_BYTES before offset end"""
+    start = max(end - TAIL_BYTES, 0)
+    f.seek(start)
+    return hashlib.sha1(f.read(end - start)).hexdigest()
+
+
+class LineCache:
+    """Line counts and file types keyed by file identity; call save() when done"""
+
+    def __init__(self, cache_file: Path = CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries: dict[str, dict] = {}
+        self.stats = {"hits": 0, "misses": 0, "deltas": 0}
+        self.hits = self.misses = self.deltas = 0
+        self._dirty = False
+        try:
+            data = json.loads(cache_file.read_text())
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["entries"]
+                self.stats.update(data["stats"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass  # Missing or corrupt cache: start empty
+
+    def _count(self, counter: str):
+        setattr(self, counter, getattr(self, counter) + 1)
+        self.stats[counter] += 1
+        self._dirty = True
+
+    def lookup(self, file_path: str, stop_after: int | None = None) -> FileInfo | None:
+        """
+        Line count and file type of a file, or None if it cannot be read.
+
+        With stop_after, an inexact result is acceptable as long as it decides
+        whether the file has more than stop_after lines.
+        """
+        key = os.path.abspath(file_path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+        identity = [st.st_ino, st.st_size, st.st_mtime_ns]
+
+        entry = self.entries.get(key)
+        if entry and entry["id"] == identity and self._usable(entry, st.st_size, stop_after):
+            self._count("hits")
+            entry["used"] = time.time()
+            return FileInfo(entry["lines"], entry["exact"], entry["lower"], entry["type"])
+
+        self._count("misses")
+        try:
+            entry = self._measure(key, st, entry, stop_after)
+        except OSError:
+            return None
+        entry["used"] = time.time()
+        self.entries[key] = entry
+        return FileInfo(entry["lines"], entry["exact"], entry["lower"], entry["type"])
+
+    @staticmethod
+    def _usable(entry: dict, size: int, stop_after: int | None) -> bool:
+        """True if a cached result answers the caller's question"""
+        if entry["exact"]:
+            return True
+        if stop_after is None:
+            return False
+        # Known to exceed the limit, or too small to reach it
+        return entry["lower"] > stop_after or size <= stop_after
+
+    def _measure(self, key: str, st: os.stat_result, old: dict | None, stop_after: int | None) -> dict:
+        """Count a file, reusing an exact old count if the file was only appended to"""
+        size = st.st_size
+        with open(key, "rb") as f:
+            head = f.read(128) if not Path(key).suffix else b""
+            file_type = detect_file_type(key, head)
+            entry = {"id": [st.st_ino, size, st.st_mtime_ns], "type": file_type}
+
+            if stop_after is not None and size <= stop_after:
+                # Every line takes at least one byte: size is an upper bound
+                entry.update(lines=size, exact=False, lower=0)
+                return entry
+
+            if (old and old["exact"] and old["id"][0] == st.st_ino
+                    and size > old["id"][1] and tail_hash(f, old["id"][1]) == old["tail"]):
+                # Pure append: count only the new bytes
+                self._count("deltas")
+                newlines, _, last_nl = count_lines(f, size, start=old["id"][1])
+                newlines += old["newlines"]
+            else:
+                newlines, read, last_nl = count_lines(f, size, stop_after)
+                if read < size:
+                    # Stopped early: extrapolate from the bytes read
+                    entry.update(lines=newlines * size // read, exact=False, lower=newlines)
+                    return entry
+
+            entry.update(
+                lines=newlines + (0 if last_nl else 1),
+                exact=True,
+                lower=newlines,
+                newlines=newlines,
+                tail=tail_hash(f, size),
+            )
+            return entry
+
+    def save(self):
+        """Write the cache back (atomic replace; last writer wins)"""
+        if not self._dirty:
+            return
+        if len(self.entries) > MAX_ENTRIES:
+            recent = sorted(self.entries.items(), key=lambda item: item[1]["used"], reverse=True)
+            self.entries = dict(recent[:MAX_ENTRIES])
+        data = {"version": CACHE_VERSION, "stats": self.stats, "entries": self.entries}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except OSError:
+            pass  # Cache is an optimization only
+
+
+def main():
+    if "--stats" not in sys.argv[1:]:
+        print("Usage: line_cache.py --stats", file=sys.stderr)
+        sys.exit(1)
+    cache = LineCache()
+    total = cache.stats["hits"] + cache.stats["misses"]
+    ratio = cache.stats["hits"] / total if total else 0.0
+    print(f"Cache:   {cache.cache_file}")
+    print(f"Entries: {len(cache.entries)} (max {MAX_ENTRIES})")
+    print(f"Hits:    {cache.stats['hits']} ({ratio:.0%})")
+    print(f"Misses:  {cache.stats['misses']} ({cache.stats['deltas']} counted as appends)")
+
+
+if __name__ == "__main__":
+    main()
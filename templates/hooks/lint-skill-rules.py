@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Skill Rules Linter (offline)
+
+Checks skill-rules.json before its rules reach the UserPromptSubmit hot path:
+
+- Static regex analysis of every intentPattern: invalid patterns, nested
+  quantifiers ((a+)+), alternations under an unbounded quantifier ((a|ab)*),
+  many unbounded wildcards in one pattern, patterns without a literal
+  (they run on every prompt instead of only when the literal was seen)
+- Benchmark: every pattern is run the way skill-activation-prompt.py runs it
+  (leading/trailing .* stripped, IGNORECASE, on the bounded prompt window)
+  against representative and adversarial prompts, in a worker subprocess
+  that is killed when a pattern exceeds --timeout
+- Keywords: duplicates within a skill, keywords made redundant by a shorter
+  keyword of the same skill, keywords shared by many skills
+
+Exit codes:
+- 0: No pattern over budget
+- 1: A pattern is invalid, exceeded --budget-ms on some prompt, or timed out
+     (with --strict, static warnings fail too)
+
+Usage:
+    python3 lint-skill-rules.py                          # .claude/skills/skill-rules.json
+    python3 lint-skill-rules.py path/to/skill-rules.json --corpus prompts.txt
+    python3 lint-skill-rules.py --format json > report.json
+"""
+
+import argparse
+import importlib.util
+import json
+import re
+import select
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+HOOK_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(HOOK_DIR))
+from prompt_window import build_window
+
+# Worst time one pattern may take on one prompt (the hook's CPU budget is shared by all patterns)
+BUDGET_MS = 10.0
+
+# Seconds before a pattern's benchmark is killed (catastrophic backtracking)
+TIMEOUT = 2.0
+
+# Timing runs per (pattern, prompt); the fastest is kept
+REPEAT = 3
+
+# Unbounded wildcards in one pattern before it is reported
+MAX_WILDCARDS = 3
+
+# Keywords used by more skills than this are reported
+SHARED_KEYWORD_SKILLS = 3
+
+REPRESENTATIVE_PROMPTS = [
+    "help me design an API for user authentication",
+    "Create a new React component for the settings page and style it",
+    "The tests are failing after my last change, can you fix them?",
+    "refactor the database query layer to use the repository pattern",
+    "Write a deployment script for the staging environment",
+    "帮我看看这个接口为什么报错，返回 500",
+    "Why does this function return None when the list is empty?",
+    "Add pagination to the /api/orders endpoint and update the docs",
+    "Review src/components/Button.tsx for accessibility issues",
+    "Traceback (most recent call last):\n  File \"app.py\", line 42, in <module>\n"
+    "    main()\nValueError: invalid literal for int() with base 10: 'abc'",
+]
+
+
+def load_activation_hook():
+    """skill-activation-prompt.py as a module (same compilation as the hook)"""
+    path = HOOK_DIR / "skill-activation-prompt.py"
+    spec = importlib.util.spec_from_file_location("hook_skill_activation_prompt", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def adversarial_prompts(literal: str) -> list[tuple[str, str]]:
+    """Prompts built to make backtracking expensive (near-misses around the pattern's literal)"""
+    word = literal or "a"
+    return [
+        ("repeated-char", "a" * 20000),
+        ("spaces", "x" + " " * 20000 + "x"),
+        ("literal-repeated", (word + " ") * 1500),
+        ("literal-unterminated", word + "a" * 8000),
+        ("long-lines", "\n".join(("word " * 100) for _ in range(200))),
+        ("log-paste", "ERROR at line 12: " + "Error: failed to connect\n" * 2000),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Static analysis
+# ---------------------------------------------------------------------------
+
+REPEAT_OPS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    REPEAT_OPS.add(sre_constants.POSSESSIVE_REPEAT)
+WILDCARD_OPS = {sre_constants.ANY, sre_constants.IN, sre_constants.CATEGORY, sre_constants.NOT_LITERAL}
+
+
+def _children(op, av) -> list:
+    """Sub-patterns of a parsed regex node"""
+    if op in REPEAT_OPS:
+        return [av[2]]
+    if op is sre_constants.SUBPATTERN:
+        return [av[-1]]
+    if op is sre_constants.BRANCH:
+        return list(av[1])
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [av[1]]
+    return []
+
+
+def static_findings(pattern: str) -> list[str]:
+    """Backtracking-prone constructs in a pattern"""
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError) as e:
+        return [f"invalid regex: {e}"]
+
+    findings = []
+    wildcards = 0
+
+    def walk(nodes, unbounded_outer: bool):
+        nonlocal wildcards
+        for op, av in nodes:
+            if op in REPEAT_OPS:
+                low, high, body = av
+                unbounded = high == sre_constants.MAXREPEAT
+                if unbounded_outer and high > low:
+                    findings.append("nested quantifier (exponential backtracking)")
+                if unbounded and any(o is sre_constants.BRANCH for o, _ in _flatten(body)):
+                    findings.append("alternation under an unbounded quantifier")
+                if unbounded and len(body) == 1 and body[0][0] in WILDCARD_OPS:
+                    wildcards += 1
+                walk(body, unbounded_outer or unbounded)
+            else:
+                for child in _children(op, av):
+                    walk(child, unbounded_outer)
+
+    walk(parsed, False)
+    if wildcards >= MAX_WILDCARDS:
+        findings.append(f"{wildcards} unbounded wildcards (polynomial backtracking)")
+    return list(dict.fromkeys(findings))
+
+
+def _flatten(nodes) -> list:
+    """All nodes of a parsed sub-pattern, depth first"""
+    flat = []
+    for op, av in nodes:
+        flat.append((op, av))
+        for child in _children(op, av):
+            flat.extend(_flatten(child))
+    return flat
+
+
+def keyword_findings(rules: dict) -> list[str]:
+    """Duplicate, redundant and widely shared keywords"""
+    findings = []
+    skills_by_keyword: dict[str, list[str]] = defaultdict(list)
+    for skill_name, rule in rules.get("skills", {}).items():
+        keywords = [k.lower() for k in rule.get("triggers", {}).get("promptTriggers", {}).get("keywords", [])]
+        seen = set()
+        for keyword in keywords:
+            if keyword in seen:
+                findings.append(f"{skill_name}: duplicate keyword '{keyword}'")
+            seen.add(keyword)
+        for keyword in sorted(seen):
+            skills_by_keyword[keyword].append(skill_name)
+            if keyword == "":
+                findings.append(f"{skill_name}: empty keyword matches every prompt")
+                continue
+            # Keywords match as substrings: "api" already fires whenever "api design" does
+            shorter = [other for other in seen if other and other != keyword and other in keyword]
+            if shorter:
+                findings.append(f"{skill_name}: keyword '{keyword}' is redundant (contains '{min(shorter, key=len)}')")
+
+    shared = sorted(
+        ((keyword, names) for keyword, names in skills_by_keyword.items() if len(names) > SHARED_KEYWORD_SKILLS),
+        key=lambda item: len(item[1]), reverse=True,
+    )
+    for keyword, names in shared:
+        findings.append(f"keyword '{keyword}' shared by {len(names)} skills (little ranking value)")
+    return findings
+
+
+# ---------------------------------------------------------------------------
+# Benchmark (patterns run in a killable worker subprocess)
+# ---------------------------------------------------------------------------
+
+def bench_worker():
+    """
+    Time each pattern on each prompt; one JSON line per pattern on stdout.
+
+    Like the hook, a pattern's regex only runs once its required literals
+    were found in order in the case-folded window (single-line patterns only
+    on the lines containing them).
+    """
+    job = json.loads(sys.stdin.read())
+    hook = load_activation_hook()
+    windows = [(name, build_window(text)) for name, text in job["corpus"]]
+    for idx, pattern, literals, adversarial in job["patterns"]:
+        regex = re.compile(pattern, re.IGNORECASE)
+        single_line = hook._single_line(pattern)
+        worst, worst_prompt, total = 0.0, "", 0.0
+        for name, window in windows + [(name, build_window(text)) for name, text in adversarial]:
+            best = float("inf")
+            for _ in range(job["repeat"]):
+                start = time.perf_counter()
+                # (the hook's automaton has already found a lone literal)
+                if hook._contains_in_order(window.folded, literals):
+                    hook._intent_matches(regex, literals, single_line, window)
+                best = min(best, time.perf_counter() - start)
+            total += best
+            if best > worst:
+                worst, worst_prompt = best, name
+        print(json.dumps({"idx": idx, "worst": worst, "prompt": worst_prompt, "total": total}), flush=True)
+
+
+def benchmark(patterns: list[tuple[int, str, list[str]]], corpus: list[tuple[str, str]],
+              timeout: float, repeat: int) -> dict[int, dict]:
+    """
+    Benchmark (index, pattern, required literals) triples; {index: result}.
+
+    A pattern still running after `timeout` seconds is reported as timed out;
+    the worker is killed and restarted with the remaining patterns.
+    """
+    results: dict[int, dict] = {}
+    pending = list(patterns)
+    while pending:
+        job = {
+            "corpus": corpus,
+            "repeat": repeat,
+            "patterns": [[idx, pattern, literals, adversarial_prompts(max(literals, key=len, default=""))]
+                         for idx, pattern, literals in pending],
+        }
+        proc = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--bench-worker"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        proc.stdin.write(json.dumps(job))
+        proc.stdin.close()
+
+        while pending:
+            ready, _, _ = select.select([proc.stdout], [], [], timeout)
+            line = proc.stdout.readline() if ready else ""
+            if not line:
+                # Timed out (or the worker died) on the first pending pattern
+                idx = pending.pop(0)[0]
+                results[idx] = {"timeout": True, "worst": timeout, "prompt": "", "total": timeout}
+                proc.kill()
+                break
+            result = json.loads(line)
+            results[result.pop("idx")] = {"timeout": False, **result}
+            pending.pop(0)
+        proc.wait()
+    return results
+
+
+def load_corpus(path: str | None) -> list[tuple[str, str]]:
+    """Representative prompts plus a user corpus (JSONL hook payloads or one prompt per line)"""
+    corpus = [(f"sample-{i + 1}", text) for i, text in enumerate(REPRESENTATIVE_PROMPTS)]
+    if not path:
+        return corpus
+    for i, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines()):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            text = record.get("prompt", "") if isinstance(record, dict) else str(record)
+        except ValueError:
+            text = line.replace("\\n", "\n")
+        corpus.append((f"corpus-{i + 1}", text))
+    return corpus
+
+
+def main():
+    if "--bench-worker" in sys.argv[1:]:
+        bench_worker()
+        return
+
+    parser = argparse.ArgumentParser(description="Lint skill-rules.json and benchmark its intent patterns")
+    parser.add_argument("rules", nargs="?", help="Path to skill-rules.json (default: as found by the hook)")
+    parser.add_argument("--corpus", help="Extra prompts: JSONL hook payloads or one prompt per line")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help=f"Fail if a pattern takes longer on any prompt (default: {BUDGET_MS})")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help=f"Seconds before a pattern's benchmark is killed (default: {TIMEOUT})")
+    parser.add_argument("--top", type=int, default=10, help="Slowest patterns to report (default: 10)")
+    parser.add_argument("--strict", action="store_true", help="Static warnings fail the check too")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    args = parser.parse_args()
+
+    hook = load_activation_hook()
+    rules_path = Path(args.rules) if args.rules else hook.find_skill_rules()
+    if not rules_path:
+        print("Error: skill-rules.json not found", file=sys.stderr)
+        sys.exit(1)
+    try:
+        rules = json.loads(rules_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"Error: cannot read {rules_path}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Intent patterns as the hook runs them
+    patterns = []  # (skill, original pattern, search pattern, literal)
+    pattern_skills: dict[str, list[str]] = defaultdict(list)
+    for skill_name, rule in rules.get("skills", {}).items():
+        for pattern in rule.get("triggers", {}).get("promptTriggers", {}).get("intentPatterns", []):
+            core = hook._search_core(pattern)
+            patterns.append((skill_name, pattern, core, hook._required_literal(core)))
+            pattern_skills[pattern].append(skill_name)
+
+    static = {}
+    for i, (skill_name, pattern, core, literal) in enumerate(patterns):
+        findings = static_findings(core)
+        if not literal and not findings:
+            findings.append("no required literal: runs on every prompt")
+        static[i] = findings
+    keywords = keyword_findings(rules)
+    keywords += [
+        f"intent pattern '{pattern}' repeated in: {', '.join(names)}"
+        for pattern, names in pattern_skills.items() if len(names) > 1
+    ]
+
+    valid = [(i, core, hook._required_literals(core)) for i, (_, _, core, _) in enumerate(patterns)
+             if not static[i] or not static[i][0].startswith("invalid")]
+    results = benchmark(valid, load_corpus(args.corpus), args.timeout, REPEAT)
+
+    budget = args.budget_ms / 1000
+    report = []
+    for i, (skill_name, pattern, core, literal) in enumerate(patterns):
+        result = results.get(i)
+        invalid = i not in results
+        over = result is not None and (result["timeout"] or result["worst"] > budget)
+        report.append({
+            "skill": skill_name,
+            "pattern": pattern,
+            "literal": literal,
+            "findings": static[i],
+            "worst_ms": round(result["worst"] * 1000, 3) if result else None,
+            "worst_prompt": result["prompt"] if result else None,
+            "total_ms": round(result["total"] * 1000, 3) if result else None,
+            "timeout": bool(result and result["timeout"]),
+            "failed": invalid or over or (args.strict and bool(static[i])),
+        })
+
+    failed = [r for r in report if r["failed"]]
+    if args.format == "json":
+        print(json.dumps({"rules": str(rules_path), "budget_ms": args.budget_ms, "patterns": report,
+                          "keywords": keywords, "failed": len(failed)}, indent=2, ensure_ascii=False))
+    else:
+        print(f"Rules: {rules_path} ({len(rules.get('skills', {}))} skills, {len(patterns)} intent patterns)")
+        timed = sorted((r for r in report if r["worst_ms"] is not None), key=lambda r: r["worst_ms"], reverse=True)
+        if timed:
+            print(f"\nSlowest patterns (worst prompt, budget {args.budget_ms:g} ms):")
+            for r in timed[:args.top]:
+                worst = "TIMEOUT" if r["timeout"] else f"{r['worst_ms']:.3f} ms"
+                print(f"  {worst:>12}  {r['skill']}: {r['pattern']}  [{r['worst_prompt'] or '-'}]")
+        findings = [(r, f) for r in report for f in r["findings"]]
+        if findings:
+            print("\nPattern warnings:")
+            for r, finding in findings:
+                print(f"  {r['skill']}: {r['pattern']}: {finding}")
+        if keywords:
+            print("\nKeyword warnings:")
+            for finding in keywords:
+                print(f"  {finding}")
+        print()
+        for r in failed:
+            reason = "timed out" if r["timeout"] else (
+                "invalid" if r["worst_ms"] is None else
+                f"{r['worst_ms']:.3f} ms > {args.budget_ms:g} ms" if r["worst_ms"] > args.budget_ms else "static warning")
+            print(f"FAIL: {r['skill']}: {r['pattern']} ({reason})")
+        print(f"{len(failed)} of {len(patterns)} patterns failed" if failed else "All patterns within budget")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,13 @@ Post Tool Use Tracker Hook
 Tracks file modifications and suggests appropriate check commands.
 Event: PostToolUse (Edit, Write, MultiEdit, NotebookEdit)
 
+Check modes (POST_TOOL_CHECKS environment variable):
+- suggest (default): list the check commands for Claude to run
+- run: run lint/type/check/validate commands concurrently and report
+  pass/fail results (format commands are only suggested, never run)
+- background: queue the same commands for a debounced background worker
+  (check_queue.py) and report results that finished since the last edit
+
 Input: JSON HookInput (stdin)
 Output: JSON format (stdout) - injected to Claude context via additionalContext
 
@@ -15,12 +22,39 @@ Inspired by: https://github.com/diet103/claude-code-infrastructure-showcase
 """
 
 import json
+import os
+import shlex
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+sys.path.insert(0, str(Path(__file__).parent))
+# check_runner/check_queue (subprocess, concurrent.futures) are imported in the
+# run and background branches only, so suggest mode does not pay for them
+if TYPE_CHECKING:
+    from check_runner import CheckResult
+from hook_telemetry import instrument, mark, record_error
+from line_cache import FileInfo, LineCache
+from session_state import record_touched_files, session_key
 
 # Project root directory (customize for your project)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 
+# Check mode: "suggest", "run" or "background" (default of POST_TOOL_CHECKS; this
+# and the other settings are read per event, so daemon runs follow each event's env)
+CHECK_MODE = "suggest"
+
+# Command categories executed in run/background mode (others, e.g. format, are suggested)
+RUN_CATEGORIES = {"lint", "type", "check", "validate"}
+
+# Line counts are only exact up to this limit (same setting as file-size-guard.py,
+# so both hooks share one cached count); larger files are shown as ">N lines"
+LINE_LIMIT = 500
+
+# Seconds all checks of one event may take together (POST_TOOL_CHECKS_BUDGET,
+# keep below the hook timeout)
+CHECK_BUDGET = 2.5
+
 # File type to check commands mapping
 # Customize this for your project's toolchain
 CHECK_COMMANDS: dict[str, dict[str, str]] = {
@@ -71,26 +105,78 @@ CHECK_COMMANDS: dict[str, dict[str, str]] = {
 }
 
 
-def detect_file_type(file_path: str) -> str | None:
-    """Detect file type from extension"""
+def detect_file_type(file_path: str, info: FileInfo | None = None) -> str | None:
+    """Detect file type from extension (or shebang, if known from the line cache)"""
+    if info is not None:
+        return info.file_type
     path = Path(file_path)
     return path.suffix.lower() if path.suffix else None
 
 
-def get_check_commands(file_path: str) -> list[str]:
-    """Get check commands for a file"""
-    commands = []
-    file_type = detect_file_type(file_path)
+def get_command_templates(
+    file_path: str,
+    info: FileInfo | None = None,
+    categories: set[str] | None = None,
+    exclude: set[str] | None = None,
+) -> list[str]:
+    """Get unformatted check commands for a file (optionally only/except some categories)"""
+    templates = []
+    file_type = detect_file_type(file_path, info)
 
     if file_type and file_type in CHECK_COMMANDS:
-        for cmd in CHECK_COMMANDS[file_type].values():
-            if cmd:
-                commands.append(cmd.format(file=file_path))
+        for category, cmd in CHECK_COMMANDS[file_type].items():
+            if not cmd:
+                continue
+            if categories is not None and category not in categories:
+                continue
+            if exclude is not None and category in exclude:
+                continue
+            templates.append(cmd)
+
+    return templates
+
+
+def get_check_commands(
+    file_path: str,
+    info: FileInfo | None = None,
+    categories: set[str] | None = None,
+    exclude: set[str] | None = None,
+) -> list[str]:
+    """Get check commands for a file"""
+    return [cmd.format(file=file_path) for cmd in get_command_templates(file_path, info, categories, exclude)]
 
-    return commands
 
+def get_run_commands(source_path: str, info: FileInfo | None) -> list[str]:
+    """Commands executed in run mode for a file (path quoted for the shell)"""
+    return get_check_commands(shlex.quote(source_path), info, categories=RUN_CATEGORIES)
 
-def format_output(modified_files: list[str], check_commands: dict[str, list[str]]) -> str:
+
+def format_results(results: list["CheckResult"]) -> list[str]:
+    """Format check results as output lines"""
+    from check_runner import FAIL, PASS, TIMEOUT
+
+    labels = {PASS: "PASS", FAIL: "FAIL", TIMEOUT: "TIMEOUT"}
+    lines = []
+    for result in results:
+        label = labels.get(result.status, "SKIP")
+        detail = f"{result.duration:.1f}s"
+        if result.status == FAIL:
+            detail = f"exit {result.exit_code}, {detail}"
+        elif result.status not in labels:
+            detail = result.output
+        lines.append(f"  [{label}] {result.command} ({detail})")
+        if result.status == FAIL and result.output:
+            lines.extend(f"      {line}" for line in result.output.splitlines())
+    return lines
+
+
+def format_output(
+    modified_files: list[str],
+    check_commands: dict[str, list[str]],
+    line_counts: dict[str, str] | None = None,
+    check_results: list["CheckResult"] | None = None,
+    queued_checks: list[str] | None = None,
+) -> str:
     """Format output"""
     if not modified_files:
         return ""
@@ -104,7 +190,25 @@ def format_output(modified_files: list[str], check_commands: dict[str, list[str]
     lines.append("")
     lines.append("Modified files:")
     for f in modified_files:
-        lines.append(f"  - {f}")
+        if line_counts and f in line_counts:
+            lines.append(f"  - {f} ({line_counts[f]} lines)")
+        else:
+            lines.append(f"  - {f}")
+
+    if check_results:
+        from check_runner import FAIL, PASS, TIMEOUT
+
+        passed = sum(1 for r in check_results if r.status == PASS)
+        failed = sum(1 for r in check_results if r.status in (FAIL, TIMEOUT))
+        lines.append("")
+        lines.append(f"Check results ({passed} passed, {failed} failed):")
+        lines.extend(format_results(check_results))
+
+    if queued_checks:
+        lines.append("")
+        lines.append("Queued background checks (results on a later edit):")
+        for cmd in queued_checks:
+            lines.append(f"  $ {cmd}")
 
     if check_commands:
         lines.append("")
@@ -122,17 +226,21 @@ def format_output(modified_files: list[str], check_commands: dict[str, list[str]
     return "\n".join(lines)
 
 
+@instrument("post-tool-use-tracker")
 def main():
     """Main function"""
     try:
+        mark("stdin")
         input_str = sys.stdin.read()
         if not input_str.strip():
             return
 
+        mark("parse")
         try:
             hook_input = json.loads(input_str)
-        except json.JSONDecodeError:
+        except json.JSONDecodeError as e:
             # Silent fail, don't affect user experience
+            record_error(e)
             return
 
         tool_name = hook_input.get("tool_name", "")
@@ -142,8 +250,9 @@ def main():
         if tool_name not in ["Edit", "Write", "MultiEdit", "NotebookEdit"]:
             return
 
-        # Extract modified file paths
+        # Extract modified file paths (relative path -> path as given by the tool)
         modified_files = []
+        source_paths: dict[str, str] = {}
 
         if tool_name in ["Edit", "Write", "NotebookEdit"]:
             file_path = tool_input.get("file_path", "")
@@ -154,6 +263,7 @@ def main():
                 except ValueError:
                     rel_path = file_path
                 modified_files.append(rel_path)
+                source_paths[rel_path] = file_path
 
         elif tool_name == "MultiEdit":
             edits = tool_input.get("edits", [])
@@ -166,19 +276,73 @@ def main():
                         rel_path = file_path
                     if rel_path not in modified_files:
                         modified_files.append(rel_path)
+                        source_paths[rel_path] = file_path
 
         if not modified_files:
             return
 
-        # Generate check commands
+        # Remembered per session for file-based skill activation (fileTriggers)
+        mark("state")
+        record_touched_files(hook_input, [os.path.abspath(source_paths[f]) for f in modified_files])
+
+        # Generate check commands (line counts and file types from the shared line cache,
+        # which reads no further than needed to compare a file against LINE_LIMIT)
+        cache = LineCache()
+        mark("match")
+        check_mode = os.environ.get("POST_TOOL_CHECKS", CHECK_MODE)
+        line_limit = int(os.environ.get("FILE_SIZE_LIMIT", LINE_LIMIT))
+        run_mode = check_mode in ("run", "background")
         check_commands: dict[str, list[str]] = {}
+        run_commands: list[str] = []
+        queued: dict[str, list[str]] = {}
+        queued_checks: list[str] = []
+        line_counts: dict[str, str] = {}
         for file_path in modified_files:
-            cmds = get_check_commands(file_path)
+            info = cache.lookup(source_paths[file_path], stop_after=line_limit)
+            if info is not None and info.exact:
+                line_counts[file_path] = str(info.lines)
+            elif info is not None and info.lower > line_limit:
+                line_counts[file_path] = f">{line_limit}"
+            if check_mode == "background":
+                templates = get_command_templates(file_path, info, categories=RUN_CATEGORIES)
+                if templates:
+                    queued[os.path.abspath(source_paths[file_path])] = templates
+                    queued_checks.extend(get_run_commands(source_paths[file_path], info))
+            elif run_mode:
+                run_commands.extend(get_run_commands(source_paths[file_path], info))
+            if run_mode:
+                cmds = get_check_commands(file_path, info, exclude=RUN_CATEGORIES)
+            else:
+                cmds = get_check_commands(file_path, info)
             if cmds:
                 check_commands[file_path] = cmds
+        mark("state")
+        cache.save()
+
+        cwd = os.environ.get("CLAUDE_PROJECT_DIR") or hook_input.get("cwd") or os.getcwd()
+        check_results = None
+        if run_commands:
+            mark("check")
+            from check_runner import run_checks
+
+            # Run mode: project-wide commands (e.g. tsc --noEmit) are deduplicated by run_checks
+            budget = float(os.environ.get("POST_TOOL_CHECKS_BUDGET", CHECK_BUDGET))
+            check_results = run_checks(run_commands, cwd, budget)
+        elif check_mode == "background":
+            # Background mode: never wait on a checker, report what finished meanwhile
+            mark("state")
+            from check_queue import collect_results, enqueue
+
+            check_results = collect_results(cwd, session_key(hook_input))
+            if queued:
+                enqueue(cwd, queued)
 
         # Output using JSON format to inject into Claude context
-        output_text = format_output(modified_files, check_commands)
+        mark("output")
+        output_text = format_output(
+            modified_files, check_commands, line_counts, check_results,
+            list(dict.fromkeys(queued_checks)),
+        )
         if output_text:
             json_output = {
                 "hookSpecificOutput": {
@@ -188,9 +352,9 @@ def main():
             }
             print(json.dumps(json_output))
 
-    except Exception:
+    except Exception as e:
         # Silent fail, don't affect normal workflow
-        pass
+        record_error(e)
 
 
 if __name__ == "__main__":
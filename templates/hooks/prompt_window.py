@@ -0,0 +1,202 @@
+"""
+Shared prompt preprocessing for UserPromptSubmit hooks.
+
+Prompts can contain pasted logs of hundreds of KB. Instead of truncating them
+(and silently missing the error at the bottom of a traceback), hooks analyze a
+bounded window: the head, the tail, and any traceback-looking lines from the
+middle. Regex work is therefore bounded by the window size, not the paste size,
+and a scan budget stops further analysis as a last resort.
+
+The window never rewrites text: prompts that fit are analyzed as is, and the
+cuts of longer ones fall on line breaks (or whitespace), so no word is split
+and no match can appear that the prompt does not contain.
+
+Check the window invariants on long single-line prompts:
+    python3 prompt_window.py --check
+
+Used by: skill-activation-prompt.py, debug-mode-detector.py
+"""
+
+import os
+import re
+import sys
+from typing import NamedTuple
+
+# Window layout for long prompts
+HEAD_CHARS = 6000
+TAIL_CHARS = 2000
+MAX_TRACE_LINES = 60
+
+# Traceback-looking lines from the middle are cut to this many chars around the match
+MAX_TRACE_LINE_CHARS = 500
+
+# How far a cut may move to land on a line break or whitespace
+SNAP_CHARS = 200
+
+# Characters a hook may hand to regex searches for one prompt: about 130 searches
+# over the largest window, well under the 3-5s hook timeouts. Counted, not timed,
+# so the cutoff is the same on every machine and under any load; default of
+# CLAUDE_HOOK_SCAN_BUDGET, read per Budget for daemon runs
+SCAN_BUDGET = 5_000_000
+
+# Lines from the middle of a long prompt worth keeping (tracebacks, compiler errors)
+TRACE_LINE_PATTERN = re.compile(
+    r"Traceback|Error|Exception|File \"|\bline \d+|\bat \S+:\d+|:\d+:\d+|报错|错误|异常"
+)
+
+# Non-ASCII chars that re.IGNORECASE equates with ASCII letters but str.lower()
+# does not map onto them (the Kelvin sign is already handled by lower())
+_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+
+class PromptWindow(NamedTuple):
+    """Bounded view of a prompt, prepared once and shared by all analysis steps"""
+    text: str         # Analysis window (original case)
+    folded: str       # Case-folded window, for literal/keyword search
+    length: int       # Length of the full prompt
+    newlines: int     # Newline count of the full prompt
+    truncated: bool   # True if the window is smaller than the prompt
+
+
+class Budget:
+    """Deterministic work budget in characters searched; checked between regex searches"""
+
+    def __init__(self, chars: int | None = None):
+        if chars is None:
+            try:
+                chars = int(os.environ.get("CLAUDE_HOOK_SCAN_BUDGET", SCAN_BUDGET))
+            except ValueError:
+                chars = SCAN_BUDGET
+        self.remaining = chars
+
+    def charge(self, chars: int):
+        """Account for a search over chars characters"""
+        self.remaining -= chars
+
+    def expired(self) -> bool:
+        return self.remaining <= 0
+
+
+def fold_case(text: str) -> str:
+    """Lowercase text so substring search agrees with re.IGNORECASE"""
+    return text.translate(_FOLD).lower()
+
+
+def _snap_back(text: str, pos: int, floor: int = 0) -> int:
+    """End of a cut at or before pos: just before a line break, else whitespace, else pos"""
+    low = max(floor, pos - SNAP_CHARS)
+    cut = text.rfind("\n", low, pos)
+    if cut == -1:
+        cut = next((i for i in range(pos - 1, low - 1, -1) if text[i].isspace()), pos)
+    return cut
+
+
+def _snap_forward(text: str, pos: int, ceiling: int | None = None) -> int:
+    """Start of a cut at or after pos: just after a line break, else whitespace, else pos"""
+    high = min(len(text) if ceiling is None else ceiling, pos + SNAP_CHARS)
+    cut = text.find("\n", pos, high)
+    if cut == -1:
+        cut = next((i for i in range(pos, high) if text[i].isspace()), -1)
+    return pos if cut == -1 else cut + 1
+
+
+def _trace_lines(text: str) -> list[str]:
+    """First MAX_TRACE_LINES distinct lines in text that look like error output"""
+    lines = []
+    last_end = -1
+    for m in TRACE_LINE_PATTERN.finditer(text):
+        if m.start() <= last_end:
+            continue  # Already took this line
+        start = text.rfind("\n", 0, m.start()) + 1
+        end = text.find("\n", m.end())
+        if end == -1:
+            end = len(text)
+        last_end = end
+        if end - start > MAX_TRACE_LINE_CHARS:
+            # Excerpt around the match, cut between words
+            half = (MAX_TRACE_LINE_CHARS - (m.end() - m.start())) // 2
+            start = _snap_forward(text, max(start, m.start() - half), m.start())
+            end = _snap_back(text, min(end, m.end() + half), m.end())
+        lines.append(text[start:end])
+        if len(lines) >= MAX_TRACE_LINES:
+            break
+    return lines
+
+
+def build_window(prompt: str) -> PromptWindow:
+    """
+    Normalize a prompt and extract its analysis window.
+
+    Prompts up to HEAD_CHARS + TAIL_CHARS are analyzed whole; longer ones
+    keep the head, the tail and traceback-looking lines from the middle,
+    each cut on a line break or whitespace and joined by line breaks.
+    """
+    if "\r" in prompt:
+        prompt = prompt.replace("\r\n", "\n")
+    length = len(prompt)
+    newlines = prompt.count("\n")
+
+    if length <= HEAD_CHARS + TAIL_CHARS:
+        text = prompt
+        truncated = False
+    else:
+        head_end = _snap_back(prompt, HEAD_CHARS)
+        tail_start = _snap_forward(prompt, length - TAIL_CHARS)
+        text = "\n".join([
+            prompt[:head_end],
+            *_trace_lines(prompt[head_end:tail_start]),
+            prompt[tail_start:],
+        ])
+        truncated = True
+
+    return PromptWindow(text, fold_case(text), length, newlines, truncated)
+
+
+def window_problems(prompt: str) -> list[str]:
+    """Ways in which the window of prompt rewrites its text (empty if none)"""
+    prompt = prompt.replace("\r\n", "\n")
+    window = build_window(prompt)
+    if not window.truncated:
+        return [] if window.text == prompt else ["text of an untruncated prompt was changed"]
+    problems = []
+    parts = window.text.split("\n")
+    if not prompt.startswith(parts[0]):
+        problems.append("head is not a prefix of the prompt")
+    if not prompt.endswith(parts[-1]):
+        problems.append("tail is not a suffix of the prompt")
+    words = set(prompt.split())
+    split = [word for word in window.text.split() if word not in words]
+    if split:
+        problems.append(f"words split by a cut: {split[:3]}")
+    return problems
+
+
+def sample_prompts() -> list[str]:
+    """Long single-line and multi-line prompts around the window limits"""
+    words = " ".join(f"word{i}" for i in range(3000))
+    return [
+        "x" * 496 + "exception here",
+        "a" * 497 + "prefix the import",
+        "why does this fail " * 600,
+        words,
+        words + "\nTraceback (most recent call last):\n" + words,
+        "log line\n" * 1500 + "TypeError: " + "detail " * 200 + "\n" + "log line\n" * 500,
+        "no newline " * 1000 + "ValueError at the very end",
+    ]
+
+
+def main():
+    if "--check" not in sys.argv[1:]:
+        print("Usage: prompt_window.py --check", file=sys.stderr)
+        sys.exit(1)
+    failed = 0
+    for i, prompt in enumerate(sample_prompts()):
+        for problem in window_problems(prompt):
+            print(f"sample {i} ({len(prompt)} chars): {problem}")
+            failed += 1
+    print("OK" if not failed else f"{failed} problem(s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
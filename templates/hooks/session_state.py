@@ -0,0 +1,134 @@
+"""
+Per-session state shards for hooks.
+
+Hooks that keep state (debug-mode-detector, investigation-guard) store it in
+one shard per Claude Code session, keyed by the hook input's `session_id`:
+
+    ~/.claude/hook-state/<kind>/<session-key><suffix>
+
+Concurrent sessions never contend on the same file or see each other's
+history. Only the MAX_SESSIONS most recently used shards are kept per kind.
+
+The files edited in a session are kept in a shard too (touched-files), so
+UserPromptSubmit hooks can see what the session has been working on.
+
+Used by: debug-mode-detector.py, investigation-guard.py,
+post-tool-use-tracker.py, skill-activation-prompt.py
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+STATE_ROOT = Path.home() / ".claude" / "hook-state"
+
+# Shards kept per kind; least recently used sessions are evicted beyond this
+# (CLAUDE_HOOK_MAX_SESSIONS; a malformed value falls back to the default)
+DEFAULT_MAX_SESSIONS = 32
+
+
+def _max_sessions() -> int:
+    try:
+        return int(os.environ.get("CLAUDE_HOOK_MAX_SESSIONS", DEFAULT_MAX_SESSIONS))
+    except ValueError:
+        return DEFAULT_MAX_SESSIONS
+
+
+MAX_SESSIONS = _max_sessions()
+
+# Files edited in a session (absolute paths, most recent last)
+TOUCHED_KIND = "touched-files"
+MAX_TOUCHED_FILES = 100
+
+# Session ids used verbatim as file names when they match this
+SAFE_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def session_key(hook_input: dict) -> str:
+    """File-name-safe key for the hook input's session ("default" if missing)"""
+    session_id = str(hook_input.get("session_id") or "default")
+    if SAFE_SESSION_ID.match(session_id):
+        return session_id
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+
+
+def evict_shards(directory: Path, keep: int):
+    """Remove all but the `keep` most recently used sessions in directory"""
+    sessions: dict[str, float] = {}
+    files: dict[str, list[Path]] = {}
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        # Companion files (e.g. SQLite -wal/-shm) share the session key prefix
+        key = entry.name.split(".", 1)[0]
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        sessions[key] = max(sessions.get(key, 0.0), mtime)
+        files.setdefault(key, []).append(Path(entry.path))
+
+    stale = sorted(sessions, key=sessions.get, reverse=True)[keep:]
+    for key in stale:
+        for path in files[key]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def shard_path(kind: str, hook_input: dict, suffix: str) -> Path:
+    """
+    Path of this session's shard for a hook's state.
+
+    Marks the shard as recently used; creating a shard for a new session
+    evicts the least recently used ones beyond MAX_SESSIONS.
+    """
+    directory = STATE_ROOT / kind
+    path = directory / f"{session_key(hook_input)}{suffix}"
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        directory.mkdir(parents=True, exist_ok=True)
+        evict_shards(directory, max(MAX_SESSIONS - 1, 0))
+    except OSError:
+        pass
+    return path
+
+
+def _read_touched(path: Path) -> list[str]:
+    try:
+        files = json.loads(path.read_text())
+        return [f for f in files if isinstance(f, str)] if isinstance(files, list) else []
+    except (OSError, ValueError):
+        return []
+
+
+def touched_files(hook_input: dict) -> list[str]:
+    """Files edited in this session, most recent last"""
+    return _read_touched(shard_path(TOUCHED_KIND, hook_input, ".json"))
+
+
+def record_touched_files(hook_input: dict, paths: list[str]):
+    """
+    Add edited files to this session's touched-files shard.
+
+    The read-modify-write holds an exclusive flock on a companion .lock file
+    (parallel PostToolUse events would otherwise drop each other's files);
+    readers never lock, the shard is replaced atomically.
+    """
+    path = shard_path(TOUCHED_KIND, hook_input, ".json")
+    try:
+        with open(path.with_name(f"{path.name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            files = [f for f in _read_touched(path) if f not in paths] + paths
+            tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(files[-MAX_TOUCHED_FILES:]))
+            os.replace(tmp_file, path)
+    except OSError:
+        pass
@@ -11,25 +11,36 @@ Output: Skill recommendations (stdout) - injected into model context
 Inspired by: https://github.com/diet103/claude-code-infrastructure-showcase
 """
 
+import hashlib
 import json
+import math
+import os
 import re
 import select
 import sys
-from datetime import datetime
+from collections import Counter, deque
 from pathlib import Path
 from typing import Any
 
-# Debug log file
-DEBUG_LOG = Path(__file__).parent / "hook-debug.log"
+try:
+    import re._constants as sre_constants
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
 
+sys.path.insert(0, str(Path(__file__).parent))
+from file_triggers import GlobTrie, build_glob_trie, prompt_paths
+from hook_telemetry import annotate, instrument, mark, record_error
+from prompt_window import Budget, PromptWindow, build_window
+from session_state import touched_files
 
-def log_debug(msg: str):
-    """Write debug message to log file"""
-    try:
-        with open(DEBUG_LOG, "a", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().isoformat()}] {msg}\n")
-    except Exception:
-        pass
+# Compiled trigger index sidecar (next to skill-rules.json)
+INDEX_CACHE_NAME = ".skill-rules.index.json"
+INDEX_FORMAT_VERSION = 6
+
+# Compiled indexes kept across calls in long-lived processes: path -> (key, index)
+_INDEX_MEMO: dict[str, tuple[tuple, "TriggerIndex"]] = {}
 
 # Priority weights for sorting
 PRIORITY_WEIGHT = {
@@ -39,6 +50,19 @@ PRIORITY_WEIGHT = {
     "low": 1,
 }
 
+# Rank multiplier per priority: critical doubles a skill's match score
+PRIORITY_BOOST = {level: 1 + (weight - 1) / 3 for level, weight in PRIORITY_WEIGHT.items()}
+
+# Skills recommended per prompt, and size limit of the injected text (defaults of
+# SKILL_ACTIVATION_TOP_K / SKILL_ACTIVATION_MAX_CHARS, read per event for the daemon)
+TOP_K = 5
+MAX_OUTPUT_CHARS = 1200
+
+
+def idf(skills_with_term: int, total_skills: int) -> float:
+    """Inverse document frequency: terms shared by many skills weigh little"""
+    return round(math.log(1 + total_skills / max(skills_with_term, 1)), 4)
+
 
 def find_skill_rules() -> Path | None:
     """Find skill-rules.json in .claude/skills/ directory"""
@@ -57,71 +81,541 @@ def find_skill_rules() -> Path | None:
     return None
 
 
-def load_skill_rules() -> dict[str, Any] | None:
-    """Load skill-rules.json"""
-    rules_path = find_skill_rules()
+def _search_core(pattern: str) -> str:
+    """
+    Drop leading/trailing .* from a pattern.
+
+    For re.search() they never change whether a match exists, but they turn a
+    linear literal scan into a quadratic backtracking one.
+    """
+    core = pattern
+    while core.startswith(".*"):
+        core = core[2:].removeprefix("?")
+    while core.endswith(".*") or core.endswith(".*?"):
+        stripped = core[:-3] if core.endswith("?") else core[:-2]
+        trailing_slashes = len(stripped) - len(stripped.rstrip("\\"))
+        if trailing_slashes % 2:
+            break  # Escaped dot (e.g. "\\.*") is a literal, keep it
+        core = stripped
+    if core == pattern:
+        return pattern
+    try:
+        re.compile(core)
+    except re.error:
+        return pattern
+    return core
+
+
+def _required_literals(pattern: str) -> list[str]:
+    """
+    Literal runs every match of `pattern` must contain, in order (lowercased).
+
+    Only ASCII letters/digits/spaces are used so the literals can be found in
+    the case-folded prompt with the same result as re.IGNORECASE. Returns [] if no
+    usable literal exists (alternation at top level, classes only, ...).
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError):
+        return []
+
+    runs, run = [], ""
+    for op, av in parsed:
+        ch = chr(av) if op is sre_constants.LITERAL else ""
+        if ch and (ch.isascii() and (ch.isalnum() or ch == " ")):
+            run += ch.lower()
+            continue
+        if run:
+            runs.append(run)
+        run = ""
+    if run:
+        runs.append(run)
+    return runs
+
+
+def _required_literal(pattern: str) -> str:
+    """Longest literal run every match of `pattern` must contain (lowercased, "" if none)"""
+    return max(_required_literals(pattern), key=len, default="")
+
+
+def _contains_in_order(text: str, literals: list[str], start: int = 0, end: int | None = None) -> bool:
+    """Whether the literals occur in text[start:end] one after another, without overlap"""
+    pos = start
+    end = len(text) if end is None else end
+    for literal in literals:
+        pos = text.find(literal, pos, end)
+        if pos == -1:
+            return False
+        pos += len(literal)
+    return True
+
+
+# Set items and zero-width assertions that never match or look across a line break
+_LINE_CATEGORIES = {"CATEGORY_DIGIT", "CATEGORY_WORD", "CATEGORY_NOT_SPACE"}
+_LINE_ASSERTIONS = {"AT_BOUNDARY", "AT_NON_BOUNDARY"}
+
+
+def _single_line(pattern: str) -> bool:
+    """
+    Whether every match of pattern lies within one line and does not depend
+    on the text around that line.
+
+    True if nothing in the pattern can match a newline and it has no ^/$
+    anchors or lookarounds (\\b is fine: a line break is not a word char). Such
+    a pattern only needs to be searched on lines containing its literals.
+    Conservative: unknown constructs count as multi-line.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, RecursionError):
+        return False
+    dotall = bool(parsed.state.flags & re.DOTALL)
+
+    def check(items, dotall: bool) -> bool:
+        for op, av in items:
+            name = str(op)
+            if name == "LITERAL":
+                if av == 10:
+                    return False
+            elif name == "ANY":
+                if dotall:
+                    return False
+            elif name == "IN":
+                for item_op, item_av in av:
+                    item = str(item_op)
+                    if item == "LITERAL" and item_av == 10:
+                        return False
+                    if item == "RANGE" and item_av[0] <= 10 <= item_av[1]:
+                        return False
+                    if item == "CATEGORY" and str(item_av) not in _LINE_CATEGORIES:
+                        return False
+                    if item == "NEGATE":
+                        return False
+            elif name == "AT":
+                if str(av) not in _LINE_ASSERTIONS:
+                    return False
+            elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+                if not check(av[2], dotall):
+                    return False
+            elif name == "SUBPATTERN":
+                _, add_flags, del_flags, sub = av
+                scoped = (dotall or bool(add_flags & re.DOTALL)) and not del_flags & re.DOTALL
+                if not check(sub, scoped):
+                    return False
+            elif name == "ATOMIC_GROUP":
+                if not check(av, dotall):
+                    return False
+            elif name == "BRANCH":
+                if not all(check(branch, dotall) for branch in av[1]):
+                    return False
+            elif name != "GROUPREF":  # A backreference repeats a (checked) group
+                return False
+        return True
+
+    return check(parsed, dotall)
+
+
+def _intent_matches(
+    regex: re.Pattern, literals: list[str], single_line: bool, window: PromptWindow, budget: Budget | None = None
+) -> bool:
+    """
+    Whether an intent pattern matches the window (regex charged to budget).
+
+    The regex only runs once its literals occur in order; a single-line
+    pattern only runs on the lines that contain them, so a long paste costs
+    nothing for patterns whose literals are on other lines.
+    """
+    text, folded = window.text, window.folded
+    if not single_line or not literals or len(folded) != len(text):
+        if len(literals) > 1 and not _contains_in_order(folded, literals):
+            return False
+        if budget:
+            budget.charge(len(text))
+        return regex.search(text) is not None
+
+    pos = 0
+    while True:
+        hit = folded.find(literals[0], pos)
+        if hit == -1:
+            return False
+        start = folded.rfind("\n", 0, hit) + 1
+        end = folded.find("\n", hit)
+        if end == -1:
+            end = len(folded)
+        if _contains_in_order(folded, literals, start, end):
+            if budget:
+                budget.charge(end - start)
+            # pos/endpos: \b sees the real neighbors (a line break or the text edge)
+            if regex.search(text, start, end):
+                return True
+        pos = end + 1
+
+
+def _build_automaton(terms: list[str]) -> tuple[list[dict[str, int]], list[int], list[list[int]]]:
+    """Build an Aho-Corasick automaton; outputs are indexes into `terms`"""
+    goto: list[dict[str, int]] = [{}]
+    out: list[set[int]] = [set()]
+
+    for term_idx, word in enumerate(terms):
+        node = 0
+        for ch in word:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                out.append(set())
+            node = nxt
+        out[node].add(term_idx)
+
+    # Breadth-first failure links; outputs are merged along them so the
+    # search loop never has to follow failure chains to collect matches
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, nxt in goto[node].items():
+            queue.append(nxt)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0) if node else 0
+            out[nxt] |= out[fail[nxt]]
+
+    return goto, fail, [sorted(o) for o in out]
+
+
+def build_index_data(rules: dict) -> dict[str, Any]:
+    """
+    Compile skill-rules.json into a JSON-serializable trigger index.
+
+    Keywords and the longest required literal of each intent pattern share one
+    Aho-Corasick automaton; intent patterns are only run when their literal
+    was seen (or when they have none). The fileTriggers globs of all skills
+    share one segment trie (see file_triggers.py).
+
+    Every keyword and intent pattern gets an IDF weight over all skills, so
+    hits on rare triggers count more than hits on generic ones.
+    """
+    skills = []
+    terms: list[str] = []
+    term_targets: list[list] = []  # ["keyword", skill_idx, weight] | ["intent", intent_idx]
+    always: set[int] = set()
+    intents: list[list] = []  # [skill_idx, search_pattern, required_literals, single_line, weight]
+    globs: list[str] = []
+    glob_targets: list[list] = []  # [skill_idx, "include" | "exclude"]
+
+    for skill_idx, (skill_name, rule) in enumerate(rules.get("skills", {}).items()):
+        skills.append([skill_name, {
+            "priority": rule.get("priority", "low"),
+            "enforcement": rule.get("enforcement", "suggest"),
+        }])
+        prompt_triggers = rule.get("triggers", {}).get("promptTriggers", {})
+
+        for keyword in dict.fromkeys(k.lower() for k in prompt_triggers.get("keywords", [])):
+            if keyword:
+                terms.append(keyword)
+                term_targets.append(["keyword", skill_idx])
+            else:
+                always.add(skill_idx)  # "" is a substring of every prompt
+
+        for pattern in prompt_triggers.get("intentPatterns", []):
+            try:
+                re.compile(pattern)
+            except (re.error, RecursionError):
+                continue  # Invalid patterns never matched before either
+            core = _search_core(pattern)
+            literals = _required_literals(core)
+            if literals:
+                terms.append(max(literals, key=len))
+                term_targets.append(["intent", len(intents)])
+            intents.append([skill_idx, core, literals, _single_line(core)])
+
+        file_triggers = rule.get("triggers", {}).get("fileTriggers", {})
+        for kind in ("include", "exclude"):
+            for glob in file_triggers.get(kind, []):
+                if isinstance(glob, str) and glob.strip():
+                    globs.append(glob)
+                    glob_targets.append([skill_idx, kind])
+
+    # Weights, with document frequency = number of skills using the trigger
+    total = len(skills)
+    keyword_df = Counter(term for term, target in zip(terms, term_targets) if target[0] == "keyword")
+    for term, target in zip(terms, term_targets):
+        if target[0] == "keyword":
+            target.append(idf(keyword_df[term], total))
+    intent_df = Counter(pattern for _, pattern, _, _ in intents)
+    intents = [[skill_idx, pattern, literals, single_line, idf(intent_df[pattern], total)]
+               for skill_idx, pattern, literals, single_line in intents]
+
+    goto, fail, out = _build_automaton(terms)
+
+    return {
+        "version": INDEX_FORMAT_VERSION,
+        "skills": skills,
+        "priorityLevels": rules.get("priorityLevels"),
+        "goto": goto,
+        "fail": fail,
+        "out": out,
+        "terms": term_targets,
+        "always": sorted(always),
+        "alwaysWeight": idf(len(always), total),
+        "intents": intents,
+        "fileGlobs": glob_targets,
+        "fileTrie": build_glob_trie(globs),
+    }
+
+
+class TriggerIndex:
+    """
+    Compiled promptTriggers for all skills.
+
+    One pass of the Aho-Corasick automaton over the lowercased prompt finds
+    every keyword hit and every intent-pattern candidate; only candidates are
+    confirmed with their (precompiled) regex. File paths are matched against
+    the fileTriggers of all skills with one trie walk each.
+
+    Matches are scored: each keyword hit adds its IDF weight times
+    1 + log(occurrences), each matching intent pattern its IDF weight.
+    """
+
+    def __init__(self, data: dict[str, Any]):
+        self.skills: list[tuple[str, dict]] = [(name, rule) for name, rule in data["skills"]]
+        self.config = {"priorityLevels": data["priorityLevels"]} if data.get("priorityLevels") else {}
+        self._goto = data["goto"]
+        self._fail = data["fail"]
+        self._out = data["out"]
+        self._terms = data["terms"]
+        self._always = data["always"]
+        self._always_weight = data["alwaysWeight"]
+        self._intents = [
+            (skill_idx, re.compile(pattern, re.IGNORECASE), literals, single_line, weight)
+            for skill_idx, pattern, literals, single_line, weight in data["intents"]
+        ]
+        self._file_globs = data["fileGlobs"]
+        self._file_trie = GlobTrie(data["fileTrie"]) if self._file_globs else None
+
+    def _scan(self, text: str) -> Counter:
+        """Return occurrence counts of the terms found in text (single pass)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Counter = Counter()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def score(self, window: PromptWindow, budget: Budget | None = None) -> dict[int, float]:
+        """
+        Return {skill index: score} for all skills whose prompt triggers match.
+
+        Works on the bounded analysis window (see prompt_window.py). A regex
+        only runs once all its required literals were found in order, which
+        keeps .*-style patterns from backtracking over long single-line
+        prompts that cannot match. Intent patterns left when the budget runs
+        out are not evaluated.
+        """
+        scores = dict.fromkeys(self._always, self._always_weight)
+        candidates: set[int] = set()
+        for term_idx, count in self._scan(window.folded).items():
+            term = self._terms[term_idx]
+            if term[0] == "keyword":
+                scores[term[1]] = scores.get(term[1], 0.0) + term[2] * (1 + math.log(count))
+            else:
+                candidates.add(term[1])
+
+        for intent_idx, (skill_idx, regex, literals, single_line, weight) in enumerate(self._intents):
+            if literals and intent_idx not in candidates:
+                continue
+            if budget and budget.expired():
+                break
+            try:
+                if _intent_matches(regex, literals, single_line, window, budget):
+                    scores[skill_idx] = scores.get(skill_idx, 0.0) + weight
+            except RecursionError:
+                pass
+
+        return scores
+
+    def score_files(self, paths: list[str]) -> dict[int, float]:
+        """
+        Return {skill index: score} for all skills whose fileTriggers match.
+
+        A path activates a skill if it matches one of the skill's include
+        globs and none of its exclude globs; it adds an IDF weight over the
+        skills it activates.
+        """
+        scores: dict[int, float] = {}
+        if self._file_trie is None:
+            return scores
+        for path in paths:
+            include, exclude = set(), set()
+            for glob_idx in self._file_trie.match(path):
+                skill_idx, kind = self._file_globs[glob_idx]
+                (include if kind == "include" else exclude).add(skill_idx)
+            activated = include - exclude
+            for skill_idx in activated:
+                scores[skill_idx] = scores.get(skill_idx, 0.0) + idf(len(activated), len(self.skills))
+        return scores
+
+
+def project_path(path: str, root: Path | None) -> str:
+    """Path relative to the project root (posix), as fileTriggers globs expect"""
+    if root and os.path.isabs(path):
+        try:
+            return Path(path).relative_to(root).as_posix()
+        except ValueError:
+            pass
+    return Path(path).as_posix().lstrip("/")
+
+
+def _index_cache_path(rules_path: Path) -> Path:
+    """Sidecar cache file stored next to skill-rules.json"""
+    return rules_path.with_name(INDEX_CACHE_NAME)
+
 
+def load_trigger_index(rules_path: Path | None = None) -> TriggerIndex | None:
+    """
+    Load the trigger index, rebuilding it only when skill-rules.json changed.
+
+    The sidecar is keyed by the rules file's mtime/size; if those differ but
+    the SHA-256 still matches (e.g. file touched), the cached index is reused.
+    """
+    rules_path = rules_path or find_skill_rules()
     if not rules_path:
         return None
 
     try:
-        return json.loads(rules_path.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"[skill-activation] Failed to parse skill-rules.json: {e}", file=sys.stderr)
+        st = rules_path.stat()
+    except OSError:
         return None
 
+    # Long-lived processes (hook-daemon.py) keep the compiled index in memory
+    memo_key = (str(rules_path), st.st_mtime_ns, st.st_size)
+    memo = _INDEX_MEMO.get(memo_key[0])
+    if memo and memo[0] == memo_key:
+        return memo[1]
 
-def matches_triggers(prompt: str, triggers: dict) -> bool:
-    """Check if prompt matches skill trigger rules"""
-    # Limit prompt length for performance (avoid regex catastrophic backtracking)
-    MAX_PROMPT_LEN = 2000
-    if len(prompt) > MAX_PROMPT_LEN:
-        prompt = prompt[:MAX_PROMPT_LEN]
-
-    prompt_lower = prompt.lower()
-    prompt_triggers = triggers.get("promptTriggers", {})
+    index = _load_trigger_index(rules_path, st)
+    if index is not None:
+        _INDEX_MEMO[memo_key[0]] = (memo_key, index)
+    return index
 
-    # Keyword matching
-    for keyword in prompt_triggers.get("keywords", []):
-        if keyword.lower() in prompt_lower:
-            return True
 
-    # Intent pattern matching (regex) - with timeout protection
-    for pattern in prompt_triggers.get("intentPatterns", []):
-        try:
-            # Use simple patterns only, skip complex ones on long input
-            if len(prompt) > 500 and (".*" in pattern or ".+" in pattern):
-                continue
-            if re.search(pattern, prompt, re.IGNORECASE):
-                return True
-        except (re.error, RecursionError):
-            pass
+def _load_trigger_index(rules_path: Path, st: os.stat_result) -> TriggerIndex | None:
+    """Load the index from the sidecar cache or rebuild it from skill-rules.json"""
+    cache_path = _index_cache_path(rules_path)
+    cached = None
+    try:
+        cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        if cached.get("version") != INDEX_FORMAT_VERSION:
+            cached = None
+        elif cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return TriggerIndex(cached["index"])
+    except Exception:
+        cached = None
 
-    return False
+    try:
+        raw = rules_path.read_bytes()
+    except OSError:
+        return None
+    digest = hashlib.sha256(raw).hexdigest()
 
+    if cached and cached.get("sha256") == digest:
+        data = cached["index"]
+    else:
+        try:
+            rules = json.loads(raw.decode("utf-8"))
+        except Exception as e:
+            record_error(e)
+            print(f"[skill-activation] Failed to parse skill-rules.json: {e}", file=sys.stderr)
+            return None
+        data = build_index_data(rules)
+
+    payload = {
+        "version": INDEX_FORMAT_VERSION,
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": digest,
+        "index": data,
+    }
+    try:
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Read-only rules directory: still works, just without the cache
+
+    return TriggerIndex(data)
+
+
+def analyze_prompt(
+    prompt: str,
+    index: TriggerIndex,
+    budget: Budget | None = None,
+    session_files: list[str] | None = None,
+    root: Path | None = None,
+) -> list[tuple[str, dict, float]]:
+    """
+    Analyze prompt (and the files touched or mentioned) and return matching skills.
+
+    Returns (name, rule, score) for every matching skill, best first: the
+    match score boosted by the skill's priority.
+    """
+    window = build_window(prompt)
+    scores = index.score(window, budget)
+    paths = [*(session_files or []), *prompt_paths(window.text)]
+    if paths:
+        file_scores = index.score_files(list(dict.fromkeys(project_path(p, root) for p in paths)))
+        for skill_idx, score in file_scores.items():
+            scores[skill_idx] = scores.get(skill_idx, 0.0) + score
 
-def analyze_prompt(prompt: str, rules: dict) -> list[tuple[str, dict]]:
-    """Analyze prompt and return matching skills"""
     matches = []
+    for skill_idx, score in sorted(scores.items()):
+        name, rule = index.skills[skill_idx]
+        matches.append((name, rule, score * PRIORITY_BOOST.get(rule.get("priority", "low"), 1.0)))
 
-    for skill_name, rule in rules.get("skills", {}).items():
-        if matches_triggers(prompt, rule.get("triggers", {})):
-            matches.append((skill_name, rule))
-
-    # Sort by priority
-    matches.sort(
-        key=lambda x: PRIORITY_WEIGHT.get(x[1].get("priority", "low"), 0),
-        reverse=True
-    )
-
+    # Best score first (ties: rule order, as matches were collected by skill index)
+    matches.sort(key=lambda m: m[2], reverse=True)
     return matches
 
 
-def generate_recommendation(matches: list[tuple[str, dict]], config: dict) -> str:
-    """Generate recommendation output"""
+def generate_recommendation(
+    matches: list[tuple[str, dict, float]],
+    config: dict,
+    top_k: int | None = None,
+    max_chars: int | None = None,
+) -> str:
+    """
+    Generate recommendation output for the top_k best matches.
+
+    Lower-ranked skills are dropped until the text fits max_chars; skills
+    with enforcement "block" are always listed. Both default to the
+    SKILL_ACTIVATION_* settings.
+    """
     if not matches:
         return ""
-
+    if top_k is None:
+        top_k = int(os.environ.get("SKILL_ACTIVATION_TOP_K", TOP_K))
+    if max_chars is None:
+        max_chars = int(os.environ.get("SKILL_ACTIVATION_MAX_CHARS", MAX_OUTPUT_CHARS))
+
+    required = [m for m in matches if m[1].get("enforcement") == "block"]
+    shown = matches[:max(top_k, 1)]
+    shown += [m for m in required if m not in shown]
+    while True:
+        text = _format_recommendation(shown, config, len(matches) - len(shown))
+        droppable = [m for m in shown if m not in required]
+        if len(text) <= max_chars or len(shown) <= 1 or not droppable:
+            return text
+        shown.remove(droppable[-1])
+
+
+def _format_recommendation(matches: list[tuple[str, dict, float]], config: dict, omitted: int) -> str:
+    """Recommendation block for the given matches, grouped by priority"""
     lines = []
     lines.append("")
     lines.append("=" * 60)
@@ -129,13 +623,13 @@ def generate_recommendation(matches: list[tuple[str, dict]], config: dict) -> st
     lines.append("=" * 60)
     lines.append("")
 
-    # Group by priority
-    grouped: dict[str, list[tuple[str, dict]]] = {}
-    for skill_name, rule in matches:
+    # Group by priority (best score first within a group)
+    grouped: dict[str, list[tuple[str, dict, float]]] = {}
+    for skill_name, rule, score in matches:
         priority = rule.get("priority", "low")
         if priority not in grouped:
             grouped[priority] = []
-        grouped[priority].append((skill_name, rule))
+        grouped[priority].append((skill_name, rule, score))
 
     priority_levels = config.get("priorityLevels", {
         "critical": {"icon": "!!", "label": "MUST USE"},
@@ -154,15 +648,19 @@ def generate_recommendation(matches: list[tuple[str, dict]], config: dict) -> st
         lines.append(f"{level['icon']} {level['label'].upper()}")
         lines.append("-" * 40)
 
-        for skill_name, rule in group:
+        for skill_name, rule, score in group:
             enforcement = rule.get("enforcement", "suggest")
             tag = ""
             if enforcement == "warn":
                 tag = " [WARN]"
             elif enforcement == "block":
                 tag = " [REQUIRED]"
-            lines.append(f"  - {skill_name}{tag}")
+            lines.append(f"  - {skill_name}{tag} (score {score:.1f})")
+
+        lines.append("")
 
+    if omitted:
+        lines.append(f"(+{omitted} more with lower scores)")
         lines.append("")
 
     lines.append("=" * 60)
@@ -179,6 +677,11 @@ def stdin_has_data(timeout: float = 0.5) -> bool:
     """Check if stdin has data available to read (non-blocking)"""
     if sys.stdin.closed:
         return False
+    try:
+        sys.stdin.fileno()
+    except (OSError, ValueError):
+        # In-memory stdin (e.g. hook-daemon.py): the payload is already there
+        return True
     try:
         # Use select to check if stdin has data (Unix only, but works on macOS/Linux)
         ready, _, _ = select.select([sys.stdin], [], [], timeout)
@@ -188,38 +691,37 @@ def stdin_has_data(timeout: float = 0.5) -> bool:
         return False
 
 
+@instrument("skill-activation-prompt")
 def main():
     """Main function"""
-    log_debug("=== Hook started ===")
+    mark("stdin")
     try:
-        # Read stdin with size limit to prevent memory issues
-        MAX_INPUT_SIZE = 50000  # 50KB
+        # Read stdin with size limit to prevent memory issues (large enough for
+        # pasted logs: the prompt itself is bounded by prompt_window.py)
+        MAX_INPUT_SIZE = 8 * 1024 * 1024  # 8MB
 
         # Check if stdin is closed
         if sys.stdin.closed:
-            log_debug("stdin closed, exiting silently")
+            annotate(skipped="stdin closed")
             sys.exit(0)
 
         # Use select to check if stdin has data (prevents blocking on empty pipe)
         # This is the key fix for the compact-after issue
-        has_data = stdin_has_data(timeout=0.5)
-        log_debug(f"stdin_has_data={has_data}")
-        if not has_data:
-            log_debug("no data on stdin within timeout, exiting silently (possibly compact)")
+        if not stdin_has_data(timeout=0.5):
+            annotate(skipped="no stdin data (possibly compact)")
             sys.exit(0)  # Exit cleanly, no error
 
         input_str = sys.stdin.read(MAX_INPUT_SIZE)
-        log_debug(f"Read {len(input_str)} bytes from stdin")
+        annotate(input_bytes=len(input_str))
         if not input_str or not input_str.strip():
-            log_debug("empty input, exiting silently")
+            annotate(skipped="empty input")
             sys.exit(0)  # Exit cleanly, no error
 
+        mark("parse")
         try:
             hook_input = json.loads(input_str)
-            log_debug("JSON parsed successfully")
         except json.JSONDecodeError as e:
-            log_debug(f"ERROR: JSON parse error: {e}")
-            log_debug(f"Input preview: {input_str[:500]!r}")
+            record_error(e)
             return
 
         prompt = hook_input.get("prompt", "")
@@ -229,24 +731,33 @@ def main():
         # Skip if prompt looks like raw logs/dumps (contains too many special chars)
         special_char_ratio = sum(1 for c in prompt[:1000] if c in '{}[]<>\\|') / min(len(prompt), 1000)
         if special_char_ratio > 0.1:  # More than 10% special characters
+            annotate(skipped="special characters")
             return
 
-        # Load rules
-        rules = load_skill_rules()
-        if not rules:
+        # Load compiled trigger index (cached next to skill-rules.json)
+        mark("rules")
+        index = load_trigger_index()
+        if not index:
+            annotate(skipped="no skill rules")
             return
 
-        # Analyze and output recommendations
-        matches = analyze_prompt(prompt, rules)
-        recommendation = generate_recommendation(matches, rules)
-
+        # Analyze and output recommendations (fileTriggers: files edited in this session)
+        mark("state")
+        session_files = touched_files(hook_input)
+        mark("match")
+        root_dir = os.environ.get("CLAUDE_PROJECT_DIR") or hook_input.get("cwd")
+        matches = analyze_prompt(
+            prompt, index, Budget(), session_files, Path(root_dir) if root_dir else None
+        )
+        annotate(matches=len(matches))
+
+        mark("output")
+        recommendation = generate_recommendation(matches, index.config)
         if recommendation:
             print(recommendation)
 
     except Exception as e:
-        log_debug(f"EXCEPTION: {type(e).__name__}: {e}")
-        import traceback
-        log_debug(traceback.format_exc())
+        record_error(e)
 
 
 if __name__ == "__main__":
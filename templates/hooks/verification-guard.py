@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Verification Guard Hook
+
+Verifies code integrity before task completion.
+Event: Stop
+
+Checks every modified file (unstaged, staged and untracked) with the checker
+registered for its language in CHECKERS:
+- Python: syntax, compiled in-process (worker processes for large diffs)
+- JSON: parsed in-process (JSONC for tsconfig.json, .vscode/*.json, ...)
+- Shell: bash -n
+- Go: gofmt -e (syntax errors)
+- JavaScript: node --check
+Checkers whose tool is not installed are skipped. Each language has its own
+worker limit, all share one deadline, and files whose content already
+passed a checker are skipped (content-hash cache).
+
+Exit codes:
+- 0: All checks passed
+- 2: Verification failed (blocks completion, reasons on stderr)
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+from hook_telemetry import annotate, instrument, mark, record_error
+
+# Passed content hashes: ~/.claude/hook-state/verify-cache.json
+CACHE_FILE = Path.home() / ".claude" / "hook-state" / "verify-cache.json"
+MAX_CACHE_ENTRIES = 5000
+
+# Seconds for all checks (the Stop hook timeout is 15s)
+VERIFY_BUDGET = float(os.environ.get("VERIFY_BUDGET", "12"))
+
+# Below this many files, in-process checks beat starting worker processes (unless
+# one is larger than INLINE_MAX_BYTES: an inline compile() cannot be stopped)
+POOL_THRESHOLD = 8
+INLINE_MAX_BYTES = 1024 * 1024
+
+# JSON files that allow comments and trailing commas (file name, or parent directory)
+JSONC_NAMES = ["tsconfig*.json", "jsconfig*.json", ".eslintrc.json", "devcontainer.json", ".devcontainer.json"]
+JSONC_DIRS = {".vscode", ".devcontainer", ".theia"}
+
+# Strings (kept), comments, or trailing commas in JSONC
+JSONC_TOKEN = re.compile(r'("(?:\\.|[^"\\])*")|(//[^\n]*|/\*.*?\*/)|(,)(?=\s*[}\]])', re.DOTALL)
+
+# Failures reported in detail
+MAX_REPORTED = 10
+
+CPU_COUNT = os.cpu_count() or 1
+
+
+def modified_files() -> list[Path]:
+    """Unstaged, staged and untracked files of the current git repository"""
+    try:
+        top = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            capture_output=True, text=True, timeout=5,
+        )
+        if top.returncode != 0:
+            return []
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all"],
+            capture_output=True, timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        record_error(e)
+        return []
+
+    root = Path(top.stdout.strip())
+    files = []
+    entries = status.stdout.split(b"\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        code, path = entry[:2], os.fsdecode(entry[3:])
+        if b"R" in code or b"C" in code:
+            i += 1  # Skip the rename/copy source path
+        if b"D" in code:
+            continue
+        files.append(root / path)
+    return files
+
+
+def content_hash(path: Path) -> str | None:
+    """SHA-256 of a file's content, or None if unreadable"""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Checkers: check(path, deadline) -> error message, or None if the file is OK
+# (TimeoutError if the deadline passed before a verdict)
+# ---------------------------------------------------------------------------
+
+def check_python(path: str, deadline: float) -> str | None:
+    """Syntax error message for a Python file"""
+    try:
+        source = Path(path).read_bytes()
+    except OSError as e:
+        return f"cannot read: {e}"
+    try:
+        # compile() only: unlike py_compile, no .pyc files are written
+        compile(source, path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return f"line {e.lineno}: {e.msg}"
+    except ValueError as e:
+        return str(e)  # e.g. null bytes
+    return None
+
+
+def check_json(path: str, deadline: float) -> str | None:
+    """Parse error message for a JSON file"""
+    try:
+        json.loads(Path(path).read_bytes())
+    except OSError as e:
+        return f"cannot read: {e}"
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def strip_jsonc(text: str) -> str:
+    """JSONC as plain JSON; comments and trailing commas become spaces (positions are kept)"""
+    def blank(m: re.Match) -> str:
+        if m.group(1):
+            return m.group(1)
+        return re.sub(r"[^\n]", " ", m.group(0))
+
+    # Twice: a trailing comma can be followed by a comment
+    return JSONC_TOKEN.sub(blank, JSONC_TOKEN.sub(blank, text))
+
+
+def check_jsonc(path: str, deadline: float) -> str | None:
+    """Parse error message for a JSON-with-comments file"""
+    try:
+        text = Path(path).read_bytes().decode("utf-8-sig")
+    except OSError as e:
+        return f"cannot read: {e}"
+    except ValueError as e:
+        return str(e)
+    try:
+        json.loads(strip_jsonc(text))
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def run_tool(argv: list[str], deadline: float) -> str | None:
+    """Run an external checker; its output is the error message on failure"""
+    timeout = deadline - time.monotonic()
+    if timeout <= 0:
+        raise TimeoutError(argv[0])
+    try:
+        result = subprocess.run(
+            argv, capture_output=True, text=True, errors="replace",
+            stdin=subprocess.DEVNULL, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(argv[0]) from None
+    except OSError as e:
+        return str(e)
+    if result.returncode == 0:
+        return None
+    output = [line.strip() for line in (result.stderr or result.stdout).splitlines() if line.strip()]
+    # Prefer lines naming the error over context lines (e.g. node's source excerpt)
+    errors = [line for line in output if "error" in line.lower()]
+    return "; ".join((errors or output)[:3]) or f"exit code {result.returncode}"
+
+
+def check_shell(path: str, deadline: float) -> str | None:
+    return run_tool(["bash", "-n", path], deadline)
+
+
+def check_go(path: str, deadline: float) -> str | None:
+    # -l lists unformatted files on stdout (not an error), -e reports all syntax errors
+    return run_tool(["gofmt", "-e", "-l", path], deadline)
+
+
+def check_javascript(path: str, deadline: float) -> str | None:
+    return run_tool(["node", "--check", path], deadline)
+
+
+class Checker(NamedTuple):
+    """A verification backend for one language"""
+    label: str                                     # Used in failure messages
+    check: Callable[[str, float], str | None]
+    workers: int                                   # Concurrency limit for this language
+    in_process: bool                               # Python code (inline or worker processes) vs external tool
+    tool: str | None = None                        # Executable that must be on PATH
+    version: str = ""                              # Part of the cache key
+
+
+# Extension -> checker; customize for your project's toolchain
+CHECKERS: dict[str, Checker] = {
+    ".py": Checker("Python syntax error", check_python, CPU_COUNT, True,
+                   version="py%d.%d" % sys.version_info[:2]),
+    ".json": Checker("JSON error", check_json, CPU_COUNT, True),
+    ".sh": Checker("Shell syntax error", check_shell, 4, False, tool="bash"),
+    ".bash": Checker("Shell syntax error", check_shell, 4, False, tool="bash"),
+    ".go": Checker("Go syntax error", check_go, 4, False, tool="gofmt"),
+    ".js": Checker("JavaScript syntax error", check_javascript, 2, False, tool="node"),
+    ".mjs": Checker("JavaScript syntax error", check_javascript, 2, False, tool="node"),
+    ".cjs": Checker("JavaScript syntax error", check_javascript, 2, False, tool="node"),
+}
+
+
+JSONC_CHECKER = Checker("JSON error", check_jsonc, CPU_COUNT, True)
+
+
+def checker_for(path: Path, checkers: dict[str, Checker]) -> Checker | None:
+    """Checker of a file (by extension; JSONC files get the lenient JSON checker)"""
+    checker = checkers.get(path.suffix)
+    if checker is not None and checker.check is check_json and (
+            path.parent.name in JSONC_DIRS or any(fnmatch.fnmatch(path.name, p) for p in JSONC_NAMES)):
+        return JSONC_CHECKER
+    return checker
+
+
+def cache_key(checker: Checker, digest: str) -> str:
+    """Cache key of a file content for a checker (and its version)"""
+    return f"{checker.check.__name__}:{checker.version}:{digest}"
+
+
+def load_cache() -> dict[str, float]:
+    """Passed cache keys -> last use time"""
+    try:
+        data = json.loads(CACHE_FILE.read_text())
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict[str, float]):
+    """Write the cache back (atomic replace; last writer wins)"""
+    if len(cache) > MAX_CACHE_ENTRIES:
+        cache = dict(sorted(cache.items(), key=lambda item: item[1], reverse=True)[:MAX_CACHE_ENTRIES])
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = CACHE_FILE.with_name(f"{CACHE_FILE.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(cache))
+        os.replace(tmp_file, CACHE_FILE)
+    except OSError:
+        pass
+
+
+def check_worker():
+    """Worker process: check the JSON list of paths on stdin, one [path, error] line each"""
+    for path in json.loads(sys.stdin.read()):
+        checker = checker_for(Path(path), CHECKERS)
+        if checker is not None and checker.in_process:
+            print(json.dumps([path, checker.check(path, float("inf"))]), flush=True)
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def run_worker(paths: list[str], results: dict[str, str | None], processes: list[subprocess.Popen]):
+    """Check paths in a worker process, storing verdicts as they arrive (until it is killed)"""
+    proc = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--check-worker"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    processes.append(proc)
+    try:
+        proc.stdin.write(json.dumps(paths))
+        proc.stdin.close()
+        for line in proc.stdout:
+            path, error = json.loads(line)
+            results[path] = error
+    except (OSError, ValueError):
+        pass  # Killed at the deadline: remaining paths are unchecked
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
+def run_checks(jobs: list[tuple[str, Checker]], deadline: float) -> tuple[dict[str, str | None], list[str]]:
+    """
+    Check files with their language's checker until the shared deadline.
+
+    External tools get a thread pool per language, limited to the checker's
+    workers. In-process checkers run inline for small change sets, and in
+    worker processes otherwise; workers still busy at the deadline are
+    killed (a running compile() cannot be interrupted otherwise).
+    Returns ({path: error or None}, paths not checked in time).
+    """
+    in_process = [(path, c) for path, c in jobs if c.in_process]
+    external: dict[Callable, list[tuple[str, Checker]]] = {}
+    for path, checker in jobs:
+        if not checker.in_process:
+            external.setdefault(checker.check, []).append((path, checker))
+
+    results: dict[str, str | None] = {}
+    futures: dict[Future, str] = {}
+    executors: list[ThreadPoolExecutor] = []
+    threads: list[threading.Thread] = []
+    processes: list[subprocess.Popen] = []
+    try:
+        if len(in_process) >= POOL_THRESHOLD or any(file_size(path) > INLINE_MAX_BYTES for path, _ in in_process):
+            workers = min(max(c.workers for _, c in in_process), len(in_process))
+            paths = [path for path, _ in in_process]
+            for i in range(workers):
+                thread = threading.Thread(target=run_worker, args=(paths[i::workers], results, processes))
+                thread.start()
+                threads.append(thread)
+            in_process = []
+
+        for group in external.values():
+            executors.append(ThreadPoolExecutor(max_workers=min(group[0][1].workers, len(group))))
+            for path, checker in group:
+                futures[executors[-1].submit(checker.check, path, deadline)] = path
+
+        # Small change sets: check inline while external tools run
+        for path, checker in in_process:
+            if time.monotonic() >= deadline:
+                break
+            results[path] = checker.check(path, deadline)
+
+        done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except TimeoutError:
+                pass  # No verdict in time: reported as unchecked
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for proc in processes:
+            if proc.poll() is None:
+                proc.kill()
+        for thread in threads:
+            thread.join()
+
+    results = dict(results)  # Snapshot: no worker writes after this point
+    return results, [path for path, _ in jobs if path not in results]
+
+
+@instrument("verification-guard")
+def main():
+    start = time.monotonic()
+    mark("files")
+    available = {ext: c for ext, c in CHECKERS.items() if c.tool is None or shutil.which(c.tool)}
+    files = [f for f in modified_files() if f.suffix in available and f.is_file()]
+    if not files:
+        sys.exit(0)
+
+    # Skip files whose exact content already passed their checker
+    mark("state")
+    cache = load_cache()
+    jobs: list[tuple[str, Checker]] = []
+    keys: dict[str, str] = {}
+    now = time.time()
+    for path in files:
+        checker = checker_for(path, available)
+        digest = content_hash(path)
+        if digest is not None:
+            key = cache_key(checker, digest)
+            if key in cache:
+                cache[key] = now
+                continue
+            keys[str(path)] = key
+        jobs.append((str(path), checker))
+
+    mark("check")
+    annotate(files=len(files), checked=len(jobs))
+    results, unchecked = run_checks(jobs, start + VERIFY_BUDGET)
+
+    labels = dict(jobs)
+    failures = []
+    for path, error in results.items():
+        if error is None:
+            if path in keys:
+                cache[keys[path]] = now
+        else:
+            failures.append((path, error))
+    mark("state")
+    save_cache(cache)
+
+    mark("output")
+    if unchecked:
+        print(f"Verification incomplete: {len(unchecked)} file(s) not checked within {VERIFY_BUDGET:.0f}s", file=sys.stderr)
+
+    if failures:
+        failures.sort()
+        for path, error in failures[:MAX_REPORTED]:
+            print(f"Verification failed: {labels[path].label} in {path} ({error})", file=sys.stderr)
+        if len(failures) > MAX_REPORTED:
+            print(f"... and {len(failures) - MAX_REPORTED} more file(s) with errors", file=sys.stderr)
+        print("Please fix the errors before completing the task.", file=sys.stderr)
+        sys.exit(2)
+
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    if "--check-worker" in sys.argv[1:]:
+        check_worker()
+    else:
+        main()
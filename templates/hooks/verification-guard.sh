@@ -1,31 +1,38 @@
 #!/bin/bash
-# Stop Hook: Verify Task Completion
+# Stop Hook: Verify Task Completion - Shell entry point
 #
 # Event: Stop
 # Purpose: Verify code integrity before task completion
 #
-# Checks:
-# - Python syntax validation for modified .py files
-# - Can be extended to check other file types
+# Checks (see verification-guard.py):
+# - Syntax validation of all modified files (staged, unstaged, untracked):
+#   Python, JSON, shell, Go, JavaScript
+# - Extend via CHECKERS in verification-guard.py
 #
 # Exit codes:
 # - 0: All checks passed
 # - 2: Verification failed (blocks completion)
 
-# Check for recently modified Python files
-MODIFIED_PY=$(git diff --name-only 2>/dev/null | grep '\.py$' | head -5)
+# Get the directory where this script is located
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" 2>/dev/null && pwd)"
+if [ -z "$SCRIPT_DIR" ]; then
+    SCRIPT_DIR="$(dirname "$0")"
+fi
+
+PY_FILE="$SCRIPT_DIR/verification-guard.py"
 
-if [ -n "$MODIFIED_PY" ]; then
-    # Check Python syntax
-    for file in $MODIFIED_PY; do
-        if [ -f "$file" ]; then
-            if ! python3 -m py_compile "$file" 2>&1; then
-                echo "Verification failed: Python syntax error in $file" >&2
-                echo "Please fix the syntax error before completing the task." >&2
-                exit 2
-            fi
-        fi
-    done
+# Check if Python file exists
+if [ ! -f "$PY_FILE" ]; then
+    echo "[verification-guard] Error: $PY_FILE not found" >&2
+    exit 1
 fi
 
-exit 0
+# Run Python script with exec to properly pass stdin
+if command -v python3 &> /dev/null; then
+    exec python3 "$PY_FILE"
+elif command -v python &> /dev/null; then
+    exec python "$PY_FILE"
+else
+    echo "[verification-guard] Error: Python not found" >&2
+    exit 1
+fi